@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Full-resolution export of images with measurement annotations drawn on them.
+
+The output is rendered and written one horizontal strip at a time: each
+strip is cropped from the source, the annotations crossing it are drawn
+with ImageDraw, and the rows are compressed straight into a PNG file.
+Peak extra memory is therefore a small multiple of one strip, however
+large the image is.
+"""
+
+import os
+import struct
+import zlib
+
+from PIL import ImageDraw, ImageFont
+
+
+# Rows rendered and written at once
+DEFAULT_STRIP_HEIGHT = 512
+
+# PNG colour types for the modes the writer supports
+PNG_COLOR_TYPES = {"L": 0, "RGB": 2, "RGBA": 6}
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class Annotation:
+    """A line or box drawn on the exported image, in image coordinates."""
+    
+    __slots__ = ("kind", "points", "label", "color")
+    
+    def __init__(self, kind, points, label="", color="blue"):
+        """
+        Initialize an annotation.
+        
+        Args:
+            kind (str): "line" (two end points) or "box" (two opposite corners)
+            points (tuple): ((x1, y1), (x2, y2)) in original image pixels
+            label (str): Text drawn next to the annotation
+            color (str): Outline colour
+        """
+        if kind not in ("line", "box"):
+            raise ValueError(f"Unknown annotation kind: {kind}")
+        self.kind = kind
+        self.points = points
+        self.label = label
+        self.color = color
+
+
+class PNGStreamWriter:
+    """Write an 8-bit PNG incrementally, a block of rows at a time."""
+    
+    def __init__(self, path, width, height, mode, compression=6):
+        """Open the file and write the PNG header."""
+        if mode not in PNG_COLOR_TYPES:
+            raise ValueError(f"Cannot stream PNG in mode {mode}")
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.rows_written = 0
+        self.row_bytes = width * len(mode)
+        self.compressor = zlib.compressobj(compression)
+        self.file = open(path, "wb")
+        self.file.write(PNG_SIGNATURE)
+        self.write_chunk(
+            b"IHDR",
+            struct.pack(">IIBBBBB", width, height, 8, PNG_COLOR_TYPES[mode], 0, 0, 0)
+        )
+    
+    def write_chunk(self, chunk_type, data):
+        """Write one length-prefixed, CRC-checked PNG chunk."""
+        self.file.write(struct.pack(">I", len(data)))
+        self.file.write(chunk_type)
+        self.file.write(data)
+        self.file.write(struct.pack(">I", zlib.crc32(chunk_type + data) & 0xFFFFFFFF))
+    
+    def write_rows(self, image):
+        """Append the rows of an image with the writer's width and mode."""
+        if image.mode != self.mode or image.width != self.width:
+            raise ValueError("Strip does not match the PNG width and mode")
+        data = image.tobytes()
+        row_bytes = self.row_bytes
+        # Each scanline starts with its filter type (0 = none)
+        raw = b"".join(
+            b"\x00" + data[offset:offset + row_bytes]
+            for offset in range(0, len(data), row_bytes)
+        )
+        compressed = self.compressor.compress(raw)
+        if compressed:
+            self.write_chunk(b"IDAT", compressed)
+        self.rows_written += image.height
+    
+    def close(self):
+        """Flush the compressor and finish the file."""
+        if self.rows_written != self.height:
+            raise ValueError(f"Wrote {self.rows_written} of {self.height} rows")
+        self.write_chunk(b"IDAT", self.compressor.flush())
+        self.write_chunk(b"IEND", b"")
+        self.file.close()
+    
+    def abort(self):
+        """Close and delete an unfinished file."""
+        self.file.close()
+        os.remove(self.file.name)
+
+
+def default_line_width(size):
+    """Pick a line width that stays visible on large images."""
+    return max(2, round(min(size) / 800))
+
+
+def load_font(size):
+    """Load Pillow's default font at a given size when supported."""
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1 only has the fixed-size bitmap font
+        return ImageFont.load_default()
+
+
+class AnnotationLayout:
+    """
+    Annotations with precomputed extents for fast per-strip culling.
+    
+    Coordinates are snapped to whole pixels once, up front. Each strip then
+    draws the same shapes shifted by a whole number of rows, so Pillow
+    rounds every edge the same way and the output does not depend on the
+    strip height.
+    """
+    
+    def __init__(self, annotations, font, line_width):
+        """Measure every annotation and its label once."""
+        self.font = font
+        self.line_width = line_width
+        self.items = []
+        for annotation in annotations:
+            points = tuple((round(x), round(y)) for x, y in annotation.points)
+            (x1, y1), (x2, y2) = points
+            label_position = None
+            top, bottom = min(y1, y2) - line_width, max(y1, y2) + line_width
+            if annotation.label:
+                if annotation.kind == "line":
+                    label_position = ((x1 + x2) // 2 + line_width * 2, (y1 + y2) // 2 + line_width * 2)
+                else:
+                    label_position = (min(x1, x2), max(y1, y2) + line_width * 2)
+                text_box = font.getbbox(annotation.label)
+                label_bottom = label_position[1] + text_box[3] + line_width
+                top = min(top, label_position[1] + text_box[1] - line_width)
+                bottom = max(bottom, label_bottom)
+            self.items.append((top, bottom, annotation, points, label_position))
+    
+    def draw_strip(self, strip, y0):
+        """Draw every annotation intersecting rows y0..y0+height onto strip."""
+        draw = ImageDraw.Draw(strip)
+        y1 = y0 + strip.height
+        for top, bottom, annotation, points, label_position in self.items:
+            if bottom < y0 or top > y1:
+                continue
+            (ax, ay), (bx, by) = points
+            if annotation.kind == "line":
+                draw.line([(ax, ay - y0), (bx, by - y0)], fill=annotation.color, width=self.line_width)
+            else:
+                draw.rectangle(
+                    [min(ax, bx), min(ay, by) - y0, max(ax, bx), max(ay, by) - y0],
+                    outline=annotation.color,
+                    width=self.line_width
+                )
+            if label_position is not None:
+                draw.text(
+                    (label_position[0], label_position[1] - y0),
+                    annotation.label,
+                    fill=annotation.color,
+                    font=self.font,
+                    stroke_width=max(1, self.line_width // 2),
+                    stroke_fill="white"
+                )
+
+
+def export_annotated_image(image, annotations, path, strip_height=DEFAULT_STRIP_HEIGHT,
+                           line_width=None, progress=None):
+    """
+    Render annotations over an image at full resolution and save it as PNG.
+    
+    Args:
+        image (PIL.Image.Image): Source in a display mode ("L", "RGB", "RGBA")
+        annotations (list): Annotation objects in original image coordinates
+        path (str): Output PNG file path
+        strip_height (int): Rows rendered and written at once
+        line_width (int): Line width in pixels (default scales with image)
+        progress (callable): Optional callback receiving fraction done
+    """
+    width, height = image.size
+    line_width = line_width or default_line_width(image.size)
+    layout = AnnotationLayout(annotations, load_font(line_width * 8), line_width)
+    
+    # Annotations are coloured, so grayscale sources are written as RGB
+    mode = "RGBA" if image.mode == "RGBA" else "RGB"
+    writer = PNGStreamWriter(path, width, height, mode)
+    try:
+        for y0 in range(0, height, strip_height):
+            y1 = min(height, y0 + strip_height)
+            strip = image.crop((0, y0, width, y1)).convert(mode)
+            layout.draw_strip(strip, y0)
+            writer.write_rows(strip)
+            if progress is not None:
+                progress(y1 / height)
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
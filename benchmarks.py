@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the rendering and measurement pipelines and the measurement
+service.
+
+Synthetic fixtures are generated deterministically into a temporary
+directory, each benchmark is timed over several repeats (more for short
+ones), and the results are written as JSON. Compared with a stored baseline,
+any benchmark whose best time got slower than the threshold, by more than
+the timing noise of either run, is timed again; if it is still slower, the
+run fails, so regressions show up before they reach users.
+
+Usage:
+    python benchmarks.py                          # run, compare with benchmark_baseline.json
+    python benchmarks.py --json results.json      # also save the results
+    python benchmarks.py --update-baseline        # store this run as the new baseline
+    python benchmarks.py --filter resize --threshold 0.5
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import PIL
+from PIL import Image
+
+from imaging import to_display_mode, resize_for_display
+from input_trace import create_synthetic_image
+from measurement import calculate_distance, calculate_calibration_factor, measure_segments
+from measurement_service import MeasurementClient, MeasurementService, ServiceThread
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# A benchmark fails when its best time is this much slower than the baseline
+DEFAULT_THRESHOLD = 0.25
+
+# Slowdowns smaller than this are too noisy to fail a run on, whatever
+# their relative size
+MIN_DELTA_SECONDS = 0.002
+
+DEFAULT_REPEATS = 3
+
+# Short benchmarks are repeated until they have run this long in total, up
+# to MAX_REPEATS, so their best time is not a matter of luck
+MIN_TIMED_SECONDS = 0.5
+MAX_REPEATS = 100
+
+# Extra runs of a benchmark that looks slower, keeping its best time, so a
+# burst of load on the machine does not fail the run on its own
+CONFIRM_RUNS = 2
+
+# Fixture sizes; "large" matches a typical A1 drawing scanned at 150 DPI
+FIXTURE_SIZES = {"small": (1200, 900), "large": (5000, 3500)}
+
+FIXTURE_FORMATS = {"png": "PNG", "jpeg": "JPEG", "tiff": "TIFF", "bmp": "BMP"}
+
+# Zoom levels reachable with the mouse wheel, as in on_zoom
+ZOOM_LEVELS = (0.1, 0.25, 0.5, 1.5, 3.0)
+
+SEGMENT_COUNT = 100000
+
+# Concurrent keep-alive clients, and requests each sends, for the service
+# throughput benchmark
+SERVICE_CLIENTS = 4
+SERVICE_REQUESTS = 50
+
+
+def time_call(function, repeats=DEFAULT_REPEATS, min_seconds=MIN_TIMED_SECONDS):
+    """
+    Time a callable over several repeats.
+    
+    Args:
+        function (callable): Work to time, called with no arguments
+        repeats (int): Minimum number of timed calls
+        min_seconds (float): Keep repeating, up to MAX_REPEATS calls, until
+            the calls took this long in total
+    
+    Returns:
+        dict: Best and median time in seconds and the repeat count
+    """
+    durations = []
+    while len(durations) < repeats or (sum(durations) < min_seconds and len(durations) < MAX_REPEATS):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return {
+        "min_s": min(durations),
+        "median_s": statistics.median(durations),
+        "repeats": len(durations),
+    }
+
+
+def create_fixtures(directory, sizes=FIXTURE_SIZES):
+    """
+    Write the synthetic drawing in every fixture format and size.
+    
+    Returns:
+        dict: Path of each fixture keyed by (format, size name)
+    """
+    fixtures = {}
+    for size_name, size in sizes.items():
+        source = os.path.join(directory, f"source-{size_name}.png")
+        create_synthetic_image(source, size)
+        with Image.open(source) as image:
+            for extension, format_name in FIXTURE_FORMATS.items():
+                path = os.path.join(directory, f"{size_name}.{extension}")
+                if format_name == "PNG":
+                    os.replace(source, path)
+                    source = path
+                else:
+                    image.save(path, format_name)
+                fixtures[(extension, size_name)] = path
+    return fixtures
+
+
+def decode(path):
+    """Open and fully decode an image file."""
+    with Image.open(path) as image:
+        image.load()
+
+
+def service_requests(port, clients=SERVICE_CLIENTS, requests=SERVICE_REQUESTS):
+    """Send measure requests to a running service from concurrent clients."""
+    failures = []
+    
+    def run(client_index):
+        client = MeasurementClient(port=port)
+        try:
+            for request_index in range(requests):
+                length = client_index * requests + request_index + 1
+                status, _ = client.measure([[[0, 0], [3 * length, 4 * length]]], calibration_factor=0.5)
+                if status != 200:
+                    failures.append(status)
+        finally:
+            client.close()
+    
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if failures:
+        raise RuntimeError(f"{len(failures)} service requests failed")
+
+
+def tk_root():
+    """Return a hidden Tk root for PhotoImage benchmarks, or None without a display."""
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    root.withdraw()
+    return root
+
+
+def benchmark_suite(fixtures):
+    """
+    Yield (name, callable) for every benchmark.
+    
+    Callables needing a display are only yielded when one is available.
+    """
+    for (extension, size_name), path in sorted(fixtures.items()):
+        yield f"decode.{extension}.{size_name}", lambda path=path: decode(path)
+    
+    with Image.open(fixtures[("png", "large")]) as image:
+        image.load()
+        large = image
+    display_source = to_display_mode(large)
+    sixteen_bit = large.convert("L").point(lambda value: value * 256, "I").convert("I;16")
+    yield "display_mode.i16.large", lambda: to_display_mode(sixteen_bit)
+    
+    for zoom in ZOOM_LEVELS:
+        size = (int(large.width * zoom), int(large.height * zoom))
+        yield f"resize.zoom{zoom:g}.large", lambda size=size: resize_for_display(display_source, size)
+    
+    root = tk_root()
+    if root is not None:
+        from PIL import ImageTk
+        for zoom in (0.25, 1.0):
+            size = (int(large.width * zoom), int(large.height * zoom))
+            view = resize_for_display(display_source, size) if zoom != 1.0 else display_source
+            yield f"photoimage.zoom{zoom:g}.large", lambda view=view: ImageTk.PhotoImage(view)
+    
+    rng = random.Random(0)
+    segments = [
+        ((rng.uniform(0, 5000), rng.uniform(0, 3500)), (rng.uniform(0, 5000), rng.uniform(0, 3500)))
+        for _ in range(SEGMENT_COUNT)
+    ]
+    yield "measure.segments.100k", lambda: measure_segments(segments, 0.0254)
+    yield "calibrate.factors.100k", lambda: [
+        calculate_calibration_factor(calculate_distance(point1, point2), 100.0)
+        for point1, point2 in segments
+    ]
+    
+    service = ServiceThread(MeasurementService(workers=SERVICE_CLIENTS))
+    service.start()
+    yield (
+        f"service.measure.{SERVICE_CLIENTS}x{SERVICE_REQUESTS}",
+        lambda: service_requests(service.port)
+    )
+    service.stop()
+    
+    if root is not None:
+        root.destroy()
+
+
+def run_benchmarks(name_filter=None, repeats=DEFAULT_REPEATS, sizes=FIXTURE_SIZES, progress=print,
+                   min_seconds=MIN_TIMED_SECONDS, names=None):
+    """
+    Run the suite and return a results document.
+    
+    Args:
+        name_filter (str): Only run benchmarks whose name contains this
+        repeats (int): Minimum timed calls per benchmark
+        sizes (dict): Fixture sizes by name; must include "large"
+        progress (callable): Receives one line per finished benchmark
+        min_seconds (float): Minimum total timed duration per benchmark
+        names (set): Only run the benchmarks with these exact names
+    
+    Returns:
+        dict: Environment description and timings keyed by benchmark name
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        fixtures = create_fixtures(directory, sizes)
+        for name, function in benchmark_suite(fixtures):
+            if (name_filter and name_filter not in name) or (names is not None and name not in names):
+                continue
+            function()  # warm-up
+            results[name] = time_call(function, repeats, min_seconds)
+            if progress is not None:
+                progress(f"{name:<32} {results[name]['min_s'] * 1000:>10.2f} ms")
+    return {
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "machine": f"{platform.system()} {platform.machine()}",
+        "results": results,
+    }
+
+
+def compare_results(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare best times with a baseline.
+    
+    A benchmark regresses when its best time is slower by more than the
+    threshold and by more than the noise: MIN_DELTA_SECONDS, or the spread
+    between best and median time of either run if that is larger.
+    
+    Args:
+        current (dict): Results document from run_benchmarks
+        baseline (dict): Stored results document
+        threshold (float): Allowed relative slowdown, e.g. 0.25 for 25%
+    
+    Returns:
+        tuple: (report lines, list of regressed benchmark names)
+    """
+    lines = []
+    regressions = []
+    for name, stats in sorted(current["results"].items()):
+        old = baseline.get("results", {}).get(name)
+        if old is None:
+            lines.append(f"{name:<32} {'new':>10}")
+            continue
+        change = stats["min_s"] / old["min_s"] - 1.0 if old["min_s"] else 0.0
+        noise = max(
+            MIN_DELTA_SECONDS,
+            old.get("median_s", old["min_s"]) - old["min_s"],
+            stats.get("median_s", stats["min_s"]) - stats["min_s"],
+        )
+        regressed = change > threshold and stats["min_s"] - old["min_s"] > noise
+        if regressed:
+            regressions.append(name)
+        lines.append(
+            f"{name:<32} {old['min_s'] * 1000:>10.2f} -> {stats['min_s'] * 1000:>10.2f} ms "
+            f"({change * 100:+.1f}%){'  REGRESSION' if regressed else ''}"
+        )
+    return lines, regressions
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the rendering and measurement pipelines")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument("--json", help="Write this run's results to a file")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Minimum timed calls per benchmark")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+    args = parser.parse_args()
+    
+    current = run_benchmarks(args.filter, args.repeats)
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as results_file:
+            json.dump(current, results_file, indent=2, sort_keys=True)
+    
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(current, baseline_file, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+    
+    with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    lines, regressions = compare_results(current, baseline, args.threshold)
+    for _ in range(CONFIRM_RUNS):
+        if not regressions:
+            break
+        print(f"\nTiming {len(regressions)} slower benchmark(s) again")
+        again = run_benchmarks(repeats=args.repeats, names=set(regressions))
+        for name, stats in again["results"].items():
+            if stats["min_s"] < current["results"][name]["min_s"]:
+                current["results"][name] = stats
+        lines, regressions = compare_results(current, baseline, args.threshold)
+    print()
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
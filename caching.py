@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Small thread-safe LRU cache used for decoded images and calibrations.
+
+A cache can be attached to a memory_budget.MemoryBudget, which then
+accounts for the size of every entry and may evict entries when the
+application as a whole is over its memory limit.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Least-recently-used cache with a fixed number of entries."""
+    
+    def __init__(self, max_items=32, budget=None, sizeof=None):
+        """
+        Initialize an empty cache holding at most max_items entries.
+        
+        Args:
+            max_items (int): Entry limit
+            budget (MemoryBudget): Optional budget to account entries against
+            sizeof (callable): Returns the size in bytes of a value; required
+                with a budget
+        """
+        if max_items < 1:
+            raise ValueError("Cache must hold at least one item")
+        if budget is not None and sizeof is None:
+            raise ValueError("A sizeof function is required with a budget")
+        self.max_items = max_items
+        self.budget = budget
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        if budget is not None:
+            budget.register_cache(self)
+    
+    def __len__(self):
+        """Return the number of cached entries."""
+        return len(self._items)
+    
+    def __contains__(self, key):
+        """Check for a key without changing its recency."""
+        return key in self._items
+    
+    def get(self, key, default=None):
+        """Return a cached value and mark it as most recently used."""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return default
+    
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries if full."""
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                evicted_key, _ = self._items.popitem(last=False)
+                if self.budget is not None:
+                    self.budget.release((self, evicted_key))
+            if self.budget is not None:
+                self.budget.track((self, key), self.sizeof(value), owner=self, enforce=False)
+                
+        # Enforcing may call back into evict_oldest(), so it runs unlocked
+        if self.budget is not None:
+            self.budget.enforce()
+            
+    def evict_oldest(self):
+        """
+        Drop the least recently used entry.
+        
+        Returns:
+            bool: True if an entry was evicted
+        """
+        with self._lock:
+            if not self._items:
+                return False
+            key, _ = self._items.popitem(last=False)
+            if self.budget is not None:
+                self.budget.release((self, key))
+        return True
+    
+    def get_or_load(self, key, loader):
+        """
+        Return a cached value, calling loader() to create it on a miss.
+        
+        The loader runs outside the lock, so two threads missing on the same
+        key at once may both load it; the last result wins.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = loader()
+            self.put(key, value)
+        return value
+    
+    def pop(self, key, default=None):
+        """Remove an entry and return its value."""
+        with self._lock:
+            value = self._items.pop(key, default)
+            if self.budget is not None:
+                self.budget.release((self, key))
+        return value
+    
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            if self.budget is not None:
+                for key in self._items:
+                    self.budget.release((self, key))
+            self._items.clear()
+    
+    def stats(self):
+        """Return a dictionary of cache statistics."""
+        return {
+            "items": len(self._items),
+            "max_items": self.max_items,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
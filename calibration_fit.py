@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Calibration fitted to many references by least squares.
+
+A single reference segment gives one scale factor, and a one-pixel click
+error on it skews every later measurement. Fitting to many references
+averages such errors out and reports residuals that show how good the
+calibration is. Three models are supported, each stored as a 3x3 matrix
+mapping image pixels to real-world coordinates:
+
+- isotropic: one scale, fitted to reference segments of known length
+- anisotropic: separate x and y scales (non-square pixels, stretched scans)
+- homography: full perspective transform, fitted to four or more points of
+  known position (e.g. grid corners), for photos taken at an angle
+
+Measurements are converted in batches: all end points are mapped through
+the matrix with one NumPy call.
+"""
+
+from itertools import combinations
+
+import numpy as np
+
+
+MODEL_KINDS = ("isotropic", "anisotropic", "homography")
+
+# Minimum references for each model
+MIN_SEGMENTS = {"isotropic": 1, "anisotropic": 2}
+MIN_HOMOGRAPHY_POINTS = 4
+
+
+class CalibrationModel:
+    """A fitted pixel-to-world transform with its residuals."""
+    
+    __slots__ = ("kind", "matrix", "residuals", "scale")
+    
+    def __init__(self, kind, matrix, residuals, scale):
+        """
+        Initialize a fitted model.
+        
+        Args:
+            kind (str): One of MODEL_KINDS
+            matrix (numpy.ndarray): 3x3 pixel-to-world matrix
+            residuals (numpy.ndarray): Fitted minus known value for each
+                reference, in world units
+            scale (float): Representative units per pixel, used where a
+                single factor is needed (areas, reports)
+        """
+        self.kind = kind
+        self.matrix = matrix
+        self.residuals = residuals
+        self.scale = scale
+    
+    @property
+    def rms_residual(self):
+        """Root mean square residual in world units."""
+        return float(np.sqrt(np.mean(self.residuals ** 2))) if len(self.residuals) else 0.0
+    
+    @property
+    def max_residual(self):
+        """Largest absolute residual in world units."""
+        return float(np.max(np.abs(self.residuals))) if len(self.residuals) else 0.0
+    
+    def to_world(self, points):
+        """
+        Map image points to world coordinates.
+        
+        Args:
+            points: (N, 2) array-like of (x, y) in image pixels
+        
+        Returns:
+            numpy.ndarray: (N, 2) world coordinates
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        mapped = points @ self.matrix[:, :2].T + self.matrix[:, 2]
+        return mapped[:, :2] / mapped[:, 2:3]
+    
+    def real_distances(self, points1, points2):
+        """
+        Measure a batch of segments in world units.
+        
+        Args:
+            points1: (N, 2) array-like of start points in image pixels
+            points2: (N, 2) array-like of end points in image pixels
+        
+        Returns:
+            numpy.ndarray: (N,) real-world lengths
+        """
+        world = self.to_world(np.concatenate([
+            np.asarray(points1, dtype=np.float64).reshape(-1, 2),
+            np.asarray(points2, dtype=np.float64).reshape(-1, 2),
+        ]))
+        count = len(world) // 2
+        delta = world[count:] - world[:count]
+        return np.hypot(delta[:, 0], delta[:, 1])
+    
+    def real_distance(self, point1, point2):
+        """Measure one segment in world units."""
+        return float(self.real_distances([point1], [point2])[0])
+    
+    def describe(self):
+        """One-line summary with residuals."""
+        if self.kind == "anisotropic":
+            parameters = f"x {self.matrix[0, 0]:.6g}, y {self.matrix[1, 1]:.6g} per px"
+        else:
+            parameters = f"{self.scale:.6g} per px"
+        return (
+            f"{self.kind} ({parameters}) | {len(self.residuals)} references, "
+            f"RMS residual {self.rms_residual:.4g}, max {self.max_residual:.4g}"
+        )
+
+
+def as_segments(segments):
+    """
+    Split reference segments into arrays.
+    
+    Args:
+        segments (list): ((x1, y1), (x2, y2), known_length) tuples
+    
+    Returns:
+        tuple: (points1, points2, lengths) arrays of shape (N, 2), (N, 2), (N,)
+    """
+    points1 = np.array([segment[0] for segment in segments], dtype=np.float64).reshape(-1, 2)
+    points2 = np.array([segment[1] for segment in segments], dtype=np.float64).reshape(-1, 2)
+    lengths = np.array([segment[2] for segment in segments], dtype=np.float64)
+    if np.any(lengths <= 0):
+        raise ValueError("Reference lengths must be positive.")
+    return points1, points2, lengths
+
+
+def segments_from_points(image_points, world_points):
+    """
+    Turn points of known position into reference segments (every pair).
+    
+    Returns:
+        list: ((x1, y1), (x2, y2), known_length) tuples
+    """
+    segments = []
+    for i, j in combinations(range(len(image_points)), 2):
+        length = float(np.hypot(*np.subtract(world_points[j], world_points[i])))
+        if length > 0:
+            segments.append((tuple(image_points[i]), tuple(image_points[j]), length))
+    return segments
+
+
+def fit_isotropic(segments):
+    """
+    Fit one scale minimising the squared length errors of all references.
+    
+    Args:
+        segments (list): ((x1, y1), (x2, y2), known_length) tuples
+    
+    Returns:
+        CalibrationModel: Fitted model
+    
+    Raises:
+        ValueError: If there are no usable references
+    """
+    points1, points2, lengths = as_segments(segments)
+    delta = points2 - points1
+    pixels = np.hypot(delta[:, 0], delta[:, 1])
+    if len(pixels) < MIN_SEGMENTS["isotropic"] or not np.any(pixels > 0):
+        raise ValueError("At least one reference segment is required.")
+    scale = float(pixels @ lengths / (pixels @ pixels))
+    matrix = np.diag([scale, scale, 1.0])
+    return CalibrationModel("isotropic", matrix, scale * pixels - lengths, scale)
+
+
+def fit_anisotropic(segments):
+    """
+    Fit separate x and y scales.
+    
+    Each reference gives one equation length^2 = sx^2 dx^2 + sy^2 dy^2,
+    which is linear in sx^2 and sy^2 and solved by least squares.
+    
+    Raises:
+        ValueError: Without references in at least two directions
+    """
+    points1, points2, lengths = as_segments(segments)
+    delta = points2 - points1
+    design = delta ** 2
+    if len(lengths) < MIN_SEGMENTS["anisotropic"] or np.linalg.matrix_rank(design) < 2:
+        raise ValueError("References in at least two different directions are required.")
+    (sx2, sy2), *_ = np.linalg.lstsq(design, lengths ** 2, rcond=None)
+    if sx2 <= 0 or sy2 <= 0:
+        raise ValueError("References are inconsistent; x/y scales could not be fitted.")
+    sx, sy = float(np.sqrt(sx2)), float(np.sqrt(sy2))
+    matrix = np.diag([sx, sy, 1.0])
+    residuals = np.hypot(sx * delta[:, 0], sy * delta[:, 1]) - lengths
+    return CalibrationModel("anisotropic", matrix, residuals, float(np.sqrt(sx * sy)))
+
+
+def normalizing_transform(points):
+    """Similarity moving points to their centroid with mean distance sqrt(2)."""
+    centroid = points.mean(axis=0)
+    spread = np.mean(np.hypot(*(points - centroid).T))
+    factor = np.sqrt(2) / spread if spread > 0 else 1.0
+    return np.array([
+        [factor, 0.0, -factor * centroid[0]],
+        [0.0, factor, -factor * centroid[1]],
+        [0.0, 0.0, 1.0],
+    ])
+
+
+def fit_homography(image_points, world_points):
+    """
+    Fit a perspective transform by the normalised direct linear transform.
+    
+    Args:
+        image_points: (N, 2) points in image pixels, N >= 4
+        world_points: (N, 2) known positions of the same points in world units
+    
+    Returns:
+        CalibrationModel: Model whose residuals are the distances between
+        mapped and known positions
+    
+    Raises:
+        ValueError: With fewer than four points or a degenerate layout
+    """
+    image_points = np.asarray(image_points, dtype=np.float64).reshape(-1, 2)
+    world_points = np.asarray(world_points, dtype=np.float64).reshape(-1, 2)
+    if len(image_points) != len(world_points):
+        raise ValueError("Every image point needs a known position.")
+    if len(image_points) < MIN_HOMOGRAPHY_POINTS:
+        raise ValueError("At least four points of known position are required.")
+    
+    # Normalising both point sets keeps the system well conditioned
+    t_image = normalizing_transform(image_points)
+    t_world = normalizing_transform(world_points)
+    ones = np.ones((len(image_points), 1))
+    src = (np.hstack([image_points, ones]) @ t_image.T)[:, :2]
+    dst = (np.hstack([world_points, ones]) @ t_world.T)[:, :2]
+    
+    count = len(src)
+    x, y = src[:, 0:1], src[:, 1:2]
+    u, v = dst[:, 0:1], dst[:, 1:2]
+    zeros, ones = np.zeros((count, 3)), np.ones((count, 1))
+    homogeneous = np.hstack([x, y, ones])
+    system = np.vstack([
+        np.hstack([homogeneous, zeros, -u * homogeneous]),
+        np.hstack([zeros, homogeneous, -v * homogeneous]),
+    ])
+    _, singular, vt = np.linalg.svd(system)
+    # A unique solution needs rank 8 (the last singular value may be ~0)
+    if singular[7] < 1e-9 * singular[0]:
+        raise ValueError("Points are degenerate (e.g. collinear); a homography cannot be fitted.")
+    normalized = vt[-1].reshape(3, 3)
+    matrix = np.linalg.inv(t_world) @ normalized @ t_image
+    matrix /= matrix[2, 2]
+    
+    model = CalibrationModel("homography", matrix, np.zeros(0), 0.0)
+    mapped = model.to_world(image_points)
+    model.residuals = np.hypot(*(mapped - world_points).T)
+    model.scale = local_scale(matrix, image_points.mean(axis=0))
+    return model
+
+
+def local_scale(matrix, point):
+    """Units per pixel of a transform at an image point (sqrt of the Jacobian determinant)."""
+    x, y = point
+    w = matrix[2, 0] * x + matrix[2, 1] * y + matrix[2, 2]
+    u = (matrix[0, 0] * x + matrix[0, 1] * y + matrix[0, 2]) / w
+    v = (matrix[1, 0] * x + matrix[1, 1] * y + matrix[1, 2]) / w
+    jacobian = np.array([
+        [matrix[0, 0] - u * matrix[2, 0], matrix[0, 1] - u * matrix[2, 1]],
+        [matrix[1, 0] - v * matrix[2, 0], matrix[1, 1] - v * matrix[2, 1]],
+    ]) / w
+    return float(np.sqrt(abs(np.linalg.det(jacobian))))
+
+
+def fit_calibration(kind, segments=(), image_points=(), world_points=()):
+    """
+    Fit a model of the given kind to whatever references are available.
+    
+    Segment models also use every pair of known-position points as a
+    reference segment.
+    
+    Args:
+        kind (str): One of MODEL_KINDS
+        segments (list): ((x1, y1), (x2, y2), known_length) references
+        image_points (list): Points of known position, in image pixels
+        world_points (list): Their known positions, in world units
+    
+    Returns:
+        CalibrationModel: Fitted model
+    """
+    if kind not in MODEL_KINDS:
+        raise ValueError(f"Unknown calibration model: {kind}")
+    if kind == "homography":
+        return fit_homography(image_points, world_points)
+    references = list(segments) + segments_from_points(image_points, world_points)
+    if kind == "isotropic":
+        return fit_isotropic(references)
+    return fit_anisotropic(references)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Undo/redo log of editing commands.
+
+Each user action is recorded as one small Command holding only what changed
+(a point, the calibration before and after, the annotation a measurement
+added), never a snapshot of the whole application state. The undo history
+is a bounded deque, so long sessions use constant memory and every undo or
+redo is O(1).
+"""
+
+from collections import deque
+
+
+# Commands kept for undo; older ones are forgotten
+DEFAULT_LIMIT = 1000
+
+COMMAND_KINDS = ("point", "calibration", "measurement")
+
+
+class Command:
+    """One undoable change."""
+    
+    __slots__ = ("kind", "before", "after", "annotation", "records")
+    
+    def __init__(self, kind, before=None, after=None, annotation=None, records=()):
+        """
+        Initialize a command.
+        
+        Args:
+            kind (str): "point" (after is the placed point), "calibration"
+                (before/after are calibration states, also used for unit
+                changes) or "measurement" (after is the named dimension it
+                added, if any)
+            before: State replaced by the command
+            after: State set by the command
+            annotation: Annotation added by the command, if any
+            records (list): Measurement store rows added by the command (the
+                measurement and its repeat on a compared revision)
+        """
+        if kind not in COMMAND_KINDS:
+            raise ValueError(f"Unknown command kind: {kind}")
+        self.kind = kind
+        self.before = before
+        self.after = after
+        self.annotation = annotation
+        self.records = records
+
+
+class CommandLog:
+    """Bounded undo and redo stacks."""
+    
+    def __init__(self, limit=DEFAULT_LIMIT):
+        """Initialize empty stacks keeping at most limit undo steps."""
+        self.undo_stack = deque(maxlen=limit)
+        self.redo_stack = []
+        # Point commands on each stack, so dropping them only walks back to
+        # the oldest one instead of through the whole history
+        self.undo_points = 0
+        self.redo_points = 0
+    
+    def push(self, command, consumes_points=False):
+        """
+        Record a new command; any redo history is discarded.
+        
+        Args:
+            command (Command): The change just made
+            consumes_points (bool): The command used up the placed points
+                (a calibration or measurement from a point pair), so their
+                point commands are folded into it and dropped. Commands that
+                leave the points on the canvas, such as unit changes, keep
+                them undoable.
+        """
+        if consumes_points:
+            self.drop_points()
+        self._append_undo(command)
+        self.redo_stack.clear()
+        self.redo_points = 0
+    
+    def _append_undo(self, command):
+        """Append to the undo stack, counting a point command that falls off."""
+        if len(self.undo_stack) == self.undo_stack.maxlen and self.undo_stack[0].kind == "point":
+            self.undo_points -= 1
+        self.undo_stack.append(command)
+        if command.kind == "point":
+            self.undo_points += 1
+    
+    def drop_points(self):
+        """
+        Forget point placements that are no longer on the canvas.
+        
+        Every point command in the history belongs to the points currently
+        placed, including any pushed before a unit change, so all of them
+        are dropped, not only those on top of the stacks. They are all newer
+        than the last command that consumed points, so only the commands
+        back to the oldest of them are touched.
+        """
+        _remove_points(self.undo_stack, self.undo_points)
+        _remove_points(self.redo_stack, self.redo_points)
+        self.undo_points = 0
+        self.redo_points = 0
+    
+    def undo(self):
+        """Move the newest command to the redo stack and return it, or None."""
+        if not self.undo_stack:
+            return None
+        command = self.undo_stack.pop()
+        self.redo_stack.append(command)
+        if command.kind == "point":
+            self.undo_points -= 1
+            self.redo_points += 1
+        return command
+    
+    def redo(self):
+        """Move the newest undone command back and return it, or None."""
+        if not self.redo_stack:
+            return None
+        command = self.redo_stack.pop()
+        if command.kind == "point":
+            self.redo_points -= 1
+        self._append_undo(command)
+        return command
+    
+    def can_undo(self):
+        """Check whether there is anything to undo."""
+        return bool(self.undo_stack)
+    
+    def can_redo(self):
+        """Check whether there is anything to redo."""
+        return bool(self.redo_stack)
+    
+    def clear(self):
+        """Forget all history, e.g. when another image is loaded."""
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.undo_points = 0
+        self.redo_points = 0
+
+
+def _remove_points(stack, count):
+    """Pop the newest count point commands off a stack, keeping the others in order."""
+    kept = []
+    while count:
+        command = stack.pop()
+        if command.kind == "point":
+            count -= 1
+        else:
+            kept.append(command)
+    stack.extend(reversed(kept))
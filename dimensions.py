@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Named dimensions with nominal values and tolerances.
+
+Every named dimension ("bore A") is one row of a set of parallel NumPy
+columns: end points, length in pixels, nominal value, tolerance, the unit
+the nominal was given in, the current real length and the pass/fail state.
+When the calibration or the unit changes, all lengths and states are
+recomputed in one vectorized pass, and only the rows whose state changed
+are returned, so the caller recolours just those canvas items.
+"""
+
+import re
+
+import numpy as np
+
+from measurement import AVAILABLE_UNITS, UNITS_PER_INCH
+
+
+# Tolerance states
+UNCHECKED, PASS, FAIL = 0, 1, 2
+STATUS_NAMES = ("unchecked", "pass", "fail")
+STATUS_COLORS = ("#808080", "#00a000", "#d00000")
+
+# Rows allocated up front; columns double in size when full
+INITIAL_CAPACITY = 64
+
+# Inches per unit, indexed like AVAILABLE_UNITS, for converting nominals
+_INCHES_PER_UNIT = np.array([1.0 / UNITS_PER_INCH[unit] for unit in AVAILABLE_UNITS])
+
+# "12.5 ± 0.05", "12.5 +/- 0.05", "12.5, 0.05" or "12.5 0.05"
+_SPECIFICATION = re.compile(r"^\s*([-+]?[\d.]+(?:e[-+]?\d+)?)\s*(?:±|\+/-|\+-|,)?\s*([-+]?[\d.]+(?:e[-+]?\d+)?)?\s*$", re.I)
+
+
+def parse_specification(text):
+    """
+    Parse a nominal value and tolerance typed by the user.
+    
+    Args:
+        text (str): e.g. "12.5 ± 0.05", "12.5 +/- 0.05" or "12.5, 0.05";
+            a nominal alone means zero tolerance, blank means no check
+    
+    Returns:
+        tuple: (nominal, tolerance), or (None, None) for blank input
+    
+    Raises:
+        ValueError: If the text is not a nominal with optional tolerance
+    """
+    if text is None or not text.strip():
+        return None, None
+    match = _SPECIFICATION.match(text)
+    if not match:
+        raise ValueError(f"Expected a nominal value and tolerance, e.g. 12.5 ± 0.05, not {text!r}")
+    nominal = float(match.group(1))
+    tolerance = abs(float(match.group(2))) if match.group(2) else 0.0
+    return nominal, tolerance
+
+
+class DimensionTable:
+    """Named dimensions stored column-wise for vectorized re-evaluation."""
+    
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        """Initialize an empty table with room for capacity dimensions."""
+        self.count = 0
+        self.names = []
+        self.items = []  # Canvas items of each dimension, owned by the caller
+        self.points = np.zeros((capacity, 2, 2))
+        self.pixel_distances = np.zeros(capacity)
+        self.nominals = np.full(capacity, np.nan)
+        self.tolerances = np.full(capacity, np.nan)
+        self.unit_codes = np.zeros(capacity, dtype=np.int8)  # Index into AVAILABLE_UNITS
+        self.values = np.full(capacity, np.nan)  # Real lengths in the current unit
+        self.status = np.zeros(capacity, dtype=np.int8)
+    
+    def __len__(self):
+        """Return the number of dimensions."""
+        return self.count
+    
+    def _columns(self):
+        """Return the array columns, for resizing and shifting together."""
+        return (
+            "points", "pixel_distances", "nominals", "tolerances",
+            "unit_codes", "values", "status"
+        )
+    
+    def _grow(self):
+        """Double the capacity of every column."""
+        for name in self._columns():
+            column = getattr(self, name)
+            grown = np.empty((len(column) * 2,) + column.shape[1:], dtype=column.dtype)
+            grown[:self.count] = column[:self.count]
+            setattr(self, name, grown)
+    
+    def add(self, name, point1, point2, pixel_distance, nominal=None, tolerance=None, unit="mm", items=()):
+        """
+        Append a dimension; its state is set by the next evaluate().
+        
+        Args:
+            name (str): Dimension name
+            point1 (tuple): Start point (x, y) in image pixels
+            point2 (tuple): End point (x, y) in image pixels
+            pixel_distance (float): Length in pixels
+            nominal (float): Nominal length, or None for no check
+            tolerance (float): Allowed deviation either side of nominal
+            unit (str): Unit of nominal and tolerance
+            items (tuple): Canvas items to recolour with the state
+        
+        Returns:
+            int: Index of the new dimension
+        """
+        if self.count == len(self.pixel_distances):
+            self._grow()
+        index = self.count
+        self.names.append(name)
+        self.items.append(tuple(items))
+        self.points[index] = (point1, point2)
+        self.pixel_distances[index] = pixel_distance
+        self.nominals[index] = np.nan if nominal is None else nominal
+        self.tolerances[index] = np.nan if nominal is None else (tolerance or 0.0)
+        self.unit_codes[index] = AVAILABLE_UNITS.index(unit)
+        self.values[index] = np.nan
+        self.status[index] = UNCHECKED
+        self.count += 1
+        return index
+    
+    def remove(self, index):
+        """
+        Remove a dimension, keeping the order of the others.
+        
+        Returns:
+            tuple: The canvas items of the removed dimension
+        """
+        if not 0 <= index < self.count:
+            raise IndexError(f"No dimension {index}")
+        for name in self._columns():
+            column = getattr(self, name)
+            column[index:self.count - 1] = column[index + 1:self.count]
+        self.count -= 1
+        self.names.pop(index)
+        return self.items.pop(index)
+    
+    def index_of(self, name):
+        """Return the index of the newest dimension with a name, or None."""
+        for index in range(self.count - 1, -1, -1):
+            if self.names[index] == name:
+                return index
+        return None
+    
+    def clear(self):
+        """Remove every dimension."""
+        self.count = 0
+        self.names = []
+        self.items = []
+    
+    def evaluate(self, factor, unit, model=None):
+        """
+        Recompute every real length and pass/fail state in one pass.
+        
+        Args:
+            factor (float): Calibration in units per pixel, or None if
+                uncalibrated (every dimension becomes unchecked)
+            unit (str): Current unit; nominals given in another unit are
+                converted
+            model (CalibrationModel): Fitted calibration, used instead of
+                factor so perspective is taken into account
+        
+        Returns:
+            numpy.ndarray: Indices of the dimensions whose state changed
+        """
+        count = self.count
+        if factor is None:
+            values = np.full(count, np.nan)
+        elif model is not None:
+            values = model.real_distances(self.points[:count, 0], self.points[:count, 1])
+        else:
+            values = self.pixel_distances[:count] * factor
+        self.values[:count] = values
+        
+        # Nominals and tolerances in the current unit
+        scale = _INCHES_PER_UNIT[self.unit_codes[:count]] / _INCHES_PER_UNIT[AVAILABLE_UNITS.index(unit)]
+        nominals = self.nominals[:count] * scale
+        tolerances = self.tolerances[:count] * scale
+        
+        checked = ~(np.isnan(values) | np.isnan(nominals))
+        # Allow for float noise on values exactly at a limit
+        within = np.abs(values - nominals) <= tolerances * (1 + 1e-9)
+        status = np.where(checked, np.where(within, PASS, FAIL), UNCHECKED).astype(np.int8)
+        
+        changed = np.flatnonzero(status != self.status[:count])
+        self.status[:count] = status
+        return changed
+    
+    def counts(self):
+        """Return the numbers of passing and failing dimensions."""
+        status = self.status[:self.count]
+        return int(np.count_nonzero(status == PASS)), int(np.count_nonzero(status == FAIL))
+    
+    def describe(self, index, unit):
+        """One-line description of a dimension, e.g. 'bore A: 12.5100 mm (12.5 ± 0.05) pass'."""
+        value = self.values[index]
+        text = f"{self.names[index]}: " + (f"{value:.4f} {unit}" if not np.isnan(value) else "uncalibrated")
+        if not np.isnan(self.nominals[index]):
+            text += (
+                f" ({self.nominals[index]:g} ± {self.tolerances[index]:g} "
+                f"{AVAILABLE_UNITS[self.unit_codes[index]]}) {STATUS_NAMES[self.status[index]]}"
+            )
+        return text
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Automatic feature dimensioning for Image Dimensioner.
+
+The image is thresholded and its connected components (holes, outlines,
+parts) are labelled, so every feature is dimensioned without clicking.
+
+Labelling works on horizontal strips of the image. Within a strip the
+foreground is run-length encoded row by row, runs that touch in adjacent
+rows are connected with vectorized NumPy operations, and a small union-find
+joins components that continue across strip boundaries. Components that
+cannot grow any further are reported and dropped immediately, so working
+memory is bounded by the strip size plus the components crossing the
+current strip edge, not by the image size.
+
+Usage:
+    python feature_detection.py drawing.png --scale 0.1 --unit mm
+"""
+
+import argparse
+import math
+
+import numpy as np
+from PIL import Image
+
+from imaging import HIGH_BIT_DEPTH_MODES
+
+
+# Default number of image rows processed at once
+DEFAULT_STRIP_HEIGHT = 256
+
+# Components smaller than this many pixels are treated as noise by default
+DEFAULT_MIN_AREA = 4
+
+
+class Feature:
+    """Bounding box and area of one connected component, in pixels."""
+    
+    __slots__ = ("label", "x0", "y0", "x1", "y1", "area")
+    
+    def __init__(self, label, x0, y0, x1, y1, area):
+        """Initialize a feature; x1 and y1 are inclusive."""
+        self.label = label
+        self.x0 = x0
+        self.y0 = y0
+        self.x1 = x1
+        self.y1 = y1
+        self.area = area
+    
+    @property
+    def width(self):
+        """Bounding box width in pixels."""
+        return self.x1 - self.x0 + 1
+    
+    @property
+    def height(self):
+        """Bounding box height in pixels."""
+        return self.y1 - self.y0 + 1
+    
+    @property
+    def equivalent_diameter(self):
+        """Diameter of a circle with the same area, in pixels."""
+        return 2.0 * math.sqrt(self.area / math.pi)
+    
+    def to_dict(self, calibration_factor=None, unit="px"):
+        """
+        Describe the feature, converting to real units when calibrated.
+        
+        Args:
+            calibration_factor (float): Units per pixel, or None for pixels
+            unit (str): Unit name reported with calibrated values
+        
+        Returns:
+            dict: Bounding box in pixels plus width, height, area and
+            equivalent diameter in the calibrated unit
+        """
+        scale = calibration_factor if calibration_factor is not None else 1.0
+        return {
+            "label": self.label,
+            "bbox": [self.x0, self.y0, self.x1, self.y1],
+            "unit": unit if calibration_factor is not None else "px",
+            "width": self.width * scale,
+            "height": self.height * scale,
+            "area": self.area * scale * scale,
+            "equivalent_diameter": self.equivalent_diameter * scale,
+        }
+
+
+def otsu_threshold(histogram):
+    """
+    Pick a global threshold that best separates a 256-bin histogram.
+    
+    Args:
+        histogram (sequence): Pixel counts for gray levels 0-255
+    
+    Returns:
+        int: Threshold; gray levels below it form the dark class
+    """
+    counts = np.asarray(histogram, dtype=np.float64)
+    levels = np.arange(len(counts))
+    total = counts.sum()
+    if total == 0:
+        return 128
+    
+    weight_dark = np.cumsum(counts)
+    weight_light = total - weight_dark
+    sum_dark = np.cumsum(counts * levels)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_dark = sum_dark / weight_dark
+        mean_light = (sum_dark[-1] - sum_dark) / weight_light
+        between = weight_dark * weight_light * (mean_dark - mean_light) ** 2
+    between = np.nan_to_num(between)
+    return int(np.argmax(between)) + 1
+
+
+class GrayStripReader:
+    """Read horizontal strips of any image as 8-bit grayscale arrays."""
+    
+    def __init__(self, image):
+        """Initialize the reader, measuring the value range of deep images."""
+        self.image = image
+        self.value_range = None
+        if image.mode in HIGH_BIT_DEPTH_MODES:
+            # One range for the whole image keeps strips consistent
+            self.value_range = image.getextrema()
+    
+    def read(self, y0, y1):
+        """Return rows y0 (inclusive) to y1 (exclusive) as a uint8 array."""
+        strip = self.image.crop((0, y0, self.image.width, y1))
+        if self.value_range is None:
+            return np.asarray(strip.convert("L"))
+        
+        low, high = self.value_range
+        values = np.asarray(strip, dtype=np.float32)
+        if high <= low:
+            return np.full(values.shape, 255 if high > 0 else 0, dtype=np.uint8)
+        scaled = (values - low) * (255.0 / (high - low))
+        return np.clip(scaled, 0, 255).astype(np.uint8)
+    
+    def histogram(self, strip_height=DEFAULT_STRIP_HEIGHT):
+        """Accumulate the gray-level histogram strip by strip."""
+        counts = np.zeros(256, dtype=np.int64)
+        for y0 in range(0, self.image.height, strip_height):
+            strip = self.read(y0, min(self.image.height, y0 + strip_height))
+            counts += np.bincount(strip.ravel(), minlength=256)
+        return counts
+
+
+def find_runs(mask):
+    """
+    Run-length encode the foreground of a 2D boolean mask.
+    
+    Returns:
+        tuple: (rows, starts, ends) arrays in row-major order; ends are
+        exclusive column indices
+    """
+    height, width = mask.shape
+    padded = np.zeros((height, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return rows, starts, ends
+
+
+def connect_runs(rows, starts, ends, width, connectivity=8):
+    """
+    Find pairs of runs in adjacent rows that touch each other.
+    
+    Runs are located with binary searches on row-major keys, so the whole
+    strip is processed without a Python loop.
+    
+    Returns:
+        tuple: (current, previous) arrays of run indices
+    """
+    stride = width + 2
+    start_keys = rows.astype(np.int64) * stride + starts
+    end_keys = rows.astype(np.int64) * stride + ends
+    base = (rows.astype(np.int64) - 1) * stride
+    
+    if connectivity == 8:
+        # Previous run [ps, pe) touches [s, e) diagonally if pe >= s and ps <= e
+        first = np.searchsorted(end_keys, base + starts, side="left")
+        last = np.searchsorted(start_keys, base + ends, side="right")
+    else:
+        # Edge-sharing only: pe > s and ps < e
+        first = np.searchsorted(end_keys, base + starts, side="right")
+        last = np.searchsorted(start_keys, base + ends, side="left")
+    
+    counts = np.where(rows > 0, np.maximum(last - first, 0), 0)
+    total = int(counts.sum())
+    current = np.repeat(np.arange(len(rows)), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    previous = np.repeat(first, counts) + offsets
+    return current, previous
+
+
+def label_runs(count, current, previous):
+    """
+    Give connected runs a common label by vectorized hooking and pointer jumping.
+    
+    Returns:
+        numpy.ndarray: Label (index of the lowest connected run) for each run
+    """
+    labels = np.arange(count)
+    if len(current) == 0:
+        return labels
+    
+    while True:
+        label_a = labels[current]
+        label_b = labels[previous]
+        lowest = np.minimum(label_a, label_b)
+        hooked = labels.copy()
+        # Attach the root of each edge end to the lower of the two roots
+        np.minimum.at(hooked, label_a, lowest)
+        np.minimum.at(hooked, label_b, lowest)
+        while True:
+            jumped = hooked[hooked]
+            if np.array_equal(jumped, hooked):
+                break
+            hooked = jumped
+        if np.array_equal(hooked, labels):
+            return labels
+        labels = hooked
+
+
+def detect_features(image, threshold=None, dark_features=True, connectivity=8,
+                    min_area=DEFAULT_MIN_AREA, strip_height=DEFAULT_STRIP_HEIGHT,
+                    progress=None):
+    """
+    Find connected components of a thresholded image, strip by strip.
+    
+    Args:
+        image (PIL.Image.Image): Image in any mode
+        threshold (int): Gray level separating features from background;
+            None picks one automatically (Otsu)
+        dark_features (bool): True if features are darker than background
+        connectivity (int): 8 to join diagonal neighbours, 4 otherwise
+        min_area (int): Smallest component area in pixels to report
+        strip_height (int): Rows processed at once (bounds memory)
+        progress (callable): Optional callback receiving fraction done
+    
+    Yields:
+        Feature: Each component as soon as it is complete
+    """
+    if connectivity not in (4, 8):
+        raise ValueError("Connectivity must be 4 or 8")
+    
+    width, height = image.size
+    reader = GrayStripReader(image)
+    if threshold is None:
+        threshold = otsu_threshold(reader.histogram(strip_height))
+    
+    # Components still open at the bottom of the previous strip
+    open_stats = {}
+    previous_row = None
+    previous_row_ids = []
+    next_id = 0
+    next_label = 1
+    
+    for y0 in range(0, height, strip_height):
+        y1 = min(height, y0 + strip_height)
+        gray = reader.read(y0, y1)
+        mask = gray < threshold if dark_features else gray >= threshold
+        
+        # Repeat the previous strip's last row on top to link across the seam
+        has_ghost = previous_row is not None
+        if has_ghost:
+            mask = np.vstack([previous_row[np.newaxis, :], mask])
+        row_offset = y0 - 1 if has_ghost else y0
+        
+        rows, starts, ends = find_runs(mask)
+        current, previous = connect_runs(rows, starts, ends, width, connectivity)
+        labels = label_runs(len(rows), current, previous)
+        roots, local = np.unique(labels, return_inverse=True)
+        component_count = len(roots)
+        
+        # Per-component statistics, ignoring the repeated (ghost) row
+        real = rows >= 1 if has_ghost else np.ones(len(rows), dtype=bool)
+        real_local = local[real]
+        x0 = np.full(component_count, width, dtype=np.int64)
+        y0s = np.full(component_count, height, dtype=np.int64)
+        x1 = np.full(component_count, -1, dtype=np.int64)
+        y1s = np.full(component_count, -1, dtype=np.int64)
+        np.minimum.at(x0, real_local, starts[real])
+        np.minimum.at(y0s, real_local, rows[real] + row_offset)
+        np.maximum.at(x1, real_local, ends[real] - 1)
+        np.maximum.at(y1s, real_local, rows[real] + row_offset)
+        area = np.bincount(real_local, weights=ends[real] - starts[real], minlength=component_count)
+        area = area.astype(np.int64)
+        
+        ghost_runs = np.nonzero(rows == 0)[0] if has_ghost else np.array([], dtype=np.int64)
+        last_runs = np.nonzero(rows == mask.shape[0] - 1)[0]
+        touches_ghost = np.zeros(component_count, dtype=bool)
+        touches_ghost[local[ghost_runs]] = True
+        touches_last = np.zeros(component_count, dtype=bool)
+        if y1 < height:
+            touches_last[local[last_runs]] = True
+        
+        # Components entirely inside this strip are finished
+        finished = np.nonzero(~touches_ghost & ~touches_last & (area >= min_area))[0]
+        for c in finished:
+            yield Feature(next_label, int(x0[c]), int(y0s[c]), int(x1[c]), int(y1s[c]), int(area[c]))
+            next_label += 1
+        
+        # The rest go through a small union-find with the open components
+        parent = {root: root for root in open_stats}
+        stats = dict(open_stats)
+        
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+        
+        def union(a, b):
+            root_a, root_b = find(a), find(b)
+            if root_a == root_b:
+                return
+            if root_b < root_a:
+                root_a, root_b = root_b, root_a
+            sa, sb = stats[root_a], stats.pop(root_b)
+            stats[root_a] = [
+                min(sa[0], sb[0]), min(sa[1], sb[1]),
+                max(sa[2], sb[2]), max(sa[3], sb[3]),
+                sa[4] + sb[4],
+            ]
+            parent[root_b] = root_a
+        
+        component_ids = {}
+        for c in np.nonzero(touches_ghost | touches_last)[0]:
+            component_ids[c] = next_id
+            parent[next_id] = next_id
+            stats[next_id] = [int(x0[c]), int(y0s[c]), int(x1[c]), int(y1s[c]), int(area[c])]
+            next_id += 1
+        
+        for run, open_id in zip(ghost_runs, previous_row_ids):
+            union(component_ids[local[run]], open_id)
+        
+        previous_row_ids = [find(component_ids[local[run]]) for run in last_runs] if y1 < height else []
+        still_open = set(previous_row_ids)
+        
+        for root in list(stats):
+            if find(root) != root or root in still_open:
+                continue
+            sx0, sy0, sx1, sy1, sarea = stats.pop(root)
+            if sarea >= min_area:
+                yield Feature(next_label, sx0, sy0, sx1, sy1, sarea)
+                next_label += 1
+        
+        open_stats = {root: stats[root] for root in still_open}
+        previous_row = mask[-1].copy()
+        
+        if progress is not None:
+            progress(y1 / height)
+
+
+def main():
+    """Detect and print features of an image from the command line."""
+    parser = argparse.ArgumentParser(description="Automatically dimension connected features in an image")
+    parser.add_argument("image", help="Image file to analyse")
+    parser.add_argument("--threshold", type=int, default=None, help="Gray threshold (default: automatic)")
+    parser.add_argument("--light", action="store_true", help="Features are lighter than the background")
+    parser.add_argument("--min-area", type=int, default=DEFAULT_MIN_AREA, help="Smallest feature area in pixels")
+    parser.add_argument("--scale", type=float, default=None, help="Calibration factor in units per pixel")
+    parser.add_argument("--unit", default="mm", help="Unit of the calibration factor")
+    args = parser.parse_args()
+    
+    with Image.open(args.image) as image:
+        features = detect_features(
+            image,
+            threshold=args.threshold,
+            dark_features=not args.light,
+            min_area=args.min_area
+        )
+        unit = args.unit if args.scale is not None else "px"
+        print(f"{'#':>5} {'x':>7} {'y':>7} {'width':>10} {'height':>10} {'area':>12} {'diameter':>10}  ({unit})")
+        for feature in features:
+            info = feature.to_dict(args.scale, args.unit)
+            print(
+                f"{info['label']:>5} {feature.x0:>7} {feature.y0:>7} "
+                f"{info['width']:>10.4f} {info['height']:>10.4f} "
+                f"{info['area']:>12.4f} {info['equivalent_diameter']:>10.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Calibrated grid and edge rulers drawn only inside the viewport.
+
+Drawing every grid line of a large drawing would take tens of thousands of
+canvas items. Instead the lines inside the visible area are computed on
+every scroll or zoom and drawn with a fixed pool of canvas items that are
+moved, never created and deleted. When zooming out the spacing grows in
+1-2-5 steps, so the number of lines is bounded by the viewport size.
+"""
+
+import math
+
+
+# Closest screen spacing of grid lines and ruler ticks, and of ruler labels
+MIN_GRID_PIXELS = 16
+MIN_TICK_PIXELS = 6
+MIN_LABEL_PIXELS = 64
+
+# Width of the rulers along the top and left edges of the view
+RULER_SIZE = 20
+
+# Items kept in each pool; enough for a 4K view at the closest spacing
+MAX_POOL_ITEMS = 600
+
+# Ruler subdivisions that give round tick values, by leading digit of the
+# label spacing
+SUBDIVISIONS = {1: (10, 5, 2), 2: (4, 2), 5: (5,)}
+
+
+def nice_spacing(minimum):
+    """Smallest value of the 1-2-5 series (..., 0.5, 1, 2, 5, 10, ...) >= minimum."""
+    exponent = math.floor(math.log10(minimum))
+    for base in (1, 2, 5, 10):
+        value = base * 10.0 ** exponent
+        # Tolerate rounding in minimum, e.g. 0.30000000000000004
+        if value >= minimum * (1 - 1e-9):
+            return value
+    return 10.0 ** (exponent + 1)
+
+
+def grid_spacing(units_per_pixel, zoom, requested=None, min_pixels=MIN_GRID_PIXELS):
+    """
+    Choose the grid spacing for a zoom level.
+    
+    Args:
+        units_per_pixel (float): Calibration factor (1 for a pixel grid)
+        zoom (float): Canvas pixels per image pixel
+        requested (float): Preferred spacing in units, or None for automatic
+        min_pixels (int): Closest spacing on screen
+    
+    Returns:
+        float: The requested spacing, multiplied by a 1-2-5 step where it
+        would be closer than min_pixels on screen
+    """
+    minimum = min_pixels * units_per_pixel / zoom
+    if requested is None:
+        return nice_spacing(minimum)
+    if requested >= minimum:
+        return requested
+    return requested * nice_spacing(minimum / requested)
+
+
+def multiples(start, end, step):
+    """
+    Multiples of step inside [start, end].
+    
+    Returns:
+        range: The integers k with start <= k * step <= end
+    """
+    return range(math.ceil(start / step - 1e-9), math.floor(end / step + 1e-9) + 1)
+
+
+def visible_extent(view_box, image_size, zoom):
+    """
+    Intersect the viewport with the zoomed image.
+    
+    Returns:
+        tuple: (left, top, right, bottom) in canvas coordinates, or None if
+        no part of the image is visible
+    """
+    left, top = max(0.0, view_box[0]), max(0.0, view_box[1])
+    right = min(image_size[0] * zoom, view_box[2])
+    bottom = min(image_size[1] * zoom, view_box[3])
+    if right <= left or bottom <= top:
+        return None
+    return left, top, right, bottom
+
+
+def grid_lines(view_box, image_size, zoom, units_per_pixel, spacing):
+    """
+    Compute the grid lines inside the viewport.
+    
+    Args:
+        view_box (tuple): (left, top, right, bottom) of the viewport in
+            canvas coordinates
+        image_size (tuple): Image (width, height) in pixels
+        zoom (float): Canvas pixels per image pixel
+        units_per_pixel (float): Calibration factor
+        spacing (float): Grid spacing in units
+    
+    Returns:
+        list: (x0, y0, x1, y1) line coordinates, vertical lines first
+    """
+    extent = visible_extent(view_box, image_size, zoom)
+    if extent is None:
+        return []
+    left, top, right, bottom = extent
+    step = spacing / units_per_pixel * zoom
+    lines = [(k * step, top, k * step, bottom) for k in multiples(left, right, step)]
+    lines.extend((left, k * step, right, k * step) for k in multiples(top, bottom, step))
+    return lines
+
+
+def ruler_ticks(start, end, units_per_pixel, zoom):
+    """
+    Compute the ticks of one ruler.
+    
+    Args:
+        start (float): First visible canvas coordinate along the ruler
+        end (float): Last visible canvas coordinate
+        units_per_pixel (float): Calibration factor
+        zoom (float): Canvas pixels per image pixel
+    
+    Returns:
+        list: (canvas position, value in units, is_labelled) tuples
+    """
+    label_spacing = grid_spacing(units_per_pixel, zoom, min_pixels=MIN_LABEL_PIXELS)
+    label_pixels = label_spacing / units_per_pixel * zoom
+    leading_digit = round(label_spacing / 10 ** math.floor(math.log10(label_spacing)))
+    divisions = 1
+    for candidate in SUBDIVISIONS.get(leading_digit, (1,)):
+        if label_pixels / candidate >= MIN_TICK_PIXELS:
+            divisions = candidate
+            break
+    step = label_pixels / divisions
+    return [
+        (k * step, k * label_spacing / divisions, k % divisions == 0)
+        for k in multiples(start, end, step)
+    ]
+
+
+def format_value(value):
+    """Format a ruler value without float noise (0.30000000000000004 -> '0.3')."""
+    return f"{round(value, 9):g}"
+
+
+class ItemPool:
+    """A fixed set of canvas items of one type, moved as the view changes."""
+    
+    def __init__(self, canvas, kind, tags, limit=MAX_POOL_ITEMS, **options):
+        """
+        Initialize an empty pool; items are created on first use.
+        
+        Args:
+            canvas (tkinter.Canvas): Canvas owning the items
+            kind (str): Canvas item type: "line", "rectangle" or "text"
+            tags (tuple): Tags of every item
+            limit (int): Most items the pool will ever create
+            **options: Item options such as fill or font
+        """
+        self.canvas = canvas
+        self.kind = kind
+        self.tags = tags
+        self.limit = limit
+        self.options = options
+        self.items = []
+        self.shown = 0
+    
+    def update(self, coords, texts=None):
+        """
+        Show one item per coordinate tuple and hide the rest.
+        
+        Args:
+            coords (list): Coordinate tuples, one per item
+            texts (list): Text of each item, for text pools
+        
+        Returns:
+            int: Number of items shown (at most limit)
+        """
+        count = min(len(coords), self.limit)
+        for index in range(count):
+            if index == len(self.items):
+                options = dict(self.options, text=texts[index]) if texts is not None else self.options
+                self.items.append(self._create(coords[index], options))
+                continue
+            item = self.items[index]
+            self.canvas.coords(item, *coords[index])
+            if texts is not None:
+                self.canvas.itemconfigure(item, text=texts[index])
+            if index >= self.shown:
+                self.canvas.itemconfigure(item, state="normal")
+        for item in self.items[count:self.shown]:
+            self.canvas.itemconfigure(item, state="hidden")
+        self.shown = count
+        return count
+    
+    def _create(self, coords, options):
+        """Create one new item."""
+        create = getattr(self.canvas, f"create_{self.kind}")
+        return create(*coords, tags=self.tags, **options)
+    
+    def hide(self):
+        """Hide every item."""
+        self.update([])
@@ -0,0 +1,594 @@
+#!/usr/bin/env python3
+"""
+Alignment and overlay of two revisions of the same drawing.
+
+The moving image (the new revision) is registered onto the reference image
+by phase correlation: the normalised cross-power spectrum of two shifted
+images has an inverse FFT with a single sharp peak at the shift. A scale
+difference (e.g. a rescan at another resolution) becomes a shift along the
+log-radius axis of the log-polar magnitude spectrum and is found the same
+way. Both run on small pyramid levels (at most MAX_ALIGN_SIZE pixels), from
+the coarsest level up. The log-polar scale is only accurate to a fraction
+of a percent, so the shifts left in a grid of windows are then fitted as a
+scale and shift correction: first on the finest reduced level, then on one
+full-resolution window per quadrant, which are the only parts of the
+images read at full resolution.
+
+The overlay is rendered in fixed-size tiles and only for the tiles the
+viewport shows; each tile is cut from the closest reduced level of both
+images with one affine resample.
+"""
+
+import math
+
+import numpy as np
+from PIL import Image
+
+from imaging import to_display_mode
+
+
+# Longest side of the finest level used for alignment
+MAX_ALIGN_SIZE = 1024
+
+# Coarsest pyramid level keeps at least this many pixels on its shorter side
+MIN_LEVEL_SIZE = 64
+
+# Full-resolution windows used to refine the alignment, and the largest
+# shift (in pixels) accepted from one window
+REFINE_SIZE = 512
+REFINE_LIMIT = 8
+
+# Windows per side of the grid used to correct the scale on the finest
+# reduced level, and the number of correction passes
+REFINE_GRID = 3
+REFINE_PASSES = 2
+
+# Correlation peaks below this mean the revisions hardly match
+LOW_MATCH_PEAK = 0.1
+
+# Size of overlay tiles on the canvas
+TILE_SIZE = 256
+
+COMPARE_MODES = ("blend", "difference")
+
+# Scale differences below this are treated as noise unless they correlate
+# better than no scaling at all
+MIN_SCALE_DIFFERENCE = 0.002
+
+
+class Alignment:
+    """Similarity mapping moving-image pixels onto reference-image pixels."""
+    
+    __slots__ = ("scale", "dx", "dy", "peak")
+    
+    def __init__(self, scale=1.0, dx=0.0, dy=0.0, peak=0.0):
+        """
+        Initialize an alignment: reference = scale * moving + (dx, dy).
+        
+        Args:
+            scale (float): Reference pixels per moving pixel
+            dx (float): Horizontal offset in reference pixels
+            dy (float): Vertical offset in reference pixels
+            peak (float): Phase correlation peak (0-1); low values mean the
+                images did not match well
+        """
+        self.scale = scale
+        self.dx = dx
+        self.dy = dy
+        self.peak = peak
+    
+    def to_reference(self, points):
+        """Map (N, 2) moving-image points to reference-image points."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return points * self.scale + (self.dx, self.dy)
+    
+    def to_moving(self, points):
+        """Map (N, 2) reference-image points to moving-image points."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return (points - (self.dx, self.dy)) / self.scale
+    
+    def describe(self):
+        """One-line summary, e.g. 'shift (+12.3, -4.0) px, scale 1.0000'."""
+        return (
+            f"shift ({self.dx:+.1f}, {self.dy:+.1f}) px, scale {self.scale:.4f}, "
+            f"match {self.peak:.2f}"
+        )
+
+
+def reduced_gray(image, max_size=MAX_ALIGN_SIZE):
+    """
+    Reduce an image to at most max_size pixels on its longest side.
+    
+    Args:
+        image (PIL.Image.Image): Image in any mode
+        max_size (int): Longest side of the result
+    
+    Returns:
+        tuple: (float32 grayscale array, integer reduction factor)
+    """
+    gray = to_display_mode(image).convert("L")
+    factor = max(1, math.ceil(max(gray.size) / max_size))
+    if factor > 1:
+        gray = gray.reduce(factor)
+    return np.asarray(gray, dtype=np.float32), factor
+
+
+def build_pyramid(array, min_size=MIN_LEVEL_SIZE):
+    """
+    Halve an array by 2x2 averaging until it would become smaller than min_size.
+    
+    Returns:
+        list: Levels from finest (the input) to coarsest
+    """
+    levels = [array]
+    while min(levels[-1].shape) >= 2 * min_size:
+        level = levels[-1]
+        height, width = level.shape[0] // 2 * 2, level.shape[1] // 2 * 2
+        level = level[:height, :width]
+        levels.append(
+            (level[0::2, 0::2] + level[1::2, 0::2] + level[0::2, 1::2] + level[1::2, 1::2]) / 4
+        )
+    return levels
+
+
+def hann_window(shape):
+    """2-D Hann window, suppressing the edges that wrap around in the FFT."""
+    return np.outer(np.hanning(shape[0]), np.hanning(shape[1])).astype(np.float32)
+
+
+def fit_to_shape(array, shape):
+    """Crop or pad (with the mean) an array to shape, anchored at the top left."""
+    result = np.full(shape, array.mean(), dtype=np.float32)
+    height, width = min(shape[0], array.shape[0]), min(shape[1], array.shape[1])
+    result[:height, :width] = array[:height, :width]
+    return result
+
+
+def peak_offset(values, index):
+    """Sub-sample offset of a peak from a parabola through it and its neighbours."""
+    left = values[(index - 1) % len(values)]
+    right = values[(index + 1) % len(values)]
+    denominator = left - 2 * values[index] + right
+    return 0.5 * (left - right) / denominator if denominator < 0 else 0.0
+
+
+def phase_correlation(reference, moving):
+    """
+    Find the translation between two equally sized arrays.
+    
+    Args:
+        reference (numpy.ndarray): 2-D reference array
+        moving (numpy.ndarray): 2-D array of the same shape
+    
+    Returns:
+        tuple: (dx, dy, peak) such that moving pixel (x, y) matches
+        reference pixel (x + dx, y + dy); peak is the correlation peak
+        height (1 for identical content)
+    """
+    window = hann_window(reference.shape)
+    spectrum_ref = np.fft.rfft2((reference - reference.mean()) * window)
+    spectrum_mov = np.fft.rfft2((moving - moving.mean()) * window)
+    cross = spectrum_ref * np.conj(spectrum_mov)
+    cross /= np.abs(cross) + 1e-12
+    correlation = np.fft.irfft2(cross, s=reference.shape)
+    
+    row, column = np.unravel_index(np.argmax(correlation), correlation.shape)
+    dy = row + peak_offset(correlation[:, column], row)
+    dx = column + peak_offset(correlation[row, :], column)
+    # Shifts beyond half the size wrap around to negative values
+    height, width = correlation.shape
+    dy = dy - height if dy > height / 2 else dy
+    dx = dx - width if dx > width / 2 else dx
+    return float(dx), float(dy), float(correlation[row, column])
+
+
+def log_polar_magnitude(array, shape):
+    """
+    Resample the centred magnitude spectrum of an array on a log-polar grid.
+    
+    Args:
+        array (numpy.ndarray): 2-D image array
+        shape (tuple): (angles, radii) of the output
+    
+    Returns:
+        tuple: (log-polar array of the given shape, log radius per column)
+    """
+    window = hann_window(array.shape)
+    magnitude = np.abs(np.fft.fftshift(np.fft.fft2((array - array.mean()) * window)))
+    # High-pass emphasis: low frequencies dominate but carry little geometry
+    fy = np.fft.fftshift(np.fft.fftfreq(array.shape[0]))[:, None]
+    fx = np.fft.fftshift(np.fft.fftfreq(array.shape[1]))[None, :]
+    emphasis = np.cos(np.pi * fy) * np.cos(np.pi * fx)
+    magnitude *= (1.0 - emphasis) * (2.0 - emphasis)
+    magnitude = np.log1p(magnitude)
+    
+    angles, radii = shape
+    center_y, center_x = array.shape[0] / 2, array.shape[1] / 2
+    max_radius = min(center_x, center_y)
+    log_step = math.log(max_radius) / (radii - 1)
+    radius = np.exp(np.arange(radii) * log_step)
+    # The magnitude spectrum is symmetric, so half a turn is enough
+    theta = np.linspace(0, np.pi, angles, endpoint=False)
+    sample_x = center_x + radius[None, :] * np.cos(theta)[:, None]
+    sample_y = center_y + radius[None, :] * np.sin(theta)[:, None]
+    
+    # Bilinear interpolation
+    x0 = np.clip(np.floor(sample_x).astype(np.intp), 0, array.shape[1] - 2)
+    y0 = np.clip(np.floor(sample_y).astype(np.intp), 0, array.shape[0] - 2)
+    wx = np.clip(sample_x - x0, 0.0, 1.0)
+    wy = np.clip(sample_y - y0, 0.0, 1.0)
+    top = magnitude[y0, x0] * (1 - wx) + magnitude[y0, x0 + 1] * wx
+    bottom = magnitude[y0 + 1, x0] * (1 - wx) + magnitude[y0 + 1, x0 + 1] * wx
+    return (top * (1 - wy) + bottom * wy).astype(np.float32), log_step
+
+
+def estimate_scale(reference, moving):
+    """
+    Estimate the scale between two arrays from their log-polar spectra.
+    
+    Magnitude spectra ignore translation, and enlarging an image shrinks its
+    spectrum, i.e. shifts it along the log-radius axis.
+    
+    Returns:
+        float: Reference pixels per moving pixel
+    """
+    size = max(reference.shape + moving.shape)
+    shape = (size, size)
+    polar_shape = (min(size, 360), size)
+    polar_ref, log_step = log_polar_magnitude(fit_to_shape(reference, shape), polar_shape)
+    polar_mov, _ = log_polar_magnitude(fit_to_shape(moving, shape), polar_shape)
+    shift, _, _ = phase_correlation(polar_ref, polar_mov)
+    return math.exp(-shift * log_step)
+
+
+def warp(array, shape, scale, dx, dy):
+    """
+    Resample a moving array into the reference frame of the given shape.
+    
+    Output pixel p is read from moving position (p - (dx, dy)) / scale.
+    """
+    image = Image.fromarray(np.ascontiguousarray(array, dtype=np.float32))
+    warped = image.transform(
+        (shape[1], shape[0]),
+        Image.Transform.AFFINE,
+        (1 / scale, 0, -dx / scale, 0, 1 / scale, -dy / scale),
+        resample=Image.Resampling.BILINEAR,
+        fillcolor=float(array.mean())
+    )
+    return np.asarray(warped, dtype=np.float32)
+
+
+def window_residuals(reference, warped, grid=REFINE_GRID, limit=REFINE_LIMIT):
+    """
+    Measure the shift left between two aligned arrays in a grid of windows.
+    
+    Windows that hardly match (blank areas) or move further than limit are
+    left out.
+    
+    Returns:
+        tuple: (centers, residuals) lists of (x, y); a window centred at
+        (x, y) matches the reference at (x, y) + residual
+    """
+    height, width = reference.shape
+    centers, residuals = [], []
+    for row in range(grid):
+        top, bottom = row * height // grid, (row + 1) * height // grid
+        for column in range(grid):
+            left, right = column * width // grid, (column + 1) * width // grid
+            residual_x, residual_y, peak = phase_correlation(
+                reference[top:bottom, left:right], warped[top:bottom, left:right]
+            )
+            if peak >= LOW_MATCH_PEAK and max(abs(residual_x), abs(residual_y)) <= limit:
+                centers.append(((left + right - 1) / 2, (top + bottom - 1) / 2))
+                residuals.append((residual_x, residual_y))
+    return centers, residuals
+
+
+def correct_mapping(scale, dx, dy, centers, residuals, with_scale=True):
+    """
+    Update a mapping reference = scale * moving + (dx, dy) from window residuals.
+    
+    The residual of a window centred at reference point p is modelled as
+    a * p + b: b is a leftover shift and a a leftover relative scale, which
+    shows as shifts growing with the distance from the origin. Both are
+    fitted by least squares, with a shared over the two axes.
+    
+    Args:
+        scale (float): Current scale
+        dx (float): Current x shift
+        dy (float): Current y shift
+        centers (list): Window centres (x, y) in reference pixels
+        residuals (list): Shift (x, y) left in each window
+        with_scale (bool): Correct the scale, or only the mean shift
+    
+    Returns:
+        tuple: Corrected (scale, dx, dy)
+    """
+    if not residuals:
+        return scale, dx, dy
+    centers = np.asarray(centers, dtype=np.float64)
+    residuals = np.asarray(residuals, dtype=np.float64)
+    count = len(centers)
+    if with_scale and count >= 2 and np.ptp(centers, axis=0).max() > 0:
+        system = np.zeros((2 * count, 3))
+        system[:count, 0], system[:count, 1] = centers[:, 0], 1.0
+        system[count:, 0], system[count:, 2] = centers[:, 1], 1.0
+        (relative, shift_x, shift_y), *_ = np.linalg.lstsq(
+            system, np.concatenate([residuals[:, 0], residuals[:, 1]]), rcond=None
+        )
+    else:
+        relative = 0.0
+        shift_x, shift_y = residuals.mean(axis=0)
+    factor = 1.0 + relative
+    return scale * factor, dx * factor + shift_x, dy * factor + shift_y
+
+
+def align_images(reference, moving, allow_scale=True, max_size=MAX_ALIGN_SIZE,
+                 min_size=MIN_LEVEL_SIZE, progress=None):
+    """
+    Register a moving image onto a reference image.
+    
+    Args:
+        reference (PIL.Image.Image): Reference revision
+        moving (PIL.Image.Image): Revision to align onto the reference
+        allow_scale (bool): Estimate a scale difference as well as a shift
+        max_size (int): Longest side of the finest level used
+        min_size (int): Shorter side of the coarsest level
+        progress (callable): Optional callback receiving a fraction 0-1
+    
+    Returns:
+        Alignment: Mapping from moving to reference pixels
+    """
+    ref_array, ref_factor = reduced_gray(reference, max_size)
+    mov_array, mov_factor = reduced_gray(moving, max_size)
+    ref_levels = build_pyramid(ref_array, min_size)
+    mov_levels = build_pyramid(mov_array, min_size)
+    count = min(len(ref_levels), len(mov_levels))
+    if progress:
+        progress(0.2)
+    
+    # Scale in working pixels, checked against no scaling at all
+    scale = 1.0
+    if allow_scale:
+        candidate = estimate_scale(ref_levels[0], mov_levels[0])
+        if abs(candidate - 1.0) >= MIN_SCALE_DIFFERENCE:
+            level_ref, level_mov = ref_levels[count - 1], mov_levels[count - 1]
+            _, _, peak_scaled = phase_correlation(level_ref, warp(level_mov, level_ref.shape, candidate, 0, 0))
+            _, _, peak_plain = phase_correlation(level_ref, fit_to_shape(level_mov, level_ref.shape))
+            if peak_scaled > peak_plain:
+                scale = candidate
+    if progress:
+        progress(0.4)
+    
+    # Coarse to fine: each level corrects what is left of the shift
+    dx = dy = peak = 0.0
+    for index, level in enumerate(range(count - 1, -1, -1)):
+        dx, dy = dx * 2 if index else dx, dy * 2 if index else dy
+        level_ref = ref_levels[level]
+        warped = warp(mov_levels[level], level_ref.shape, scale, dx, dy)
+        residual_x, residual_y, peak = phase_correlation(level_ref, warped)
+        dx += residual_x
+        dy += residual_y
+        if progress:
+            progress(0.4 + 0.5 * (index + 1) / count)
+    
+    # The shifts left across the finest level correct the scale estimate
+    for _ in range(REFINE_PASSES):
+        warped = warp(mov_levels[0], ref_levels[0].shape, scale, dx, dy)
+        centers, residuals = window_residuals(ref_levels[0], warped)
+        scale, dx, dy = correct_mapping(scale, dx, dy, centers, residuals, allow_scale)
+    if progress:
+        progress(0.95)
+    
+    # Working pixels of both images back to full resolution
+    alignment = Alignment(scale * ref_factor / mov_factor, dx * ref_factor, dy * ref_factor, peak)
+    if ref_factor > 1 or mov_factor > 1:
+        refine_alignment(
+            reference, moving, alignment, refinement_windows(ref_array, ref_factor, reference.size), allow_scale
+        )
+    return alignment
+
+
+def busiest_window(array, factor, size=REFINE_SIZE):
+    """
+    Pick the full-resolution window with the most detail for refinement.
+    
+    Args:
+        array (numpy.ndarray): Reduced grayscale reference
+        factor (int): Reduction factor of the array
+        size (int): Window edge in full-resolution pixels
+    
+    Returns:
+        tuple: (left, top, right, bottom) box in full-resolution pixels
+    """
+    step = max(1, size // factor)
+    best, best_box = -1.0, None
+    for top in range(0, max(1, array.shape[0] - step + 1), max(1, step // 2)):
+        for left in range(0, max(1, array.shape[1] - step + 1), max(1, step // 2)):
+            detail = float(array[top:top + step, left:left + step].std())
+            if detail > best:
+                best, best_box = detail, (left, top)
+    left, top = best_box[0] * factor, best_box[1] * factor
+    return (left, top, left + size, top + size)
+
+
+def refinement_windows(array, factor, image_size, size=REFINE_SIZE):
+    """
+    Pick the most detailed full-resolution window in each quadrant.
+    
+    Args:
+        array (numpy.ndarray): Reduced grayscale reference
+        factor (int): Reduction factor of the array
+        image_size (tuple): Full-resolution (width, height)
+        size (int): Window edge in full-resolution pixels
+    
+    Returns:
+        list: Distinct (left, top, right, bottom) boxes inside the image
+    """
+    size = min(size, *image_size)
+    height, width = array.shape
+    boxes = []
+    for top, bottom in ((0, height // 2), (height // 2, height)):
+        for left, right in ((0, width // 2), (width // 2, width)):
+            box = busiest_window(array[top:bottom, left:right], factor, size)
+            x = max(0, min(box[0] + left * factor, image_size[0] - size))
+            y = max(0, min(box[1] + top * factor, image_size[1] - size))
+            if (x, y, x + size, y + size) not in boxes:
+                boxes.append((x, y, x + size, y + size))
+    return boxes
+
+
+def refine_alignment(reference, moving, alignment, boxes, with_scale=True):
+    """
+    Correct an alignment from the shifts left in full-resolution windows.
+    
+    Alignment on reduced levels is only accurate to about one reduced
+    pixel; correlating a few windows at full resolution recovers
+    sub-pixel accuracy, and windows far apart also correct the scale, while
+    reading only those windows of each image.
+    """
+    centers, residuals = [], []
+    for box in boxes:
+        residual = window_residual(reference, moving, alignment, box)
+        # A poor match in a window would only make things worse
+        if residual is not None and max(abs(residual[0]), abs(residual[1])) <= REFINE_LIMIT:
+            centers.append(((box[0] + box[2] - 1) / 2, (box[1] + box[3] - 1) / 2))
+            residuals.append(residual)
+    alignment.scale, alignment.dx, alignment.dy = correct_mapping(
+        alignment.scale, alignment.dx, alignment.dy, centers, residuals, with_scale
+    )
+
+
+def window_residual(reference, moving, alignment, box):
+    """
+    Measure the shift left by an alignment in one full-resolution window.
+    
+    Returns:
+        tuple: (x, y) residual, or None if the window hardly matches
+    """
+    width, height = box[2] - box[0], box[3] - box[1]
+    ref_window = np.asarray(to_display_mode(reference.crop(box)).convert("L"), dtype=np.float32)
+    # Moving pixels shown at reference window pixel p: (box + p - (dx, dy)) / scale,
+    # read from a crop of the moving image covering just that window
+    step = 1 / alignment.scale
+    (left, top), (right, bottom) = alignment.to_moving([box[:2], box[2:]])
+    crop_box = (int(left) - 1, int(top) - 1, int(right) + 2, int(bottom) + 2)
+    mov_window = to_display_mode(moving.crop(crop_box)).convert("L").transform(
+        (width, height), Image.Transform.AFFINE,
+        (
+            step, 0, (box[0] - alignment.dx) * step - crop_box[0],
+            0, step, (box[1] - alignment.dy) * step - crop_box[1],
+        ),
+        resample=Image.Resampling.BILINEAR,
+        fillcolor=255
+    )
+    residual_x, residual_y, peak = phase_correlation(ref_window, np.asarray(mov_window, dtype=np.float32))
+    return (residual_x, residual_y) if peak >= LOW_MATCH_PEAK else None
+
+
+def reduction_levels(image, min_size=TILE_SIZE):
+    """
+    Build display-mode grayscale levels of an image, each half the previous.
+    
+    Returns:
+        list: PIL "L" images, the first at full resolution
+    """
+    levels = [to_display_mode(image).convert("L")]
+    while min(levels[-1].size) >= 2 * min_size:
+        levels.append(levels[-1].reduce(2))
+    return levels
+
+
+def pick_level(levels, pixels_per_output):
+    """Return (level image, level factor) for the given input pixels per output pixel."""
+    index = 0
+    while index + 1 < len(levels) and 2 ** (index + 1) <= pixels_per_output:
+        index += 1
+    return levels[index], 2 ** index
+
+
+def visible_tiles(view_box, image_size, zoom, tile_size=TILE_SIZE):
+    """
+    List the tiles a viewport shows.
+    
+    Args:
+        view_box (tuple): (left, top, right, bottom) of the viewport in
+            canvas (zoomed) coordinates
+        image_size (tuple): Reference image (width, height) in pixels
+        zoom (float): Canvas pixels per image pixel
+        tile_size (int): Tile edge in canvas pixels
+    
+    Returns:
+        list: (column, row) tuples of the tiles intersecting the viewport
+    """
+    width, height = image_size[0] * zoom, image_size[1] * zoom
+    left, top = max(0, view_box[0]), max(0, view_box[1])
+    right, bottom = min(width, view_box[2]), min(height, view_box[3])
+    if right <= left or bottom <= top:
+        return []
+    columns = range(int(left // tile_size), int(math.ceil(right / tile_size)))
+    rows = range(int(top // tile_size), int(math.ceil(bottom / tile_size)))
+    return [(column, row) for row in rows for column in columns]
+
+
+def render_tile(reference_levels, moving_levels, alignment, column, row, zoom,
+                mode="blend", alpha=0.5, tile_size=TILE_SIZE):
+    """
+    Render one overlay tile in canvas coordinates.
+    
+    Args:
+        reference_levels (list): reduction_levels() of the reference
+        moving_levels (list): reduction_levels() of the moving image
+        alignment (Alignment): Mapping from moving to reference pixels
+        column (int): Tile column
+        row (int): Tile row
+        zoom (float): Canvas pixels per reference pixel
+        mode (str): "blend" (weighted average) or "difference" (removed
+            content red, added content blue, unchanged content faded)
+        alpha (float): Weight of the moving image when blending
+        tile_size (int): Tile edge in canvas pixels
+    
+    Returns:
+        PIL.Image.Image: "L" (blend) or "RGB" (difference) tile, cut at the
+        image border
+    """
+    if mode not in COMPARE_MODES:
+        raise ValueError(f"Unknown compare mode: {mode}")
+    left, top = column * tile_size, row * tile_size
+    width = min(tile_size, int(reference_levels[0].width * zoom) - left)
+    height = min(tile_size, int(reference_levels[0].height * zoom) - top)
+    size = (max(1, width), max(1, height))
+    
+    # Canvas pixel (u, v) is reference pixel ((left + u) / zoom, (top + v) / zoom)
+    image, factor = pick_level(reference_levels, 1 / zoom)
+    step = 1 / (zoom * factor)
+    reference = image.transform(
+        size, Image.Transform.AFFINE, (step, 0, left * step, 0, step, top * step),
+        resample=Image.Resampling.BILINEAR
+    )
+    # ... and moving pixel ((left + u) / zoom - (dx, dy)) / scale
+    image, factor = pick_level(moving_levels, 1 / (zoom * alignment.scale))
+    step = 1 / (zoom * alignment.scale * factor)
+    moving = image.transform(
+        size, Image.Transform.AFFINE,
+        (
+            step, 0, left * step - alignment.dx / (alignment.scale * factor),
+            0, step, top * step - alignment.dy / (alignment.scale * factor),
+        ),
+        resample=Image.Resampling.BILINEAR,
+        fillcolor=255
+    )
+    
+    ref_values = np.asarray(reference, dtype=np.float32)
+    mov_values = np.asarray(moving, dtype=np.float32)
+    if mode == "blend":
+        blended = ref_values * (1 - alpha) + mov_values * alpha
+        return Image.fromarray(blended.astype(np.uint8), "L")
+    
+    # Dark content only in the reference was removed, only in the moving image added
+    removed = np.clip(mov_values - ref_values, 0, 255)
+    added = np.clip(ref_values - mov_values, 0, 255)
+    base = 255 - (255 - np.minimum(ref_values, mov_values)) * 0.25
+    rgb = np.stack([base - added, base - removed - added, base - removed], axis=-1)
+    return Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8), "RGB")
+
@@ -11,39 +11,123 @@ This application allows users to:
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog, ttk
 from PIL import Image, ImageTk
-import math
 from datetime import datetime
+import argparse
+import math
+import queue
+import sqlite3
+import threading
+import time
+
+from imaging import to_display_mode, resize_for_display
+from magnifier import Magnifier
+from feature_detection import detect_features
+from line_profile import sample_profile, find_edges, EDGE_METHODS
+from annotation_export import Annotation, export_annotated_image
+from caching import LRUCache
+from memory_budget import MemoryBudget, image_nbytes, photo_nbytes
+from resolution_metadata import read_resolution
+from measurement_store import DEFAULT_PATH as DEFAULT_STORE_PATH, MeasurementStore, file_hash
+from command_log import Command, CommandLog
+from calibration_fit import fit_calibration
+from image_compare import LOW_MATCH_PEAK, TILE_SIZE, align_images, reduction_levels, render_tile, visible_tiles
+from grid_overlay import RULER_SIZE, ItemPool, format_value, grid_lines, grid_spacing, ruler_ticks
+from measurement_report import read_specifications, write_report
+from dimensions import STATUS_COLORS, UNCHECKED, DimensionTable, parse_specification
+from measurement import (
+    AVAILABLE_UNITS,
+    MIN_CALIBRATION_PIXELS,
+    calculate_distance,
+    calculate_calibration_factor,
+    calculate_real_distance,
+)
 
 
 class ImageDimensioner:
     """Main application class for the Image Dimensioner tool."""
     
-    def __init__(self, root):
+    def __init__(self, root, store_path=DEFAULT_STORE_PATH):
         """Initialize the application."""
         self.root = root
         self.root.title("Image Dimensioner")
         self.root.geometry("1000x700")
         
         # Application state
-        self.image = None
+        self.image = None  # Original image, never modified (used for measurements)
+        self.display_source = None  # Display-ready copy of self.image (L/RGB/RGBA)
         self.photo = None
         self.canvas_image = None
-        self.mode = "calibration"  # "calibration" or "measurement"
+        self.mode = "calibration"  # "calibration", "measurement", "profile", "references", "grid" or "dimension"
         self.points = []
         self.calibration_factor = None
+        self.calibration_source = None  # "manual", "metadata" or "fit:<model>"
+        self.calibration_model = None  # Fitted transform for multi-reference calibration
+        self.metadata_resolution = None  # Resolution found in the image header
         self.unit = "mm"
         self.zoom_factor = 1.0
         
         # Available units
-        self.available_units = ["mm", "cm", "m", "inches", "feet"]
+        self.available_units = list(AVAILABLE_UNITS)
+        
+        # Persistent history of images, calibrations, measurements and logs
+        self.store = self.open_store(store_path)
+        self.image_id = None
+        self.calibration_id = None
+        self.session_start = time.time()  # Reports cover this session's measurements
         
-        # Measurement logs
-        self.measurement_logs = []
+        # Undo/redo history of points, calibrations and measurements
+        self.commands = CommandLog()
+        
+        # The logs console shows this session's lines from the store
+        self.logs_shown_id = self.store.last_log_id()
+        self.logs_refresh_pending = False
         
         # Canvas items for visual feedback
         self.lines = []
         self.point_markers = []
         
+        # References for multi-point calibration: segments of known length
+        # and points of known position, with their canvas items
+        self.reference_segments = []
+        self.reference_points = []
+        self.reference_world = []
+        self.reference_markers = []
+        
+        # Automatically detected features
+        self.features = []
+        
+        # Named dimensions with tolerances, drawn until the next image and
+        # rechecked whenever the calibration or unit changes
+        self.dimensions = DimensionTable()
+        
+        # Measurement lines and labels kept for annotated export
+        self.annotations = []
+        
+        # Thread running the current long task (feature detection, export)
+        self.background_thread = None
+        
+        # Memory accounting for bitmaps, zoomed views and PhotoImages
+        self.memory = MemoryBudget()
+        self.view_cache = LRUCache(8, budget=self.memory, sizeof=image_nbytes)
+        
+        # Second revision overlaid on the image in compare mode
+        self.compare_image = None
+        self.compare_image_id = None
+        self.compare_resolution = None
+        self.alignment = None  # Maps compare-image pixels onto image pixels
+        self.compare_levels = None  # Reduced grayscale levels of both images
+        self.compare_tiles = {}  # (column, row) -> (canvas item, PhotoImage)
+        self.tile_cache = LRUCache(128, budget=self.memory, sizeof=image_nbytes)
+        
+        # Grid spacing in units (None for automatic); the grid and rulers
+        # are redrawn for the visible area whenever the view changes
+        self.grid_spacing = None
+        self.view_refresh_pending = False
+        
+        # Window showing the last intensity profile
+        self.profile_window = None
+        self.profile_canvas = None
+        
         # Create UI
         self.create_menu()
         self.create_controls()
@@ -60,14 +144,97 @@ class ImageDimensioner:
         file_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="File", menu=file_menu)
         file_menu.add_command(label="Open Image", command=self.load_image)
+        file_menu.add_command(label="Export Annotated Image...", command=self.export_annotated)
+        file_menu.add_command(label="Export Report...", command=self.export_report)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.root.quit)
         
+        # Edit menu
+        edit_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Edit", menu=edit_menu)
+        edit_menu.add_command(label="Undo", accelerator="Ctrl+Z", command=self.undo)
+        edit_menu.add_command(label="Redo", accelerator="Ctrl+Y", command=self.redo)
+        self.root.bind("<Control-z>", self.undo)
+        self.root.bind("<Control-y>", self.redo)
+        self.root.bind("<Control-Shift-Z>", self.redo)
+        
+        # View menu
+        view_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="View", menu=view_menu)
+        self.magnifier_var = tk.BooleanVar(value=False)
+        view_menu.add_checkbutton(
+            label="Magnifier (M)",
+            variable=self.magnifier_var,
+            command=self.on_magnifier_toggled
+        )
+        self.magnification_var = tk.IntVar(value=16)
+        magnification_menu = tk.Menu(view_menu, tearoff=0)
+        view_menu.add_cascade(label="Magnification", menu=magnification_menu)
+        for magnification in Magnifier.MAGNIFICATIONS:
+            magnification_menu.add_radiobutton(
+                label=f"{magnification}x",
+                value=magnification,
+                variable=self.magnification_var,
+                command=self.on_magnification_changed
+            )
+        view_menu.add_separator()
+        self.grid_var = tk.BooleanVar(value=False)
+        view_menu.add_checkbutton(label="Grid (G)", variable=self.grid_var, command=self.on_grid_toggled)
+        view_menu.add_command(label="Grid Spacing...", command=self.set_grid_spacing)
+        self.rulers_var = tk.BooleanVar(value=False)
+        view_menu.add_checkbutton(label="Rulers", variable=self.rulers_var, command=self.on_grid_toggled)
+        view_menu.add_separator()
+        view_menu.add_command(label="Memory Budget...", command=self.set_memory_budget)
+        
         # Mode menu
         mode_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Mode", menu=mode_menu)
         mode_menu.add_command(label="Calibration", command=self.set_calibration_mode)
         mode_menu.add_command(label="Measurement", command=self.set_measurement_mode)
+        mode_menu.add_command(label="Edge Profile", command=self.set_profile_mode)
+        mode_menu.add_command(label="Named Dimension", command=self.set_dimension_mode)
+        mode_menu.add_separator()
+        mode_menu.add_command(label="Calibrate from Metadata", command=self.calibrate_from_metadata)
+        mode_menu.add_command(label="Reference Segments", command=self.set_references_mode)
+        mode_menu.add_command(label="Grid Points", command=self.set_grid_mode)
+        fit_menu = tk.Menu(mode_menu, tearoff=0)
+        mode_menu.add_cascade(label="Fit Calibration", menu=fit_menu)
+        fit_menu.add_command(label="Single Scale (Least Squares)", command=lambda: self.fit_references("isotropic"))
+        fit_menu.add_command(label="X/Y Scales", command=lambda: self.fit_references("anisotropic"))
+        fit_menu.add_command(label="Perspective (Homography)", command=lambda: self.fit_references("homography"))
+        fit_menu.add_separator()
+        fit_menu.add_command(label="Clear References", command=self.clear_references)
+        self.edge_method_var = tk.StringVar(value=EDGE_METHODS[0])
+        edge_menu = tk.Menu(mode_menu, tearoff=0)
+        mode_menu.add_cascade(label="Edge Detection", menu=edge_menu)
+        edge_menu.add_radiobutton(label="50% Threshold", value="threshold", variable=self.edge_method_var)
+        edge_menu.add_radiobutton(label="Maximum Gradient", value="gradient", variable=self.edge_method_var)
+        
+        # Compare menu
+        compare_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Compare", menu=compare_menu)
+        compare_menu.add_command(label="Compare with Revision...", command=self.load_compare_image)
+        self.compare_scale_var = tk.BooleanVar(value=True)
+        compare_menu.add_checkbutton(label="Detect Scale Difference", variable=self.compare_scale_var)
+        compare_menu.add_separator()
+        self.compare_mode_var = tk.StringVar(value="blend")
+        compare_menu.add_radiobutton(
+            label="Blend", value="blend", variable=self.compare_mode_var, command=self.on_compare_mode_changed
+        )
+        compare_menu.add_radiobutton(
+            label="Difference", value="difference", variable=self.compare_mode_var,
+            command=self.on_compare_mode_changed
+        )
+        compare_menu.add_separator()
+        compare_menu.add_command(label="Close Comparison", command=self.close_compare)
+        
+        # Tools menu
+        tools_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Tools", menu=tools_menu)
+        tools_menu.add_command(label="Detect Features", command=self.run_feature_detection)
+        tools_menu.add_command(label="Clear Features", command=self.clear_features)
+        tools_menu.add_separator()
+        tools_menu.add_command(label="List Dimensions", command=self.list_dimensions)
         
         # Help menu
         help_menu = tk.Menu(menubar, tearoff=0)
@@ -93,6 +260,14 @@ class ImageDimensioner:
         unit_combo.pack(side=tk.LEFT, padx=(0, 10))
         unit_combo.bind("<<ComboboxSelected>>", self.on_unit_changed)
         
+        # Where the current calibration came from
+        self.calibration_label = tk.Label(controls_frame, text="Calibration: none", fg="gray")
+        self.calibration_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        # How many named dimensions are in tolerance
+        self.dimension_label = tk.Label(controls_frame, text="")
+        self.dimension_label.pack(side=tk.LEFT, padx=(0, 10))
+        
         # Clear logs button
         clear_btn = tk.Button(
             controls_frame, 
@@ -103,6 +278,15 @@ class ImageDimensioner:
         )
         clear_btn.pack(side=tk.RIGHT, padx=(10, 0))
         
+        # Progress bar for background tasks, only shown while one runs
+        self.progress_var = tk.DoubleVar(value=0.0)
+        self.progress_bar = ttk.Progressbar(
+            controls_frame,
+            variable=self.progress_var,
+            maximum=1.0,
+            length=160
+        )
+        
     def create_canvas(self):
         """Create the canvas for displaying images."""
         # Create frame for canvas and scrollbars
@@ -121,8 +305,8 @@ class ImageDimensioner:
             xscrollcommand=h_scrollbar.set
         )
         
-        v_scrollbar.config(command=self.canvas.yview)
-        h_scrollbar.config(command=self.canvas.xview)
+        v_scrollbar.config(command=self.on_scrollbar_y)
+        h_scrollbar.config(command=self.on_scrollbar_x)
         
         # Pack widgets
         v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -137,6 +321,26 @@ class ImageDimensioner:
         self.canvas.bind("<MouseWheel>", self.on_vertical_scroll)
         self.canvas.bind("<Shift-MouseWheel>", self.on_horizontal_scroll)
         
+        # Magnifier loupe follows the mouse
+        self.magnifier = Magnifier(self.canvas, self.magnification_var.get())
+        self.canvas.bind("<Motion>", self.on_mouse_motion)
+        self.canvas.bind("<Leave>", self.on_mouse_leave)
+        self.canvas.bind("<Configure>", lambda event: self.schedule_view_refresh())
+        self.root.bind("<KeyPress-m>", self.toggle_magnifier)
+        
+        # Grid and rulers reuse a fixed set of items as the view moves
+        self.grid_pool = ItemPool(self.canvas, "line", ("grid",), fill="#6fa8dc")
+        self.ruler_band_pool = ItemPool(self.canvas, "rectangle", ("ruler",), fill="#f0f0f0", outline="#a0a0a0")
+        self.ruler_tick_pool = ItemPool(self.canvas, "line", ("ruler",), fill="black")
+        self.ruler_label_pool = ItemPool(
+            self.canvas, "text", ("ruler",), font=("Arial", 7), anchor=tk.NW
+        )
+        # Left ruler labels read upwards from their tick
+        self.ruler_side_label_pool = ItemPool(
+            self.canvas, "text", ("ruler",), font=("Arial", 7), anchor=tk.SW, angle=90
+        )
+        self.root.bind("<KeyPress-g>", self.toggle_grid)
+        
         # Make canvas focusable for key events
         self.canvas.focus_set()
         
@@ -174,14 +378,49 @@ class ImageDimensioner:
         
     def create_status_bar(self):
         """Create the status bar at the bottom."""
+        status_frame = tk.Frame(self.root)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        
+        # Memory usage on the right, refreshed periodically
+        self.memory_label = tk.Label(
+            status_frame,
+            text="",
+            bd=1,
+            relief=tk.SUNKEN,
+            anchor=tk.E
+        )
+        self.memory_label.pack(side=tk.RIGHT)
+        
         self.status_bar = tk.Label(
-            self.root,
+            status_frame,
             text="Load an image to begin",
             bd=1,
             relief=tk.SUNKEN,
             anchor=tk.W
         )
-        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.status_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.update_memory_status()
+        
+    def update_memory_status(self):
+        """Refresh the memory usage readout once a second."""
+        self.refresh_memory_label()
+        self.root.after(1000, self.update_memory_status)
+        
+    def refresh_memory_label(self):
+        """Show the current memory usage."""
+        self.memory_label.config(text=self.memory.summary())
+        
+    def set_memory_budget(self):
+        """Ask for a new memory budget for cached views."""
+        limit_mb = simpledialog.askinteger(
+            "Memory Budget",
+            f"Memory budget in MB (currently {self.memory.limit // (1024 * 1024)} MB):",
+            minvalue=64
+        )
+        if limit_mb is not None:
+            self.memory.set_limit(limit_mb * 1024 * 1024)
+            self.add_log(f"Memory budget set to {limit_mb} MB")
+            self.refresh_memory_label()
         
     def update_status(self, message):
         """Update the status bar message."""
@@ -189,65 +428,374 @@ class ImageDimensioner:
         
     def on_unit_changed(self, event=None):
         """Handle unit selection change."""
+        if self.unit_var.get() == self.unit:
+            return
+        before = self.calibration_state()
         self.unit = self.unit_var.get()
-        # Reset calibration when unit changes
-        self.calibration_factor = None
-        self.add_log(f"Unit changed to {self.unit}. Please recalibrate.")
-        self.update_status(f"Unit changed to {self.unit}. Calibration reset - please recalibrate.")
+        # A grid spacing in the old unit means nothing in the new one
+        self.grid_spacing = None
+        # A resolution converts to any unit, so metadata calibration survives
+        if self.calibration_source == "metadata":
+            self.apply_metadata_calibration()
+        else:
+            # Reset calibration when unit changes
+            self.set_calibration(None, None)
+            self.add_log(f"Unit changed to {self.unit}. Please recalibrate.")
+            self.update_status(f"Unit changed to {self.unit}. Calibration reset - please recalibrate.")
+        self.commands.push(Command("calibration", before, self.calibration_state()))
+        
+    def calibration_state(self):
+        """Return the unit and calibration as a tuple for the undo log."""
+        return (
+            self.unit, self.calibration_factor, self.calibration_source,
+            self.calibration_id, self.calibration_model
+        )
+        
+    def restore_calibration_state(self, state):
+        """Restore a unit and calibration saved by calibration_state."""
+        (self.unit, self.calibration_factor, self.calibration_source,
+         self.calibration_id, self.calibration_model) = state
+        self.unit_var.set(self.unit)
+        self.update_calibration_label()
+        self.recheck_dimensions()
+        self.schedule_view_refresh()
+        
+    def set_calibration(self, factor, source, pixel_distance=None, known_distance=None, model=None):
+        """Set the calibration factor, record it and show where it came from."""
+        self.calibration_factor = factor
+        self.calibration_source = source
+        self.calibration_model = model
+        self.calibration_id = None
+        if factor is not None:
+            self.calibration_id = self.store.add_calibration(
+                self.image_id, factor, self.unit, source, pixel_distance, known_distance
+            )
+        self.update_calibration_label()
+        self.recheck_dimensions()
+        self.schedule_view_refresh()
+        
+    def update_calibration_label(self):
+        """Show where the current calibration came from."""
+        factor, source = self.calibration_factor, self.calibration_source
+        if factor is None:
+            self.calibration_label.config(text="Calibration: none", fg="gray")
+        elif source == "metadata":
+            self.calibration_label.config(
+                text=f"Calibration: metadata ({self.metadata_resolution.describe()})",
+                fg="dark green"
+            )
+        elif self.calibration_model is not None:
+            model = self.calibration_model
+            self.calibration_label.config(
+                text=(
+                    f"Calibration: {model.kind} fit ({len(model.residuals)} refs, "
+                    f"RMS {model.rms_residual:.3g} {self.unit})"
+                ),
+                fg="dark blue"
+            )
+        else:
+            self.calibration_label.config(text="Calibration: manual reference", fg="black")
+            
+    def apply_metadata_calibration(self):
+        """Calibrate from the resolution in the current image's header."""
+        resolution = self.metadata_resolution
+        self.set_calibration(resolution.calibration_factor(self.unit), "metadata")
+        self.add_log(
+            f"Calibration (metadata): {resolution.describe()} | "
+            f"Scale: {self.calibration_factor:.6f} {self.unit}/px"
+        )
+        self.update_status(
+            f"Calibrated from image metadata: {resolution.describe()} | "
+            f"{self.calibration_factor:.6f} {self.unit}/pixel"
+        )
+        
+    def calibrate_from_metadata(self):
+        """Apply metadata calibration on request, including default resolutions."""
+        if not self.image:
+            messagebox.showwarning("No Image", "Please load an image first.")
+            return
+        if self.metadata_resolution is None:
+            messagebox.showwarning(
+                "No Resolution",
+                "This image has no resolution metadata. Calibrate with a known distance instead."
+            )
+            return
+        before = self.calibration_state()
+        self.apply_metadata_calibration()
+        self.commands.push(Command("calibration", before, self.calibration_state()))
         
     def on_zoom(self, event):
-        """Handle Ctrl+scroll zoom."""
+        """Handle Ctrl+scroll zoom, keeping the point under the cursor fixed."""
         if not self.image:
             return
             
         # Calculate zoom factor
         zoom_in = event.delta > 0
         zoom_factor = 1.1 if zoom_in else 0.9
-        self.zoom_factor *= zoom_factor
         
         # Limit zoom range
-        self.zoom_factor = max(0.1, min(5.0, self.zoom_factor))
+        new_zoom = max(0.1, min(5.0, self.zoom_factor * zoom_factor))
+        
+        self.zoom_at(new_zoom, event.x, event.y)
+        self.on_mouse_motion(event)
+        
+    def zoom_at(self, new_zoom, widget_x, widget_y):
+        """
+        Change the zoom level around an anchor point in widget coordinates.
         
-        # Resize and redisplay image
+        The image item is updated in place and existing overlays are scaled,
+        so nothing else on the canvas is deleted or recreated.
+        """
+        ratio = new_zoom / self.zoom_factor
+        if ratio == 1.0:
+            return
+            
+        # Image point under the anchor, in canvas coordinates before zooming
+        anchor_x = self.canvas.canvasx(widget_x)
+        anchor_y = self.canvas.canvasy(widget_y)
+        
+        self.zoom_factor = new_zoom
         self.display_image()
+        self.clear_compare_tiles()
+        
+        # Scale overlays about the canvas origin (where the image is anchored)
+        self.canvas.scale("overlay", 0, 0, ratio, ratio)
+        self.restore_marker_sizes(ratio)
+        
+        # Scroll so the anchor lands back under the cursor
+        width, height = self.photo.width(), self.photo.height()
+        self.canvas.xview_moveto(max(0.0, (anchor_x * ratio - widget_x) / width))
+        self.canvas.yview_moveto(max(0.0, (anchor_y * ratio - widget_y) / height))
+        self.schedule_view_refresh()
+        
+    def restore_marker_sizes(self, ratio):
+        """Undo the size change canvas.scale applies to point markers."""
+        for marker in self.point_markers + self.reference_markers:
+            if self.canvas.type(marker) != "oval":
+                continue
+            x0, y0, x1, y1 = self.canvas.coords(marker)
+            center_x, center_y = (x0 + x1) / 2, (y0 + y1) / 2
+            radius = (x1 - x0) / (2 * ratio)
+            self.canvas.coords(
+                marker,
+                center_x - radius, center_y - radius,
+                center_x + radius, center_y + radius
+            )
+        
+    def on_mouse_motion(self, event):
+        """Update the magnifier loupe as the mouse moves."""
+        if not self.magnifier.enabled or not self.image:
+            return
+        canvas_x = self.canvas.canvasx(event.x)
+        canvas_y = self.canvas.canvasy(event.y)
+        self.magnifier.update(self.display_source, canvas_x, canvas_y, self.zoom_factor)
+        
+    def on_mouse_leave(self, event):
+        """Hide the magnifier when the mouse leaves the canvas."""
+        self.magnifier.hide()
+        
+    def toggle_magnifier(self, event=None):
+        """Toggle the magnifier with the M key."""
+        self.magnifier_var.set(not self.magnifier_var.get())
+        self.on_magnifier_toggled()
+        
+    def toggle_grid(self, event=None):
+        """Toggle the grid with the G key."""
+        self.grid_var.set(not self.grid_var.get())
+        self.on_grid_toggled()
+        
+    def on_grid_toggled(self):
+        """Show or hide the grid and rulers and report the grid spacing."""
+        if self.image and (self.grid_var.get() or self.rulers_var.get()):
+            units_per_pixel, unit = self.grid_scale()
+            message = "Rulers in px"
+            if self.grid_var.get():
+                spacing = grid_spacing(units_per_pixel, self.zoom_factor, self.grid_spacing)
+                message = f"Grid every {format_value(spacing)} {unit} (wider when zoomed out)"
+            if unit == "px" and self.calibration_factor is not None:
+                self.update_status(
+                    f"{message}: the {self.calibration_model.kind} calibration has no single scale"
+                )
+            elif self.grid_var.get():
+                self.update_status(message)
+        self.schedule_view_refresh()
+        
+    def grid_scale(self):
+        """
+        Return units per pixel and the unit name for the grid and rulers.
+        
+        Uncalibrated images get a pixel grid, and so do anisotropic and
+        homography fits, whose scale changes with direction or position.
+        """
+        model = self.calibration_model
+        if self.calibration_factor is None or (model is not None and model.kind != "isotropic"):
+            return 1.0, "px"
+        return self.calibration_factor, self.unit
+        
+    def set_grid_spacing(self):
+        """Ask for the grid spacing in the grid's unit (pixels when uncalibrated)."""
+        unit = self.grid_scale()[1]
+        spacing = simpledialog.askfloat(
+            "Grid Spacing",
+            f"Grid spacing in {unit} (0 for automatic):",
+            initialvalue=self.grid_spacing or 0,
+            minvalue=0
+        )
+        if spacing is None:
+            return
+        self.grid_spacing = spacing or None
+        self.grid_var.set(True)
+        self.on_grid_toggled()
+        
+    def on_magnifier_toggled(self):
+        """Enable or disable the magnifier loupe."""
+        enabled = self.magnifier_var.get()
+        self.magnifier.set_enabled(enabled)
+        self.update_status(f"Magnifier {'on' if enabled else 'off'} ({self.magnifier.magnification}x)")
+        
+    def on_magnification_changed(self):
+        """Apply a new magnifier enlargement factor."""
+        self.magnifier.set_magnification(self.magnification_var.get())
+        self.update_status(f"Magnification: {self.magnifier.magnification}x")
         
     def on_vertical_scroll(self, event):
         """Handle vertical scrolling."""
         self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+        self.schedule_view_refresh()
         
     def on_horizontal_scroll(self, event):
         """Handle Shift+scroll horizontal scrolling."""
         self.canvas.xview_scroll(int(-1 * (event.delta / 120)), "units")
+        self.schedule_view_refresh()
+        
+    def view_box(self):
+        """Return the visible area as (left, top, right, bottom) in canvas coordinates."""
+        return (
+            self.canvas.canvasx(0), self.canvas.canvasy(0),
+            self.canvas.canvasx(self.canvas.winfo_width()), self.canvas.canvasy(self.canvas.winfo_height())
+        )
         
+    def schedule_view_refresh(self):
+        """Update overlays drawn for the visible area once the view has settled."""
+        if self.view_refresh_pending:
+            return
+        self.view_refresh_pending = True
+        self.root.after_idle(self.refresh_view)
+        
+    def refresh_view(self):
+        """Redraw the compare tiles, grid and rulers for the visible area."""
+        self.view_refresh_pending = False
+        view = self.view_box()
+        self.refresh_compare_overlay(view)
+        self.refresh_grid(view)
+        
+    def refresh_grid(self, view):
+        """Move the grid and ruler items to the visible part of the image."""
+        units_per_pixel = self.grid_scale()[0]
+        lines = []
+        if self.grid_var.get() and self.image:
+            spacing = grid_spacing(units_per_pixel, self.zoom_factor, self.grid_spacing)
+            lines = grid_lines(view, self.image.size, self.zoom_factor, units_per_pixel, spacing)
+        self.grid_pool.update(lines)
+        if lines and self.canvas.find_withtag("overlay"):
+            # Keep measurement lines and markers on top of the grid
+            self.canvas.tag_lower("grid", "overlay")
+        self.refresh_rulers(view, units_per_pixel)
+        
+    def refresh_rulers(self, view, units_per_pixel):
+        """Draw rulers along the top and left edges of the view."""
+        pools = (self.ruler_band_pool, self.ruler_tick_pool, self.ruler_label_pool, self.ruler_side_label_pool)
+        if not (self.rulers_var.get() and self.image):
+            for pool in pools:
+                pool.hide()
+            return
+            
+        left, top, right, bottom = view
+        zoom = self.zoom_factor
+        ticks, labels, texts, side_labels, side_texts = [], [], [], [], []
+        for position, value, labelled in ruler_ticks(
+            max(0, left + RULER_SIZE), min(right, self.image.width * zoom), units_per_pixel, zoom
+        ):
+            length = RULER_SIZE * (0.6 if labelled else 0.3)
+            ticks.append((position, top + RULER_SIZE - length, position, top + RULER_SIZE))
+            if labelled:
+                labels.append((position + 2, top + 1))
+                texts.append(format_value(value))
+        for position, value, labelled in ruler_ticks(
+            max(0, top + RULER_SIZE), min(bottom, self.image.height * zoom), units_per_pixel, zoom
+        ):
+            length = RULER_SIZE * (0.6 if labelled else 0.3)
+            ticks.append((left + RULER_SIZE - length, position, left + RULER_SIZE, position))
+            if labelled:
+                side_labels.append((left + 11, position - 2))
+                side_texts.append(format_value(value))
+                
+        self.ruler_band_pool.update([
+            (left, top, right, top + RULER_SIZE),
+            (left, top, left + RULER_SIZE, bottom),
+        ])
+        self.ruler_tick_pool.update(ticks)
+        self.ruler_label_pool.update(labels, texts)
+        self.ruler_side_label_pool.update(side_labels, side_texts)
+        self.canvas.tag_raise("ruler")
+        
+    def on_scrollbar_y(self, *args):
+        """Scroll vertically from the scrollbar."""
+        self.canvas.yview(*args)
+        self.schedule_view_refresh()
+        
+    def on_scrollbar_x(self, *args):
+        """Scroll horizontally from the scrollbar."""
+        self.canvas.xview(*args)
+        self.schedule_view_refresh()
+        
+    def open_store(self, path):
+        """Open the measurement store, falling back to memory if the file is unusable."""
+        try:
+            return MeasurementStore(path)
+        except (sqlite3.Error, OSError):
+            return MeasurementStore(":memory:")
+            
     def add_log(self, message):
-        """Add a message to the logs console."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        log_entry = f"[{timestamp}] {message}\n"
+        """Add a message to the store and the logs console."""
+        self.store.add_log(message, self.image_id)
+        # Lines logged while handling one event are written in one batch
+        if not self.logs_refresh_pending:
+            self.logs_refresh_pending = True
+            self.root.after_idle(self.refresh_logs)
+            
+    def refresh_logs(self):
+        """Write pending log lines and append the new ones to the console."""
+        self.logs_refresh_pending = False
+        entries = self.store.log_entries(after_id=self.logs_shown_id)
+        if not entries:
+            return
+        self.logs_shown_id = entries[-1]["id"]
         
         self.logs_text.config(state=tk.NORMAL)
-        self.logs_text.insert(tk.END, log_entry)
+        for entry in entries:
+            timestamp = datetime.fromtimestamp(entry["timestamp"]).strftime("%H:%M:%S")
+            self.logs_text.insert(tk.END, f"[{timestamp}] {entry['message']}\n")
         self.logs_text.see(tk.END)
         self.logs_text.config(state=tk.DISABLED)
         
-        # Store in logs list
-        self.measurement_logs.append({"timestamp": timestamp, "message": message})
-        
     def clear_logs(self):
-        """Clear the measurement logs."""
+        """Clear the logs console; the history stays in the store."""
+        self.refresh_logs()
         self.logs_text.config(state=tk.NORMAL)
         self.logs_text.delete(1.0, tk.END)
         self.logs_text.config(state=tk.DISABLED)
-        self.measurement_logs.clear()
-        self.add_log("Logs cleared")
+        self.add_log("Logs cleared (history is kept in the measurement database)")
         
     def load_image(self):
         """Load an image file."""
         file_types = [
-            ("All Supported Formats", "*.png *.jpg *.jpeg *.bmp *.gif"),
+            ("All Supported Formats", "*.png *.jpg *.jpeg *.bmp *.gif *.tif *.tiff"),
             ("PNG files", "*.png"),
             ("JPEG files", "*.jpg *.jpeg"),
             ("BMP files", "*.bmp"),
             ("GIF files", "*.gif"),
+            ("TIFF files", "*.tif *.tiff"),
             ("All files", "*.*")
         ]
         
@@ -258,16 +806,56 @@ class ImageDimensioner:
         
         if file_path:
             try:
-                self.image = Image.open(file_path)
+                image = Image.open(file_path)
+                # Convert once to a display-ready mode; zooming reuses it
+                self.display_source = to_display_mode(image)
+                self.image = image
+                self.view_cache.clear()
+                self.memory.track("image", image_nbytes(self.image))
+                # The display source is only a separate bitmap if converted
+                self.memory.track(
+                    "display_source",
+                    image_nbytes(self.display_source) if self.display_source is not self.image else 0
+                )
                 self.zoom_factor = 1.0  # Reset zoom when loading new image
                 self.display_image()
+                self.canvas.xview_moveto(0)
+                self.canvas.yview_moveto(0)
                 self.reset_points()
+                self.clear_features()
+                self.clear_references()
+                self.close_compare()
+                self.clear_dimensions()
+                self.annotations = []
+                self.schedule_view_refresh()
                 filename = file_path.split("/")[-1].split("\\")[-1]  # Get just filename
+                self.image_id = self.store.add_image(file_path, file_hash(file_path), *image.size)
                 self.add_log(f"Image loaded: {filename}")
+                self.load_metadata_calibration()
                 self.update_status(f"Image loaded: {file_path} | Mode: {self.mode.capitalize()}")
+                # History refers to the previous image
+                self.commands.clear()
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load image: {str(e)}")
                 
+    def load_metadata_calibration(self):
+        """Calibrate a newly loaded image from its header when possible."""
+        # Uses the header info parsed by Image.open, no pixel data
+        self.metadata_resolution = read_resolution(self.image)
+        resolution = self.metadata_resolution
+        if resolution is not None and not resolution.suspect:
+            self.apply_metadata_calibration()
+            return
+        if resolution is not None:
+            self.add_log(
+                f"Image header reports {resolution.describe()}, a common default. "
+                f"Use Mode > Calibrate from Metadata to apply it."
+            )
+        if self.calibration_source == "metadata":
+            # That calibration belonged to the previous image
+            self.set_calibration(None, None)
+            self.add_log("Calibration reset - please recalibrate.")
+                
     def display_image(self):
         """Display the loaded image on the canvas with current zoom."""
         if self.image:
@@ -278,20 +866,29 @@ class ImageDimensioner:
                 int(original_size[1] * self.zoom_factor)
             )
             
-            # Resize image for display
-            display_image = self.image.resize(new_size, Image.Resampling.LANCZOS)
+            # Resize the cached display-mode copy, not the original. Zoomed
+            # views are cached (within the memory budget) for quick zoom back.
+            if new_size == self.display_source.size:
+                display_image = self.display_source
+            else:
+                display_image = self.view_cache.get_or_load(
+                    new_size,
+                    lambda: resize_for_display(self.display_source, new_size)
+                )
             
             # Convert to PhotoImage
             self.photo = ImageTk.PhotoImage(display_image)
+            self.memory.track("photo", photo_nbytes(self.photo))
             
-            # Clear canvas
-            self.canvas.delete("all")
-            
-            # Display image
-            self.canvas_image = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
+            # Reuse the image item, keeping it below any overlays
+            if self.canvas_image is None:
+                self.canvas_image = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
+                self.canvas.tag_lower(self.canvas_image)
+            else:
+                self.canvas.itemconfig(self.canvas_image, image=self.photo)
             
-            # Configure scroll region
-            self.canvas.config(scrollregion=self.canvas.bbox(tk.ALL))
+            # Configure scroll region to the image only, not the overlays
+            self.canvas.config(scrollregion=(0, 0, new_size[0], new_size[1]))
             
     def set_calibration_mode(self):
         """Switch to calibration mode."""
@@ -315,6 +912,122 @@ class ImageDimensioner:
         self.add_log("Switched to Measurement mode")
         self.update_status(f"Measurement mode: Click two points to measure distance")
         
+    def set_references_mode(self):
+        """Switch to collecting reference segments for a least-squares fit."""
+        self.mode = "references"
+        self.reset_points()
+        self.add_log("Switched to Reference Segments mode")
+        self.update_status(
+            f"Reference Segments: click both ends of each known length "
+            f"({len(self.reference_segments)} so far), then Mode > Fit Calibration"
+        )
+        
+    def set_grid_mode(self):
+        """Switch to collecting points of known position for a fit."""
+        self.mode = "grid"
+        self.reset_points()
+        self.add_log("Switched to Grid Points mode")
+        self.update_status(
+            f"Grid Points: click points whose position you know "
+            f"({len(self.reference_points)} so far), then Mode > Fit Calibration"
+        )
+        
+    def add_reference_segment(self):
+        """Ask for the length of the selected pair and keep it as a reference."""
+        point1, point2 = self.points
+        if self.calculate_distance(point1, point2) < MIN_CALIBRATION_PIXELS:
+            messagebox.showerror("Error", "Points are too close together.")
+            self.reset_points()
+            return
+        known_distance = simpledialog.askfloat(
+            "Reference Segment",
+            f"Enter the actual distance between the two points (in {self.unit}):",
+            minvalue=0.001
+        )
+        if known_distance is not None and known_distance > 0:
+            self.reference_segments.append((point1, point2, known_distance))
+            self.reference_markers.append(self.canvas.create_line(
+                point1[0] * self.zoom_factor, point1[1] * self.zoom_factor,
+                point2[0] * self.zoom_factor, point2[1] * self.zoom_factor,
+                fill="orange", width=2, tags=("overlay", "reference")
+            ))
+            self.add_log(f"Reference {len(self.reference_segments)}: {known_distance:.4f} {self.unit}")
+            self.update_status(f"{len(self.reference_segments)} reference segments | Mode > Fit Calibration when done")
+        self.reset_points()
+        
+    def add_grid_point(self):
+        """Ask for the known position of the clicked point and keep it."""
+        point = self.points[-1]
+        answer = simpledialog.askstring(
+            "Grid Point",
+            f"Enter the known position of this point as x, y (in {self.unit}):"
+        )
+        try:
+            world = tuple(float(value) for value in answer.split(",")) if answer else None
+        except ValueError:
+            world = None
+        if world is not None and len(world) == 2:
+            self.reference_points.append(point)
+            self.reference_world.append(world)
+            x, y = point[0] * self.zoom_factor, point[1] * self.zoom_factor
+            self.reference_markers.append(self.canvas.create_oval(
+                x - 4, y - 4, x + 4, y + 4, outline="orange", width=2, tags=("overlay", "reference")
+            ))
+            self.add_log(f"Grid point {len(self.reference_points)}: ({world[0]:g}, {world[1]:g}) {self.unit}")
+            self.update_status(f"{len(self.reference_points)} grid points | Mode > Fit Calibration when done")
+        elif answer:
+            messagebox.showerror("Error", "Enter the position as two numbers, e.g. 10, 20")
+        self.reset_points()
+        
+    def fit_references(self, kind):
+        """Fit a calibration model to the collected references."""
+        try:
+            model = fit_calibration(
+                kind, self.reference_segments, self.reference_points, self.reference_world
+            )
+        except ValueError as e:
+            messagebox.showerror("Calibration Fit", str(e))
+            return
+            
+        before = self.calibration_state()
+        self.set_calibration(model.scale, f"fit:{kind}", model=model)
+        self.commands.push(Command("calibration", before, self.calibration_state()))
+        self.add_log(f"Calibration fit: {model.describe()} {self.unit}")
+        residuals = ", ".join(f"{residual:+.3g}" for residual in model.residuals[:20])
+        if len(model.residuals) > 20:
+            residuals += ", ..."
+        messagebox.showinfo(
+            "Calibration Fit",
+            f"Model: {model.describe()} {self.unit}\n\n"
+            f"Residuals ({self.unit}): {residuals}"
+        )
+        status = f"Calibrated by {kind} fit | RMS residual {model.rms_residual:.4g} {self.unit}"
+        if kind != "isotropic" and (self.grid_var.get() or self.rulers_var.get()):
+            status += " | grid and rulers stay in px (no single scale)"
+        self.update_status(status)
+        
+    def clear_references(self):
+        """Forget collected references and remove their overlays."""
+        self.canvas.delete("reference")
+        self.reference_segments = []
+        self.reference_points = []
+        self.reference_world = []
+        self.reference_markers = []
+        
+    def set_profile_mode(self):
+        """Switch to edge profile mode."""
+        self.mode = "profile"
+        self.reset_points()
+        self.add_log("Switched to Edge Profile mode")
+        self.update_status("Edge Profile mode: Click two points across the edges to measure")
+        
+    def set_dimension_mode(self):
+        """Switch to named dimension mode."""
+        self.mode = "dimension"
+        self.reset_points()
+        self.add_log("Switched to Named Dimension mode")
+        self.update_status("Named Dimension mode: Click two points, then enter a name and tolerance")
+        
     def reset_points(self):
         """Reset the selected points and visual markers."""
         self.points = []
@@ -328,6 +1041,9 @@ class ImageDimensioner:
             self.canvas.delete(line)
         self.lines = []
         
+        # Placements of the cleared points can no longer be undone
+        self.commands.drop_points()
+        
     def on_canvas_click(self, event):
         """Handle canvas click events."""
         if not self.image:
@@ -344,14 +1060,26 @@ class ImageDimensioner:
         
         # Add point (store original coordinates for calculations)
         self.points.append((original_x, original_y))
+        self.commands.push(Command("point", after=(original_x, original_y)))
         
         # Draw point marker at canvas coordinates
         marker = self.draw_point(canvas_x, canvas_y)
         self.point_markers.append(marker)
         
+        # Each grid point is complete on its own
+        if self.mode == "grid":
+            self.add_grid_point()
+            return
+            
         # Update status
         if self.mode == "calibration":
             self.update_status(f"Calibration: Point {len(self.points)} of 2 selected")
+        elif self.mode == "profile":
+            self.update_status(f"Edge Profile: Point {len(self.points)} of 2 selected")
+        elif self.mode == "references":
+            self.update_status(f"Reference Segment: Point {len(self.points)} of 2 selected")
+        elif self.mode == "dimension":
+            self.update_status(f"Named Dimension: Point {len(self.points)} of 2 selected")
         else:
             self.update_status(f"Measurement: Point {len(self.points)} of 2 selected")
         
@@ -364,9 +1092,73 @@ class ImageDimensioner:
             
             if self.mode == "calibration":
                 self.calibrate()
+            elif self.mode == "profile":
+                self.measure_profile()
+            elif self.mode == "references":
+                self.add_reference_segment()
+            elif self.mode == "dimension":
+                self.add_dimension()
             else:
                 self.measure()
                 
+    def undo(self, event=None):
+        """Undo the last point, calibration, unit change or measurement."""
+        command = self.commands.undo()
+        if command is None:
+            self.update_status("Nothing to undo")
+            return
+        self.apply_command(command, undo=True)
+        
+    def redo(self, event=None):
+        """Redo the last undone command."""
+        command = self.commands.redo()
+        if command is None:
+            self.update_status("Nothing to redo")
+            return
+        self.apply_command(command, undo=False)
+        
+    def apply_command(self, command, undo):
+        """Revert or reapply one command, touching only the items it changed."""
+        action = "Undo" if undo else "Redo"
+        if command.kind == "point":
+            if undo:
+                self.points.pop()
+                self.canvas.delete(self.point_markers.pop())
+            else:
+                x, y = command.after
+                self.points.append((x, y))
+                self.point_markers.append(self.draw_point(x * self.zoom_factor, y * self.zoom_factor))
+            self.update_status(f"{action}: point ({len(self.points)} of 2 selected)")
+            return
+            
+        if command.kind == "calibration":
+            self.restore_calibration_state(command.before if undo else command.after)
+            factor = self.calibration_factor
+            description = f"calibration ({factor:.6f} {self.unit}/px)" if factor is not None else "calibration (none)"
+        else:
+            if undo:
+                for record in command.records:
+                    self.store.remove_measurement(record)
+            else:
+                self.store.add_measurements(command.records, keep_ids=True)
+            if command.after is not None:
+                if undo:
+                    self.remove_dimension(command.after[0])
+                else:
+                    self.place_dimension(command.after)
+            description = f"measurement {command.annotation.label}"
+            
+        if command.annotation is not None:
+            if not undo:
+                self.annotations.append(command.annotation)
+            elif self.annotations and self.annotations[-1] is command.annotation:
+                self.annotations.pop()
+            elif command.annotation in self.annotations:
+                self.annotations.remove(command.annotation)
+                
+        self.add_log(f"{action}: {description}")
+        self.update_status(f"{action}: {description}")
+                
     def draw_point(self, x, y, radius=5):
         """Draw a point marker on the canvas."""
         return self.canvas.create_oval(
@@ -374,7 +1166,8 @@ class ImageDimensioner:
             x + radius, y + radius,
             fill="red",
             outline="white",
-            width=2
+            width=2,
+            tags=("overlay",)
         )
         
     def draw_line(self, point1, point2):
@@ -383,21 +1176,26 @@ class ImageDimensioner:
             point1[0], point1[1],
             point2[0], point2[1],
             fill="blue",
-            width=2
+            width=2,
+            tags=("overlay",)
         )
         self.lines.append(line)
         
+    def real_distance(self, point1, point2, pixel_distance):
+        """Convert a measured segment to real units with the current calibration."""
+        if self.calibration_model is not None:
+            return self.calibration_model.real_distance(point1, point2)
+        return calculate_real_distance(pixel_distance, self.calibration_factor)
+        
     def calculate_distance(self, point1, point2):
         """Calculate pixel distance between two points."""
-        dx = point2[0] - point1[0]
-        dy = point2[1] - point1[1]
-        return math.sqrt(dx * dx + dy * dy)
+        return calculate_distance(point1, point2)
         
     def calibrate(self):
         """Perform calibration using two selected points."""
         pixel_distance = self.calculate_distance(self.points[0], self.points[1])
         
-        if pixel_distance < 1:
+        if pixel_distance < MIN_CALIBRATION_PIXELS:
             messagebox.showerror("Error", "Points are too close together.")
             self.reset_points()
             return
@@ -415,10 +1213,23 @@ class ImageDimensioner:
             return
             
         # Calculate calibration factor (units per pixel)
-        self.calibration_factor = known_distance / pixel_distance
+        before = self.calibration_state()
+        self.set_calibration(
+            calculate_calibration_factor(pixel_distance, known_distance),
+            "manual",
+            pixel_distance,
+            known_distance
+        )
         
         # Log calibration
         self.add_log(f"Calibration: {pixel_distance:.2f}px = {known_distance:.2f} {self.unit} | Scale: {self.calibration_factor:.6f} {self.unit}/px")
+        annotation = Annotation(
+            "line", tuple(self.points), f"{known_distance:.2f} {self.unit} (ref)", color="red"
+        )
+        self.annotations.append(annotation)
+        self.commands.push(
+            Command("calibration", before, self.calibration_state(), annotation), consumes_points=True
+        )
         
         messagebox.showinfo(
             "Calibration Complete",
@@ -443,15 +1254,27 @@ class ImageDimensioner:
             return
             
         pixel_distance = self.calculate_distance(self.points[0], self.points[1])
-        real_distance = pixel_distance * self.calibration_factor
+        real_distance = self.real_distance(self.points[0], self.points[1], pixel_distance)
         
         # Log measurement
         self.add_log(f"Measured: {real_distance:.4f} {self.unit} ({pixel_distance:.2f}px)")
+        revision, revision_record = self.measure_revision(self.points[0], self.points[1], real_distance)
+        record = self.store.add_measurement(
+            self.image_id, self.calibration_id, tuple(self.points),
+            pixel_distance, real_distance, self.unit
+        )
+        annotation = Annotation("line", tuple(self.points), f"{real_distance:.4f} {self.unit}")
+        self.annotations.append(annotation)
+        records = [record] + ([revision_record] if revision_record else [])
+        self.commands.push(
+            Command("measurement", annotation=annotation, records=records), consumes_points=True
+        )
         
         messagebox.showinfo(
             "Measurement Result",
             f"Pixel distance: {pixel_distance:.2f} pixels\n"
             f"Real distance: {real_distance:.4f} {self.unit}"
+            + (f"\n{revision}" if revision else "")
         )
         
         self.update_status(
@@ -460,6 +1283,543 @@ class ImageDimensioner:
         
         self.reset_points()
         
+    def add_dimension(self):
+        """Name the selected segment and check it against a nominal value and tolerance."""
+        point1, point2 = self.points
+        name = simpledialog.askstring("Named Dimension", "Dimension name (e.g. bore A):")
+        if not name or not name.strip():
+            self.reset_points()
+            return
+        text = simpledialog.askstring(
+            "Named Dimension",
+            f"Nominal value and tolerance in {self.unit} (e.g. 12.5 ± 0.05), blank for none:"
+        )
+        if text is None:
+            self.reset_points()
+            return
+        try:
+            nominal, tolerance = parse_specification(text)
+        except ValueError as error:
+            messagebox.showerror("Error", str(error))
+            self.reset_points()
+            return
+            
+        pixel_distance = self.calculate_distance(point1, point2)
+        dimension = (name.strip(), point1, point2, pixel_distance, nominal, tolerance, self.unit)
+        index = self.place_dimension(dimension)
+        description = self.dimensions.describe(index, self.unit)
+        value = self.dimensions.values[index]
+        real_distance = None if math.isnan(value) else float(value)
+        
+        self.add_log(f"Dimension {description}")
+        _, revision_record = self.measure_revision(point1, point2, real_distance, label=dimension[0])
+        record = self.store.add_measurement(
+            self.image_id, self.calibration_id, (point1, point2), pixel_distance, real_distance,
+            self.unit, kind="dimension", label=dimension[0], nominal=nominal, tolerance=tolerance
+        )
+        records = [record] + ([revision_record] if revision_record else [])
+        annotation = Annotation(
+            "line", (point1, point2), description, color=STATUS_COLORS[self.dimensions.status[index]]
+        )
+        self.annotations.append(annotation)
+        self.commands.push(
+            Command("measurement", after=dimension, annotation=annotation, records=records),
+            consumes_points=True
+        )
+        self.update_status(f"Dimension {description}")
+        self.reset_points()
+        
+    def place_dimension(self, dimension):
+        """
+        Draw a named dimension, add it to the table and check it.
+        
+        Returns:
+            int: Index of the dimension in the table
+        """
+        name, point1, point2, pixel_distance, nominal, tolerance, unit = dimension
+        zoom = self.zoom_factor
+        color = STATUS_COLORS[UNCHECKED]
+        line = self.canvas.create_line(
+            point1[0] * zoom, point1[1] * zoom, point2[0] * zoom, point2[1] * zoom,
+            fill=color, width=2, tags=("overlay", "dimension")
+        )
+        text = self.canvas.create_text(
+            (point1[0] + point2[0]) / 2 * zoom, (point1[1] + point2[1]) / 2 * zoom,
+            text=name, anchor=tk.S, fill=color, tags=("overlay", "dimension")
+        )
+        index = self.dimensions.add(name, point1, point2, pixel_distance, nominal, tolerance, unit, (line, text))
+        self.recheck_dimensions()
+        return index
+        
+    def remove_dimension(self, name):
+        """Remove the newest dimension with a name and its canvas items."""
+        index = self.dimensions.index_of(name)
+        if index is not None:
+            for item in self.dimensions.remove(index):
+                self.canvas.delete(item)
+            self.update_dimension_status()
+            
+    def recheck_dimensions(self):
+        """Recheck every named dimension and recolour only those whose state changed."""
+        if not len(self.dimensions):
+            return
+        changed = self.dimensions.evaluate(self.calibration_factor, self.unit, self.calibration_model)
+        for index in changed:
+            color = STATUS_COLORS[self.dimensions.status[index]]
+            for item in self.dimensions.items[index]:
+                self.canvas.itemconfigure(item, fill=color)
+        if len(changed):
+            self.update_dimension_status()
+            
+    def update_dimension_status(self):
+        """Show how many named dimensions are in tolerance."""
+        if not len(self.dimensions):
+            self.dimension_label.config(text="")
+            return
+        passed, failed = self.dimensions.counts()
+        self.dimension_label.config(
+            text=f"Dimensions: {passed} pass, {failed} fail",
+            fg="red" if failed else "dark green"
+        )
+        
+    def clear_dimensions(self):
+        """Remove every named dimension."""
+        self.canvas.delete("dimension")
+        self.dimensions.clear()
+        self.update_dimension_status()
+        
+    def list_dimensions(self):
+        """Log every named dimension with its current value and result."""
+        if not len(self.dimensions):
+            self.update_status("No named dimensions")
+            return
+        for index in range(len(self.dimensions)):
+            self.add_log(self.dimensions.describe(index, self.unit))
+        passed, failed = self.dimensions.counts()
+        self.update_status(f"{len(self.dimensions)} dimensions: {passed} pass, {failed} fail")
+        
+    def measure_profile(self):
+        """Measure edge-to-edge distance from the intensity profile along the segment."""
+        point1, point2 = self.points
+        positions, values = sample_profile(self.image, point1, point2)
+        edges = find_edges(positions, values, self.edge_method_var.get())
+        self.show_profile_plot(positions, values, edges)
+        
+        if edges is None:
+            messagebox.showwarning("No Edges", "Could not find two edges along the line.")
+            self.reset_points()
+            return
+            
+        pixel_distance = edges[1] - edges[0]
+        if self.calibration_factor is not None:
+            # Map the edges back onto the clicked line for fitted transforms
+            length = self.calculate_distance(point1, point2)
+            edge_points = [
+                (point1[0] + (point2[0] - point1[0]) * edge / length,
+                 point1[1] + (point2[1] - point1[1]) * edge / length)
+                for edge in edges
+            ]
+            real_distance = self.real_distance(edge_points[0], edge_points[1], pixel_distance)
+            label = f"{real_distance:.4f} {self.unit}"
+            result = f"{label} ({pixel_distance:.2f}px)"
+        else:
+            real_distance = None
+            label = f"{pixel_distance:.2f}px"
+            result = f"{label} (uncalibrated)"
+            
+        self.add_log(f"Edge-to-edge ({self.edge_method_var.get()}): {result}")
+        _, revision_record = self.measure_revision(point1, point2, real_distance, profile=True)
+        record = self.store.add_measurement(
+            self.image_id, self.calibration_id, tuple(self.points), pixel_distance, real_distance,
+            self.unit if real_distance is not None else None, kind="profile"
+        )
+        annotation = Annotation("line", tuple(self.points), label, color="purple")
+        self.annotations.append(annotation)
+        records = [record] + ([revision_record] if revision_record else [])
+        self.commands.push(
+            Command("measurement", annotation=annotation, records=records), consumes_points=True
+        )
+        self.update_status(f"Edge-to-edge: {result}")
+        self.reset_points()
+        
+    def measure_revision(self, point1, point2, real_distance, profile=False, label=None):
+        """
+        Measure a segment drawn on the image again on the compare image.
+        
+        The segment is projected through the alignment. Edge profiles are
+        re-run on the revision, so changed dimensions show up as a change.
+        The result is stored against the revision as a "revision"
+        measurement.
+        
+        Returns:
+            tuple: (logged description, store row), or (None, None) outside
+            compare mode or when no edges are found
+        """
+        if self.alignment is None:
+            return None, None
+        (x1, y1), (x2, y2) = self.alignment.to_moving([point1, point2])
+        if profile:
+            positions, values = sample_profile(self.compare_image, (x1, y1), (x2, y2))
+            edges = find_edges(positions, values, self.edge_method_var.get())
+            if edges is None:
+                self.add_log("Revision: could not find two edges along the projected line")
+                return None, None
+            pixels = edges[1] - edges[0]
+            length = math.hypot(x2 - x1, y2 - y1)
+            end1, end2 = (
+                (x1 + (x2 - x1) * edge / length, y1 + (y2 - y1) * edge / length) for edge in edges
+            )
+        else:
+            pixels = math.hypot(x2 - x1, y2 - y1)
+            end1, end2 = (x1, y1), (x2, y2)
+            
+        value = self.revision_distance(end1, end2, pixels)
+        if value is None or real_distance is None:
+            description = f"Revision: {pixels:.2f}px"
+        else:
+            description = (
+                f"Revision: {value:.4f} {self.unit} ({pixels:.2f}px), "
+                f"change {value - real_distance:+.4f} {self.unit}"
+            )
+        self.add_log(description)
+        record = self.store.add_measurement(
+            self.compare_image_id, None, ((x1, y1), (x2, y2)), pixels, value,
+            self.unit if value is not None else None, kind="revision", label=label
+        )
+        return description, record
+        
+    def show_profile_plot(self, positions, values, edges):
+        """Plot an intensity profile and its edges in a small window."""
+        width, height, margin = 400, 180, 10
+        if self.profile_window is None or not self.profile_window.winfo_exists():
+            self.profile_window = tk.Toplevel(self.root)
+            self.profile_window.title("Intensity Profile")
+            self.profile_window.resizable(False, False)
+            self.profile_canvas = tk.Canvas(self.profile_window, width=width, height=height, bg="white")
+            self.profile_canvas.pack()
+        self.profile_canvas.delete("all")
+        
+        length = positions[-1] if positions[-1] > 0 else 1.0
+        low, high = float(values.min()), float(values.max())
+        span = high - low if high > low else 1.0
+        
+        def to_plot(position, value):
+            return (
+                margin + (position / length) * (width - 2 * margin),
+                height - margin - ((value - low) / span) * (height - 2 * margin)
+            )
+            
+        # Thin the polyline to at most one vertex per plot pixel
+        stride = max(1, len(positions) // (width - 2 * margin))
+        coords = []
+        for position, value in zip(positions[::stride], values[::stride]):
+            coords.extend(to_plot(position, value))
+        if len(coords) >= 4:
+            self.profile_canvas.create_line(*coords, fill="#333")
+            
+        if edges is not None:
+            for edge in edges:
+                x = to_plot(edge, low)[0]
+                self.profile_canvas.create_line(x, margin, x, height - margin, fill="red", dash=(3, 2))
+            self.profile_canvas.create_text(
+                width - margin, margin,
+                anchor=tk.NE,
+                text=f"{edges[1] - edges[0]:.2f}px",
+                fill="red"
+            )
+        self.profile_window.lift()
+        
+    def run_background_task(self, description, work, on_done):
+        """
+        Run a long task in a worker thread with progress in the UI.
+        
+        work(progress) runs in the thread and may call progress(fraction);
+        on_done(result) runs in the Tk thread when it finishes.
+        """
+        if self.background_thread is not None and self.background_thread.is_alive():
+            messagebox.showwarning("Busy", "Please wait for the current task to finish.")
+            return
+            
+        results = queue.Queue()
+        
+        def worker():
+            try:
+                result = work(lambda fraction: results.put(("progress", fraction)))
+                results.put(("done", result))
+            except Exception as e:
+                results.put(("error", e))
+                
+        self.progress_var.set(0.0)
+        self.progress_bar.pack(side=tk.RIGHT, padx=(10, 0))
+        self.update_status(f"{description}...")
+        self.background_thread = threading.Thread(target=worker, daemon=True)
+        self.background_thread.start()
+        self.root.after(50, self.poll_background_task, results, description, on_done)
+        
+    def poll_background_task(self, results, description, on_done):
+        """Forward progress and results from the worker thread to the UI."""
+        while True:
+            try:
+                kind, value = results.get_nowait()
+            except queue.Empty:
+                self.root.after(50, self.poll_background_task, results, description, on_done)
+                return
+                
+            if kind == "progress":
+                self.progress_var.set(value)
+                self.update_status(f"{description}... {value:.0%}")
+                continue
+                
+            self.progress_bar.pack_forget()
+            if kind == "error":
+                messagebox.showerror("Error", f"{description} failed: {value}")
+                self.update_status(f"{description} failed")
+            else:
+                on_done(value)
+            return
+            
+    def run_feature_detection(self):
+        """Automatically dimension connected features in a background thread."""
+        if not self.image:
+            messagebox.showwarning("No Image", "Please load an image first.")
+            return
+            
+        self.clear_features()
+        source = self.display_source
+        
+        def on_done(features):
+            # Ignore results for an image that has since been replaced
+            if source is self.display_source:
+                self.show_features(features)
+                
+        self.run_background_task(
+            "Detecting features",
+            lambda progress: list(detect_features(source, progress=progress)),
+            on_done
+        )
+        
+    def export_annotated(self):
+        """Save the image with measurement annotations at full resolution."""
+        if not self.image:
+            messagebox.showwarning("No Image", "Please load an image first.")
+            return
+                
+        file_path = filedialog.asksaveasfilename(
+            title="Export annotated image",
+            defaultextension=".png",
+            filetypes=[("PNG files", "*.png")]
+        )
+        if not file_path:
+            return
+            
+        source = self.display_source
+        annotations = list(self.annotations)
+        filename = file_path.split("/")[-1].split("\\")[-1]
+        
+        def on_done(result):
+            self.add_log(f"Exported annotated image: {filename} ({len(annotations)} annotations)")
+            self.update_status(f"Exported annotated image: {file_path}")
+            
+        self.run_background_task(
+            "Exporting annotated image",
+            lambda progress: export_annotated_image(source, annotations, file_path, progress=progress),
+            on_done
+        )
+                
+    def export_report(self):
+        """Summarize this session's measurements as an HTML or CSV report."""
+        file_path = filedialog.asksaveasfilename(
+            title="Export measurement report",
+            defaultextension=".html",
+            filetypes=[("HTML report", "*.html"), ("CSV summary", "*.csv")]
+        )
+        if not file_path:
+            return
+            
+        # Nominal values and tolerances are optional
+        spec_path = filedialog.askopenfilename(
+            title="Select tolerance specifications (optional, Cancel to skip)",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        try:
+            specifications = read_specifications(spec_path) if spec_path else {}
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Failed to read specifications: {str(e)}")
+            return
+            
+        filename = file_path.split("/")[-1].split("\\")[-1]
+        since = self.session_start
+        
+        def on_done(result):
+            self.add_log(
+                f"Exported report: {filename} ({result['measurements']} measurements on "
+                f"{result['images']} images, {result['failed']} out of tolerance)"
+            )
+            self.update_status(f"Exported report: {file_path}")
+            
+        self.run_background_task(
+            "Writing report",
+            lambda progress: write_report(
+                self.store, file_path, specifications=specifications, progress=progress, since=since
+            ),
+            on_done
+        )
+        
+    def show_features(self, features):
+        """Draw detected features as overlays and log their dimensions."""
+        self.features = features
+        unit = self.unit if self.calibration_factor is not None else "px"
+        
+        for feature in features:
+            self.canvas.create_rectangle(
+                feature.x0 * self.zoom_factor, feature.y0 * self.zoom_factor,
+                (feature.x1 + 1) * self.zoom_factor, (feature.y1 + 1) * self.zoom_factor,
+                outline="#00a000",
+                width=1,
+                tags=("overlay", "feature")
+            )
+            info = feature.to_dict(self.calibration_factor, self.unit)
+            self.annotations.append(Annotation(
+                "box",
+                ((feature.x0, feature.y0), (feature.x1, feature.y1)),
+                f"{info['width']:.2f} x {info['height']:.2f} {unit}",
+                color="#00a000"
+            ))
+            self.add_log(
+                f"Feature {info['label']}: {info['width']:.4f} x {info['height']:.4f} {unit} | "
+                f"Area: {info['area']:.4f} {unit}^2 | Eq. diameter: {info['equivalent_diameter']:.4f} {unit}"
+            )
+            
+        self.add_log(f"Detected {len(features)} features")
+        self.update_status(f"Detected {len(features)} features")
+        
+    def clear_features(self):
+        """Remove detected feature overlays."""
+        self.canvas.delete("feature")
+        self.features = []
+        self.annotations = [a for a in self.annotations if a.kind != "box"]
+        
+    def load_compare_image(self):
+        """Load a second revision and align it onto the current image."""
+        if not self.image:
+            messagebox.showwarning("No Image", "Please load an image first.")
+            return
+            
+        file_path = filedialog.askopenfilename(
+            title="Select the revision to compare",
+            filetypes=[
+                ("All Supported Formats", "*.png *.jpg *.jpeg *.bmp *.gif *.tif *.tiff"),
+                ("All files", "*.*")
+            ]
+        )
+        if not file_path:
+            return
+        try:
+            revision = Image.open(file_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load image: {str(e)}")
+            return
+            
+        source = self.image
+        allow_scale = self.compare_scale_var.get()
+        filename = file_path.split("/")[-1].split("\\")[-1]
+        
+        def work(progress):
+            alignment = align_images(source, revision, allow_scale, progress=progress)
+            return alignment, (reduction_levels(source), reduction_levels(revision))
+            
+        def on_done(result):
+            # Ignore results for an image that has since been replaced
+            if source is not self.image:
+                return
+            self.close_compare()
+            self.alignment, self.compare_levels = result
+            self.compare_image = revision
+            self.compare_resolution = read_resolution(revision)
+            self.compare_image_id = self.store.add_image(file_path, file_hash(file_path), *revision.size)
+            self.memory.track(
+                "compare_levels",
+                sum(image_nbytes(level) for levels in self.compare_levels for level in levels)
+            )
+            self.add_log(f"Comparing with {filename}: {self.alignment.describe()}")
+            if self.alignment.peak < LOW_MATCH_PEAK:
+                messagebox.showwarning(
+                    "Poor Alignment",
+                    "The revision matches the image poorly; the overlay may be misaligned."
+                )
+            self.update_status(f"Comparing with {filename} | Measurements are repeated on the revision")
+            self.schedule_view_refresh()
+            
+        self.run_background_task("Aligning revisions", work, on_done)
+        
+    def revision_distance(self, point1, point2, pixels):
+        """
+        Real length of a segment on the compare image, or None if uncalibrated.
+        
+        The revision's own resolution metadata is used when present. Otherwise
+        the segment is mapped back onto the image through the alignment and
+        measured with the image calibration, so a fitted calibration model
+        applies to the revision too.
+        """
+        resolution = self.compare_resolution
+        if resolution is not None and not resolution.suspect:
+            return pixels * resolution.calibration_factor(self.unit)
+        if self.calibration_factor is None:
+            return None
+        (rx1, ry1), (rx2, ry2) = self.alignment.to_reference([point1, point2])
+        return self.real_distance((float(rx1), float(ry1)), (float(rx2), float(ry2)), pixels * self.alignment.scale)
+        
+    def on_compare_mode_changed(self):
+        """Re-render the overlay as a blend or a difference."""
+        self.clear_compare_tiles()
+        self.schedule_view_refresh()
+        
+    def refresh_compare_overlay(self, view):
+        """Show overlay tiles for the visible part of the image only."""
+        if self.alignment is None:
+            return
+        visible = set(visible_tiles(view, self.image.size, self.zoom_factor))
+        
+        # Drop tiles scrolled out of view; the rendered tiles stay cached
+        for key in list(self.compare_tiles):
+            if key not in visible:
+                self.canvas.delete(self.compare_tiles.pop(key)[0])
+                
+        mode = self.compare_mode_var.get()
+        for column, row in visible - self.compare_tiles.keys():
+            tile = self.tile_cache.get_or_load(
+                (self.zoom_factor, mode, column, row),
+                lambda: render_tile(*self.compare_levels, self.alignment, column, row, self.zoom_factor, mode)
+            )
+            photo = ImageTk.PhotoImage(tile)
+            item = self.canvas.create_image(
+                column * TILE_SIZE, row * TILE_SIZE, anchor=tk.NW, image=photo, tags="compare"
+            )
+            # Above the image, below measurement overlays
+            self.canvas.tag_raise(item, self.canvas_image)
+            self.compare_tiles[(column, row)] = (item, photo)
+        self.memory.track("compare_tiles", sum(photo_nbytes(photo) for _, photo in self.compare_tiles.values()))
+        
+    def clear_compare_tiles(self):
+        """Remove overlay tiles from the canvas, e.g. after zooming."""
+        self.canvas.delete("compare")
+        self.compare_tiles = {}
+        self.memory.track("compare_tiles", 0)
+        
+    def close_compare(self):
+        """Leave compare mode and release the revision."""
+        if self.alignment is None:
+            return
+        self.clear_compare_tiles()
+        self.tile_cache.clear()
+        self.alignment = None
+        self.compare_image = None
+        self.compare_image_id = None
+        self.compare_resolution = None
+        self.compare_levels = None
+        self.memory.track("compare_levels", 0)
+        self.add_log("Comparison closed")
+        
     def show_about(self):
         """Show about dialog."""
         messagebox.showinfo(
@@ -482,7 +1842,7 @@ class ImageDimensioner:
             "How to Use Image Dimensioner:\n\n"
             "1. LOAD IMAGE:\n"
             "   - Use File > Open Image to select an image\n"
-            "   - Supported formats: PNG, JPG, JPEG, BMP, GIF\n\n"
+            "   - Supported formats: PNG, JPG, JPEG, BMP, GIF, TIFF\n\n"
             "2. SELECT UNITS:\n"
             "   - Choose your preferred unit from the dropdown\n"
             "   - Default is mm (millimeters)\n\n"
@@ -490,16 +1850,30 @@ class ImageDimensioner:
             "   - Select Mode > Calibration\n"
             "   - Click two points on a known distance in the image\n"
             "   - Enter the actual physical distance when prompted\n"
-            "   - The calibration factor will be calculated\n\n"
+            "   - The calibration factor will be calculated\n"
+            "   - Scans with resolution (DPI) metadata are calibrated on load;\n"
+            "     the label next to Units shows the calibration source\n\n"
             "4. MEASUREMENT:\n"
             "   - Select Mode > Measurement\n"
             "   - Click two points to measure\n"
             "   - The real-world distance will be displayed\n"
             "   - All measurements are logged at the bottom\n\n"
+            "5. EDGE PROFILE:\n"
+            "   - Select Mode > Edge Profile\n"
+            "   - Click two points on either side of a feature\n"
+            "   - Edges are found in the intensity profile along the line\n"
+            "   - The edge-to-edge distance is logged and the profile plotted\n\n"
+            "6. NAMED DIMENSION:\n"
+            "   - Select Mode > Named Dimension and click two points\n"
+            "   - Enter a name and a tolerance such as 12.5 ± 0.05\n"
+            "   - Green is in tolerance, red out of tolerance, grey unchecked;\n"
+            "     all dimensions are rechecked when the calibration changes\n\n"
             "Navigation:\n"
             "- Ctrl+scroll: Zoom in/out\n"
             "- Scroll: Move up/down\n"
-            "- Shift+scroll: Move left/right\n\n"
+            "- Shift+scroll: Move left/right\n"
+            "- M or View > Magnifier: Toggle the magnifier loupe\n"
+            "- Ctrl+Z / Ctrl+Y: Undo / redo points, calibrations and measurements\n\n"
             "Tips:\n"
             "- Calibrate with a longer reference distance for better accuracy\n"
             "- You can recalibrate at any time\n"
@@ -510,9 +1884,17 @@ class ImageDimensioner:
 
 def main():
     """Main entry point for the application."""
+    parser = argparse.ArgumentParser(description="Measure dimensions on images")
+    parser.add_argument("--record-trace", metavar="PATH", help="Record canvas input to a trace file for input_trace.py")
+    args = parser.parse_args()
+    
     root = tk.Tk()
     app = ImageDimensioner(root)
+    if args.record_trace:
+        from input_trace import TraceRecorder
+        TraceRecorder(app, args.record_trace)
     root.mainloop()
+    app.store.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Image helpers for Image Dimensioner.
+
+Source images can arrive in any mode Pillow understands (palette, 16-bit
+grayscale, CMYK, alpha variants...). Tk can only show a handful of them and
+Pillow resizes 8-bit modes much faster, so every image is converted once into
+a display-ready copy while the original is kept untouched for measurements.
+"""
+
+from PIL import Image
+
+
+# Modes Tk's PhotoImage and Pillow's fast resize paths handle natively
+DISPLAY_MODES = ("L", "RGB", "RGBA")
+
+# High bit-depth single channel modes that need rescaling to 8 bits
+HIGH_BIT_DEPTH_MODES = ("I", "I;16", "I;16L", "I;16B", "I;16N", "F")
+
+# Resampling filter used when shrinking for display. With a reducing gap the
+# image is first reduced by an integer factor (cheap box average) before the
+# final LANCZOS pass, which is far faster on large downscales.
+DOWNSCALE_FILTER = Image.Resampling.LANCZOS
+DOWNSCALE_REDUCING_GAP = 3.0
+
+# Filter used when enlarging. Upscaling never benefits from reduce().
+UPSCALE_FILTER = Image.Resampling.LANCZOS
+
+
+def has_transparency(image):
+    """
+    Check whether an image carries any kind of transparency information.
+    
+    Args:
+        image (PIL.Image.Image): Source image
+    
+    Returns:
+        bool: True if the image has an alpha channel or a transparent colour
+    """
+    return "A" in image.getbands() or "transparency" in image.info
+
+
+def rescale_to_8bit(image):
+    """
+    Stretch a 16-bit, 32-bit or float grayscale image into mode "L".
+    
+    Pillow's plain convert("L") clips values above 255, which turns most
+    16-bit scans white. The actual value range is mapped onto 0-255 instead,
+    so 12-bit data stored in 16-bit containers is displayed correctly too.
+    
+    Args:
+        image (PIL.Image.Image): Image in one of HIGH_BIT_DEPTH_MODES
+    
+    Returns:
+        PIL.Image.Image: 8-bit grayscale image
+    """
+    if image.mode != "F":
+        # point() only supports integer maths on mode "I"
+        image = image.convert("I")
+    
+    low, high = image.getextrema()
+    if high <= low:
+        return Image.new("L", image.size, 0 if high <= 0 else 255)
+    
+    scale = 255.0 / (high - low)
+    offset = -low * scale
+    return image.point(lambda value: value * scale + offset).convert("L")
+
+
+def to_display_mode(image):
+    """
+    Convert an image into the cheapest mode that displays it faithfully.
+    
+    The result is always one of DISPLAY_MODES. Images already in such a mode
+    are returned as-is (no copy), so callers must not modify the result.
+    
+    Args:
+        image (PIL.Image.Image): Source image in any mode
+    
+    Returns:
+        PIL.Image.Image: Image in mode "L", "RGB" or "RGBA"
+    """
+    mode = image.mode
+    
+    if mode in DISPLAY_MODES:
+        return image
+    if mode in HIGH_BIT_DEPTH_MODES:
+        return rescale_to_8bit(image)
+    if mode == "1":
+        return image.convert("L")
+    if mode in ("LA", "La", "PA", "RGBa"):
+        return image.convert("RGBA")
+    if mode == "P":
+        return image.convert("RGBA" if has_transparency(image) else "RGB")
+    if mode == "CMYK":
+        # Pillow already undoes the Adobe inverted CMYK on JPEG decode
+        return image.convert("RGB")
+    
+    # RGBX, YCbCr, LAB, HSV and anything else Pillow can turn into RGB
+    return image.convert("RGBA" if has_transparency(image) else "RGB")
+
+
+def resize_for_display(image, size):
+    """
+    Resize a display-mode image using the fastest filter path for the scale.
+    
+    Args:
+        image (PIL.Image.Image): Image returned by to_display_mode()
+        size (tuple): Target (width, height) in pixels
+    
+    Returns:
+        PIL.Image.Image: Resized image (the input itself if size is unchanged)
+    """
+    width, height = max(1, int(size[0])), max(1, int(size[1]))
+    if (width, height) == image.size:
+        return image
+    
+    if width < image.width and height < image.height:
+        return image.resize(
+            (width, height),
+            DOWNSCALE_FILTER,
+            reducing_gap=DOWNSCALE_REDUCING_GAP
+        )
+    return image.resize((width, height), UPSCALE_FILTER)
+
+
+def magnify_region(image, center, source_size, magnification):
+    """
+    Crop a small square around a point and enlarge it with nearest-neighbour.
+    
+    Only source_size x source_size pixels are read, so the cost does not
+    depend on the size of the image. Areas outside the image come out black.
+    
+    Args:
+        image (PIL.Image.Image): Display-mode image at original resolution
+        center (tuple): Point (x, y) in original image coordinates
+        source_size (int): Odd number of source pixels along each side
+        magnification (int): Integer enlargement factor
+    
+    Returns:
+        PIL.Image.Image: Image of source_size * magnification pixels square,
+        with the pixel under center in the middle
+    """
+    half = source_size // 2
+    cx, cy = int(center[0]), int(center[1])
+    box = (cx - half, cy - half, cx - half + source_size, cy - half + source_size)
+    out_size = source_size * magnification
+    return image.crop(box).resize((out_size, out_size), Image.Resampling.NEAREST)
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Record and replay input traces to measure interactive latency.
+
+A trace is a JSON-lines file of the wheel, click, key and motion events an
+operator produced on the image canvas, with timestamps and the answers
+given to dialogs. Replaying a trace drives a fresh ImageDimensioner with
+the same events on a synthetic image of any size, timing each event
+handler (on_zoom, on_canvas_click, ...) and each frame (handler plus the
+redraw Tk performs afterwards). Reports are JSON, so two builds can be
+compared objectively.
+
+Usage:
+    python image_dimensioner.py --record-trace session.jsonl
+    python input_trace.py synth session.jsonl --events 400
+    python input_trace.py replay session.jsonl --size 12000x9000 --xvfb --json report.json
+    python input_trace.py replay session.jsonl --baseline report.json
+"""
+
+import argparse
+import functools
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+# Event handlers whose latency is reported
+INSTRUMENTED_HANDLERS = (
+    "on_zoom",
+    "on_canvas_click",
+    "on_vertical_scroll",
+    "on_horizontal_scroll",
+    "on_mouse_motion",
+    "toggle_magnifier",
+    "display_image",
+)
+
+# Modifier bits in Tk's event state
+SHIFT_MASK = 0x1
+CONTROL_MASK = 0x4
+
+# Default synthetic image size for replays
+DEFAULT_IMAGE_SIZE = (8000, 6000)
+
+# Answer given to calibration dialogs when a trace recorded none
+DEFAULT_DIALOG_VALUE = 10.0
+
+
+def percentile(values, pct):
+    """
+    Return the nearest-rank percentile of a list of numbers.
+    
+    Args:
+        values (list): Samples (need not be sorted)
+        pct (float): Percentile between 0 and 100
+    
+    Returns:
+        float: The percentile, or None for an empty list
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples):
+    """Summarize latency samples (seconds) as milliseconds."""
+    return {
+        "count": len(samples),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p90_ms": percentile(samples, 90) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000,
+        "mean_ms": sum(samples) / len(samples) * 1000,
+    }
+
+
+def read_trace(path):
+    """Read a trace file into a list of event dictionaries."""
+    with open(path, "r", encoding="utf-8") as trace_file:
+        return [json.loads(line) for line in trace_file if line.strip()]
+
+
+def write_trace(path, events):
+    """Write a list of event dictionaries as a trace file."""
+    with open(path, "w", encoding="utf-8") as trace_file:
+        for event in events:
+            trace_file.write(json.dumps(event) + "\n")
+
+
+def synthesize_trace(count=400, width=900, height=550, seed=0):
+    """
+    Generate a deterministic trace of typical operator input.
+    
+    The mix is mostly zooming and scrolling with mouse motion in between
+    and a click pair every so often.
+    
+    Returns:
+        list: Event dictionaries
+    """
+    rng = random.Random(seed)
+    events = [{"t": 0.0, "type": "meta", "canvas": [width, height]}]
+    t = 0.0
+    for _ in range(count):
+        t += rng.uniform(0.01, 0.05)
+        x, y = rng.randrange(width), rng.randrange(height)
+        kind = rng.random()
+        if kind < 0.35:
+            events.append({
+                "t": t, "type": "wheel", "x": x, "y": y,
+                "delta": rng.choice((120, -120)), "state": CONTROL_MASK
+            })
+        elif kind < 0.55:
+            events.append({
+                "t": t, "type": "wheel", "x": x, "y": y,
+                "delta": rng.choice((120, -120)), "state": rng.choice((0, SHIFT_MASK))
+            })
+        elif kind < 0.9:
+            events.append({"t": t, "type": "motion", "x": x, "y": y, "state": 0})
+        else:
+            events.append({"t": t, "type": "button", "x": x, "y": y, "button": 1, "state": 0})
+    return events
+
+
+class HandlerTimer:
+    """Collect call durations of instrumented handler methods."""
+    
+    def __init__(self):
+        """Initialize empty timing records."""
+        self.samples = {}
+    
+    def wrap(self, name, method):
+        """Return a wrapper around method that records its duration."""
+        samples = self.samples.setdefault(name, [])
+        
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+        
+        return timed
+    
+    def instrument(self, cls, names=INSTRUMENTED_HANDLERS):
+        """
+        Wrap handler methods on a class before it is instantiated.
+        
+        Tk bindings capture bound methods when the app is built, so the
+        class must be patched first. Returns a function that undoes it.
+        """
+        originals = {name: cls.__dict__[name] for name in names if name in cls.__dict__}
+        for name, method in originals.items():
+            setattr(cls, name, self.wrap(name, method))
+        
+        def restore():
+            for name, method in originals.items():
+                setattr(cls, name, method)
+        
+        return restore
+
+
+class TraceRecorder:
+    """Append canvas input events of a running app to a trace file."""
+    
+    def __init__(self, app, path):
+        """Start recording events on the app's canvas into path."""
+        self.app = app
+        self.trace_file = open(path, "w", encoding="utf-8")
+        self.start = time.perf_counter()
+        app.root.update_idletasks()
+        self.write({
+            "type": "meta",
+            "canvas": [app.canvas.winfo_width(), app.canvas.winfo_height()],
+        })
+        
+        for sequence, kind in (
+            ("<MouseWheel>", "wheel"),
+            ("<ButtonPress>", "button"),
+            ("<KeyPress>", "key"),
+            ("<Motion>", "motion"),
+        ):
+            app.root.bind_all(sequence, functools.partial(self.record, kind), add="+")
+        
+        # Remember dialog answers so replays can give the same ones
+        self.original_askfloat = app_dialogs().askfloat
+        app_dialogs().askfloat = self.recording_askfloat
+        app.root.bind("<Destroy>", self.on_destroy, add="+")
+    
+    def write(self, event):
+        """Write one event with its timestamp."""
+        event["t"] = round(time.perf_counter() - self.start, 6)
+        self.trace_file.write(json.dumps(event) + "\n")
+        self.trace_file.flush()
+    
+    def record(self, kind, event):
+        """Record a Tk event that happened on the canvas."""
+        if event.widget is not self.app.canvas and kind != "key":
+            return
+        record = {"type": kind, "x": event.x, "y": event.y, "state": event.state}
+        if kind == "wheel":
+            record["delta"] = event.delta
+        elif kind == "button":
+            record["button"] = event.num
+        elif kind == "key":
+            record["keysym"] = event.keysym
+        self.write(record)
+    
+    def recording_askfloat(self, *args, **kwargs):
+        """Ask as usual and record the answer."""
+        value = self.original_askfloat(*args, **kwargs)
+        self.write({"type": "dialog", "value": value})
+        return value
+    
+    def on_destroy(self, event):
+        """Close the trace file when the main window goes away."""
+        if event.widget is self.app.root and not self.trace_file.closed:
+            app_dialogs().askfloat = self.original_askfloat
+            self.trace_file.close()
+
+
+def app_dialogs():
+    """Return the simpledialog module used by the app."""
+    from tkinter import simpledialog
+    return simpledialog
+
+
+def create_synthetic_image(path, size, seed=0):
+    """
+    Write a deterministic drawing-like test image.
+    
+    Grid lines, circles and rectangles give the resize and PhotoImage paths
+    realistic content without shipping large fixtures.
+    """
+    from PIL import Image, ImageDraw
+    
+    rng = random.Random(seed)
+    width, height = size
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for x in range(0, width, 200):
+        draw.line([(x, 0), (x, height)], fill=(200, 200, 255), width=1)
+    for y in range(0, height, 200):
+        draw.line([(0, y), (width, y)], fill=(200, 200, 255), width=1)
+    for _ in range(max(50, width * height // 200000)):
+        x, y = rng.randrange(width), rng.randrange(height)
+        radius = rng.randrange(10, 150)
+        if rng.random() < 0.5:
+            draw.ellipse([x - radius, y - radius, x + radius, y + radius], outline="black", width=3)
+        else:
+            draw.rectangle([x, y, x + radius * 2, y + radius], outline="black", width=3)
+    image.save(path)
+
+
+def start_xvfb(display=":99", screen="1600x1200x24"):
+    """Start a virtual X server and point DISPLAY at it."""
+    if shutil.which("Xvfb") is None:
+        raise RuntimeError("Xvfb is not installed")
+    process = subprocess.Popen(
+        ["Xvfb", display, "-screen", "0", screen, "-nolisten", "tcp"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    os.environ["DISPLAY"] = display
+    time.sleep(0.5)
+    if process.poll() is not None:
+        raise RuntimeError("Xvfb failed to start")
+    return process
+
+
+def replay(events, image_size=DEFAULT_IMAGE_SIZE, realtime=False):
+    """
+    Replay a trace against a fresh ImageDimensioner and time it.
+    
+    Args:
+        events (list): Trace events
+        image_size (tuple): Size of the synthetic image to load
+        realtime (bool): Keep the recorded gaps between events
+    
+    Returns:
+        dict: Report with handler latency and frame time percentiles
+    """
+    import tkinter as tk
+    from tkinter import filedialog, messagebox
+    import image_dimensioner
+    
+    timer = HandlerTimer()
+    restore = timer.instrument(image_dimensioner.ImageDimensioner)
+    
+    dialog_answers = [event["value"] for event in events if event["type"] == "dialog"]
+    saved = {
+        (filedialog, "askopenfilename"): filedialog.askopenfilename,
+        (app_dialogs(), "askfloat"): app_dialogs().askfloat,
+        (messagebox, "showinfo"): messagebox.showinfo,
+        (messagebox, "showwarning"): messagebox.showwarning,
+        (messagebox, "showerror"): messagebox.showerror,
+    }
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        image_path = os.path.join(temp_dir, "synthetic.png")
+        create_synthetic_image(image_path, image_size)
+        
+        # Dialogs would block a replay; answer them from the trace instead
+        filedialog.askopenfilename = lambda **kwargs: image_path
+        app_dialogs().askfloat = lambda *args, **kwargs: (
+            dialog_answers.pop(0) if dialog_answers else DEFAULT_DIALOG_VALUE
+        )
+        messagebox.showinfo = messagebox.showwarning = messagebox.showerror = lambda *args, **kwargs: "ok"
+        
+        root = tk.Tk()
+        try:
+            meta = next((event for event in events if event["type"] == "meta"), None)
+            # Keep replays out of the user's measurement history
+            app = image_dimensioner.ImageDimensioner(root, store_path=":memory:")
+            if meta is not None:
+                width, height = meta["canvas"]
+                app.canvas.config(width=width, height=height)
+            root.update()
+            
+            load_start = time.perf_counter()
+            app.load_image()
+            root.update()
+            load_time = time.perf_counter() - load_start
+            
+            frame_times = {}
+            replay_start = time.perf_counter()
+            for event in events:
+                if event["type"] in ("meta", "dialog"):
+                    continue
+                if realtime:
+                    delay = event["t"] - (time.perf_counter() - replay_start)
+                    if delay > 0:
+                        time.sleep(delay)
+                
+                frame_start = time.perf_counter()
+                generate_event(app, event)
+                root.update_idletasks()
+                frame_times.setdefault(event_name(event), []).append(time.perf_counter() - frame_start)
+                # Let any timers (memory readout, loupe) run between events
+                root.update()
+        finally:
+            root.destroy()
+            restore()
+            for (module, name), function in saved.items():
+                setattr(module, name, function)
+    
+    all_frames = [sample for samples in frame_times.values() for sample in samples]
+    return {
+        "image_size": list(image_size),
+        "events": len(all_frames),
+        "load_ms": load_time * 1000,
+        "handlers": {name: summarize(samples) for name, samples in timer.samples.items() if samples},
+        "frames": {name: summarize(samples) for name, samples in frame_times.items()},
+        "frame_total": summarize(all_frames) if all_frames else None,
+    }
+
+
+def event_name(event):
+    """Name an event by type and modifiers, e.g. 'ctrl-wheel'."""
+    name = event["type"]
+    state = event.get("state", 0)
+    if name == "wheel":
+        if state & CONTROL_MASK:
+            return "ctrl-wheel"
+        if state & SHIFT_MASK:
+            return "shift-wheel"
+    return name
+
+
+def generate_event(app, event):
+    """Feed one trace event to the app through Tk's event machinery."""
+    canvas = app.canvas
+    kind = event["type"]
+    state = event.get("state", 0)
+    if kind == "wheel":
+        canvas.event_generate(
+            "<MouseWheel>", x=event["x"], y=event["y"], delta=event["delta"], state=state
+        )
+    elif kind == "button":
+        button = event.get("button", 1)
+        canvas.event_generate(f"<ButtonPress-{button}>", x=event["x"], y=event["y"], state=state)
+        canvas.event_generate(f"<ButtonRelease-{button}>", x=event["x"], y=event["y"], state=state)
+    elif kind == "motion":
+        canvas.event_generate("<Motion>", x=event["x"], y=event["y"], state=state)
+    elif kind == "key":
+        app.root.focus_force()
+        app.root.event_generate("<KeyPress>", keysym=event["keysym"], state=state)
+
+
+def compare_reports(current, baseline):
+    """Return lines comparing p50/p99 handler latency with a baseline."""
+    lines = []
+    for section in ("handlers", "frames"):
+        for name, stats in sorted(current[section].items()):
+            old = baseline.get(section, {}).get(name)
+            if old is None:
+                continue
+            for key in ("p50_ms", "p99_ms"):
+                change = (stats[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+                lines.append(
+                    f"{section[:-1]:<8} {name:<22} {key:<7} "
+                    f"{old[key]:>9.2f} -> {stats[key]:>9.2f} ms ({change:+.1f}%)"
+                )
+    return lines
+
+
+def print_report(report):
+    """Print a latency report as a table."""
+    print(f"Image {report['image_size'][0]}x{report['image_size'][1]}, "
+          f"{report['events']} events, load {report['load_ms']:.1f} ms")
+    header = f"{'':<8} {'name':<22} {'count':>6} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}  (ms)"
+    print(header)
+    for section in ("handlers", "frames"):
+        for name, stats in sorted(report[section].items()):
+            print(
+                f"{section[:-1]:<8} {name:<22} {stats['count']:>6} {stats['p50_ms']:>9.2f} "
+                f"{stats['p90_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['max_ms']:>9.2f}"
+            )
+
+
+def parse_size(text):
+    """Parse 'WIDTHxHEIGHT'."""
+    width, _, height = text.lower().partition("x")
+    return int(width), int(height)
+
+
+def main():
+    """Command-line entry point for synthesizing and replaying traces."""
+    parser = argparse.ArgumentParser(description="Replay input traces and report interactive latency")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    synth = commands.add_parser("synth", help="Write a deterministic synthetic trace")
+    synth.add_argument("trace", help="Output trace file")
+    synth.add_argument("--events", type=int, default=400, help="Number of events")
+    synth.add_argument("--seed", type=int, default=0, help="Random seed")
+    
+    run = commands.add_parser("replay", help="Replay a trace and report latency")
+    run.add_argument("trace", help="Trace file recorded with --record-trace or synth")
+    run.add_argument("--size", type=parse_size, default=DEFAULT_IMAGE_SIZE, help="Synthetic image size, e.g. 12000x9000")
+    run.add_argument("--realtime", action="store_true", help="Keep the recorded timing between events")
+    run.add_argument("--xvfb", action="store_true", help="Run under a virtual X display")
+    run.add_argument("--json", help="Write the report to this file")
+    run.add_argument("--baseline", help="Compare against a previous JSON report")
+    args = parser.parse_args()
+    
+    if args.command == "synth":
+        write_trace(args.trace, synthesize_trace(args.events, seed=args.seed))
+        print(f"Wrote {args.events} events to {args.trace}")
+        return 0
+    
+    xvfb = start_xvfb() if args.xvfb else None
+    try:
+        report = replay(read_trace(args.trace), args.size, args.realtime)
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+    
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        print()
+        print("\n".join(compare_reports(report, baseline)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
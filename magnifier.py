@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Magnifier loupe for precise point placement in Image Dimensioner.
+
+The loupe follows the mouse and shows the pixels under the cursor enlarged
+8-32x. Each update crops only a few hundred source pixels and pastes them
+into an existing PhotoImage, so it keeps up with mouse motion regardless of
+image size or zoom level.
+"""
+
+import tkinter as tk
+from PIL import ImageTk
+
+from imaging import magnify_region
+
+
+class Magnifier:
+    """Cursor-following loupe drawn as items on the main canvas."""
+    
+    # Available magnification factors
+    MAGNIFICATIONS = (8, 16, 32)
+    
+    # Approximate on-screen size of the loupe in pixels
+    TARGET_SIZE = 160
+    
+    # Distance between the cursor and the loupe's nearest corner
+    OFFSET = 24
+    
+    def __init__(self, canvas, magnification=16):
+        """Initialize the magnifier for a canvas."""
+        self.canvas = canvas
+        self.enabled = False
+        self.magnification = magnification
+        self.source_size = self.compute_source_size(magnification)
+        
+        self.photo = None
+        self.image_item = None
+        self.frame_item = None
+        self.cursor_item = None
+    
+    @classmethod
+    def compute_source_size(cls, magnification):
+        """Number of source pixels shown along each side (always odd)."""
+        return max(3, (cls.TARGET_SIZE // magnification) | 1)
+    
+    @property
+    def display_size(self):
+        """Side length of the loupe on screen in pixels."""
+        return self.source_size * self.magnification
+    
+    def set_magnification(self, magnification):
+        """Change the enlargement factor, rebuilding the loupe if needed."""
+        self.magnification = magnification
+        self.source_size = self.compute_source_size(magnification)
+        # The PhotoImage has a fixed size, so it must be recreated
+        self.hide()
+        self.photo = None
+    
+    def set_enabled(self, enabled):
+        """Turn the loupe on or off."""
+        self.enabled = enabled
+        if not enabled:
+            self.hide()
+    
+    def items(self):
+        """Return the canvas items currently making up the loupe."""
+        return [
+            item for item in (self.image_item, self.frame_item, self.cursor_item)
+            if item is not None
+        ]
+    
+    def hide(self):
+        """Remove the loupe items from the canvas."""
+        for item in self.items():
+            self.canvas.delete(item)
+        self.image_item = None
+        self.frame_item = None
+        self.cursor_item = None
+    
+    def create_items(self):
+        """Create the canvas items for the loupe."""
+        size = self.display_size
+        if self.photo is None:
+            self.photo = ImageTk.PhotoImage("RGB", (size, size), width=size, height=size)
+        
+        self.image_item = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
+        self.frame_item = self.canvas.create_rectangle(
+            0, 0, size, size,
+            outline="black",
+            width=2
+        )
+        self.cursor_item = self.canvas.create_rectangle(0, 0, 0, 0, outline="red", width=1)
+    
+    def update(self, source_image, canvas_x, canvas_y, zoom_factor):
+        """
+        Move the loupe next to the cursor and refresh its contents.
+        
+        Args:
+            source_image (PIL.Image.Image): Display-mode image at original size
+            canvas_x (float): Cursor x in canvas coordinates
+            canvas_y (float): Cursor y in canvas coordinates
+            zoom_factor (float): Current zoom of the main view
+        """
+        if not self.enabled or source_image is None:
+            return
+        
+        # An item may have been deleted by a canvas rebuild
+        if self.image_item is None or not self.canvas.type(self.image_item):
+            self.hide()
+            self.create_items()
+        
+        # Refresh contents in place: no new PhotoImage, no new canvas item
+        region = magnify_region(
+            source_image,
+            (canvas_x / zoom_factor, canvas_y / zoom_factor),
+            self.source_size,
+            self.magnification
+        )
+        self.photo.paste(region)
+        
+        # Place the loupe below-right of the cursor, flipping near view edges
+        size = self.display_size
+        view_right = self.canvas.canvasx(self.canvas.winfo_width())
+        view_bottom = self.canvas.canvasy(self.canvas.winfo_height())
+        x = canvas_x + self.OFFSET
+        y = canvas_y + self.OFFSET
+        if x + size > view_right:
+            x = canvas_x - self.OFFSET - size
+        if y + size > view_bottom:
+            y = canvas_y - self.OFFSET - size
+        
+        self.canvas.coords(self.image_item, x, y)
+        self.canvas.coords(self.frame_item, x, y, x + size, y + size)
+        
+        # Outline the pixel under the cursor
+        center = (self.source_size // 2) * self.magnification
+        self.canvas.coords(
+            self.cursor_item,
+            x + center, y + center,
+            x + center + self.magnification, y + center + self.magnification
+        )
+        
+        for item in self.items():
+            self.canvas.tag_raise(item)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Measurement logic shared by the Image Dimensioner GUI and headless tools.
+
+Nothing in this module depends on Tkinter, so it can be used by the
+measurement service, batch scripts and tests.
+"""
+
+import math
+
+
+# Units offered for calibration and measurement
+AVAILABLE_UNITS = ["mm", "cm", "m", "inches", "feet"]
+
+# Length of one inch in each unit, for resolution (DPI) based calibration
+UNITS_PER_INCH = {"mm": 25.4, "cm": 2.54, "m": 0.0254, "inches": 1.0, "feet": 1.0 / 12.0}
+
+# Calibration points closer than this (in pixels) are rejected
+MIN_CALIBRATION_PIXELS = 1.0
+
+
+def calculate_distance(point1, point2):
+    """
+    Calculate the Euclidean distance between two points in pixels.
+    
+    Args:
+        point1 (tuple): First point as (x, y)
+        point2 (tuple): Second point as (x, y)
+    
+    Returns:
+        float: Distance in pixels
+    """
+    dx = point2[0] - point1[0]
+    dy = point2[1] - point1[1]
+    return math.sqrt(dx * dx + dy * dy)
+
+
+def calculate_calibration_factor(pixel_distance, known_distance):
+    """
+    Calculate the calibration factor (units per pixel).
+    
+    Args:
+        pixel_distance (float): Distance in pixels
+        known_distance (float): Known real-world distance in any unit
+    
+    Returns:
+        float: Calibration factor (units per pixel)
+    
+    Raises:
+        ValueError: If the points are too close or the distance is not positive
+    """
+    if pixel_distance < MIN_CALIBRATION_PIXELS:
+        raise ValueError("Points are too close together.")
+    if known_distance is None or known_distance <= 0:
+        raise ValueError("Invalid distance entered.")
+    return known_distance / pixel_distance
+
+
+def calculate_real_distance(pixel_distance, calibration_factor):
+    """
+    Convert pixel distance to real-world distance using calibration factor.
+    
+    Args:
+        pixel_distance (float): Distance in pixels
+        calibration_factor (float): Calibration factor (units per pixel)
+    
+    Returns:
+        float: Real-world distance in calibrated units
+    """
+    return pixel_distance * calibration_factor
+
+
+def measure_segments(segments, calibration_factor):
+    """
+    Measure a batch of segments with one calibration.
+    
+    Args:
+        segments (list): Sequence of (point1, point2) pairs
+        calibration_factor (float): Calibration factor (units per pixel)
+    
+    Returns:
+        list: (pixel_distance, real_distance) tuple for each segment
+    """
+    results = []
+    for point1, point2 in segments:
+        pixel_distance = calculate_distance(point1, point2)
+        results.append((pixel_distance, calculate_real_distance(pixel_distance, calibration_factor)))
+    return results
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Measurement reports generated from the measurement store.
+
+Rows are streamed from the database grouped by image. Each image's
+statistics are written as soon as its last row has been read and then
+discarded, so a report over any number of measurements only keeps running
+sums per dimension: count, extremes, mean and standard deviation (Welford's
+method) plus pass/fail counts against a nominal value and tolerance. Both
+HTML (with an embedded thumbnail of every image) and CSV are written
+incrementally to the output file.
+
+Usage:
+    python measurement_report.py job.html --since 2026-10-01 --specs specs.csv
+    python measurement_report.py job.csv --image drawing.png --unit mm
+
+The specification file is a CSV with the columns label, nominal and
+tolerance, and optionally unit. Named dimensions measured with a nominal
+and tolerance in the GUI are checked, row by row, against their own stored
+values when the file does not list them.
+"""
+
+import argparse
+import base64
+import csv
+import html
+import io
+import math
+import os
+import sys
+from datetime import datetime
+
+from PIL import Image
+
+from imaging import to_display_mode
+from measurement_store import DEFAULT_PATH, MeasurementStore, file_hash, format_timestamp
+
+
+REPORT_FORMATS = ("html", "csv")
+
+# Longest side of the thumbnails embedded in HTML reports
+THUMBNAIL_SIZE = (160, 160)
+
+# Rows between progress callbacks
+PROGRESS_INTERVAL = 1000
+
+CSV_COLUMNS = (
+    "scope", "image", "label", "unit", "count", "min", "max", "mean", "stddev",
+    "nominal", "tolerance", "passed", "failed", "result"
+)
+
+
+class Specification:
+    """Nominal value and symmetric tolerance of a named dimension."""
+    
+    __slots__ = ("nominal", "tolerance", "unit")
+    
+    def __init__(self, nominal, tolerance, unit=None):
+        """
+        Initialize a specification.
+        
+        Args:
+            nominal (float): Nominal value
+            tolerance (float): Allowed deviation either side of nominal
+            unit (str): Unit of nominal and tolerance, or None to apply to
+                measurements in any unit
+        """
+        self.nominal = nominal
+        self.tolerance = tolerance
+        self.unit = unit
+    
+    def applies_to(self, unit):
+        """Check whether measurements in a unit can be checked against this specification."""
+        return self.unit is None or self.unit == unit
+    
+    def passes(self, value):
+        """Check whether a value lies within nominal ± tolerance."""
+        # Allow for float noise on values exactly at a limit
+        return abs(value - self.nominal) <= self.tolerance * (1 + 1e-9)
+
+
+class RunningStats:
+    """Statistics of a stream of values, updated one value at a time."""
+    
+    __slots__ = ("count", "minimum", "maximum", "mean", "_squares", "passed", "failed")
+    
+    def __init__(self):
+        """Initialize empty statistics."""
+        self.count = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.mean = 0.0
+        self._squares = 0.0
+        self.passed = 0
+        self.failed = 0
+    
+    def add(self, value, passed=None):
+        """
+        Add one value.
+        
+        Args:
+            value (float): Measured value
+            passed (bool): Result of the tolerance check, or None if the
+                dimension has no specification
+        """
+        self.count += 1
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        # Welford's update stays accurate where sum of squares would cancel
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._squares += delta * (value - self.mean)
+        if passed is True:
+            self.passed += 1
+        elif passed is False:
+            self.failed += 1
+    
+    @property
+    def stddev(self):
+        """Sample standard deviation (0 for fewer than two values)."""
+        return math.sqrt(self._squares / (self.count - 1)) if self.count > 1 else 0.0
+    
+    @property
+    def result(self):
+        """'pass', 'fail' or '' if nothing was checked."""
+        if self.failed:
+            return "fail"
+        return "pass" if self.passed else ""
+
+
+def read_specifications(path):
+    """
+    Read dimension specifications from a CSV file.
+    
+    Args:
+        path (str): CSV file with columns label, nominal, tolerance and
+            optionally unit
+    
+    Returns:
+        dict: Label -> Specification
+    
+    Raises:
+        ValueError: If a row is missing a column or has a bad number
+    """
+    specifications = {}
+    with open(path, newline="", encoding="utf-8") as spec_file:
+        for line, row in enumerate(csv.DictReader(spec_file), start=2):
+            try:
+                specifications[row["label"].strip()] = Specification(
+                    float(row["nominal"]), abs(float(row["tolerance"])), (row.get("unit") or "").strip() or None
+                )
+            except (KeyError, TypeError, ValueError, AttributeError):
+                raise ValueError(f"{path}, line {line}: expected label, nominal and tolerance")
+    return specifications
+
+
+def measurement_value(row):
+    """
+    Extract what a report groups and checks from a measurement row.
+    
+    Unlabelled measurements are grouped by kind; uncalibrated ones by pixels.
+    
+    Returns:
+        tuple: (label, unit, value)
+    """
+    label = row["label"] or row["kind"]
+    if row["real_distance"] is None:
+        return label, "px", row["pixel_distance"]
+    return label, row["unit"], row["real_distance"]
+
+
+def image_summaries(rows, specifications, job, progress=None):
+    """
+    Group measurement rows into per-image statistics.
+    
+    Args:
+        rows: Measurement rows ordered by image (iter_measurements with
+            by_image=True)
+        specifications (dict): Label -> Specification; rows with a label
+            it does not list are checked against their own stored nominal
+        job (dict): Group key -> RunningStats over all images, updated in
+            place
+        progress (callable): Optional callback receiving the rows read
+    
+    Yields:
+        tuple: (row of the image's first measurement, dict of
+        (label, unit, nominal, tolerance) -> RunningStats) once per image;
+        nominal and tolerance are None for unchecked groups
+    """
+    current, groups = None, None
+    for index, row in enumerate(rows, start=1):
+        if groups is None or row["image_id"] != current["image_id"]:
+            if groups is not None:
+                yield current, groups
+            current, groups = row, {}
+        label, unit, value = measurement_value(row)
+        specification = specifications.get(label)
+        if specification is None and row["nominal"] is not None:
+            # Stored nominals can differ between images of the same label
+            specification = Specification(row["nominal"], abs(row["tolerance"] or 0.0), row["unit"])
+        if specification is not None and specification.applies_to(unit):
+            passed = specification.passes(value)
+            key = (label, unit, specification.nominal, specification.tolerance)
+        else:
+            passed = None
+            key = (label, unit, None, None)
+        if key not in groups:
+            groups[key] = RunningStats()
+        groups[key].add(value, passed)
+        if key not in job:
+            job[key] = RunningStats()
+        job[key].add(value, passed)
+        if progress and index % PROGRESS_INTERVAL == 0:
+            progress(index)
+    if groups is not None:
+        yield current, groups
+
+
+def thumbnail_data_uri(path, size=THUMBNAIL_SIZE):
+    """
+    Make a small PNG of an image as a data URI for embedding in HTML.
+    
+    Returns:
+        str: data:image/png URI, or None if the image cannot be read
+    """
+    try:
+        with Image.open(path) as image:
+            # JPEG decodes directly at a reduced scale
+            image.draft("RGB", size)
+            image.thumbnail(size)
+            thumbnail = to_display_mode(image)
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, "PNG", optimize=True)
+    except (OSError, ValueError, SyntaxError):
+        return None
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def format_number(value):
+    """Format a statistic for a report cell."""
+    return f"{value:.4f}"
+
+
+def sorted_groups(groups):
+    """Order groups by label, unit and nominal, unchecked groups first."""
+    def order(item):
+        label, unit, nominal, tolerance = item[0]
+        return label, unit or "", nominal is not None, nominal or 0.0, tolerance or 0.0
+    return sorted(groups.items(), key=order)
+
+
+class CsvReportWriter:
+    """Write summaries as CSV rows: one per dimension per image, then the job."""
+    
+    def __init__(self, stream, description):
+        """Write the header row (the description is only used by HTML)."""
+        self.writer = csv.writer(stream)
+        self.writer.writerow(CSV_COLUMNS)
+    
+    def write_rows(self, scope, image, groups):
+        """Write one row per dimension and nominal."""
+        for (label, unit, nominal, tolerance), stats in sorted_groups(groups):
+            self.writer.writerow([
+                scope, image, label, unit, stats.count,
+                format_number(stats.minimum), format_number(stats.maximum),
+                format_number(stats.mean), format_number(stats.stddev),
+                "" if nominal is None else nominal,
+                "" if tolerance is None else tolerance,
+                stats.passed, stats.failed, stats.result
+            ])
+    
+    def write_image(self, row, groups, thumbnail=None):
+        """Write the summary of one image."""
+        self.write_rows("image", row["path"] or "", groups)
+    
+    def write_job(self, groups, images):
+        """Write the summary over all images."""
+        self.write_rows("job", f"{images} images", groups)
+    
+    def close(self):
+        """Nothing to finish for CSV."""
+
+
+class HtmlReportWriter:
+    """Write summaries as a self-contained HTML page."""
+    
+    STYLE = (
+        "body{font-family:Arial,sans-serif;margin:20px}"
+        "table{border-collapse:collapse;margin:8px 0 24px}"
+        "th,td{border:1px solid #ccc;padding:3px 8px;text-align:right}"
+        "th{background:#eee}td.label{text-align:left}"
+        ".pass{background:#d9f2d9}.fail{background:#f8d0d0}"
+        ".image{display:flex;gap:16px;align-items:flex-start}"
+        "img{border:1px solid #999}"
+    )
+    
+    def __init__(self, stream, description):
+        """Write the page header."""
+        self.stream = stream
+        self.stream.write(
+            "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+            f"<title>Measurement Report</title><style>{self.STYLE}</style></head><body>\n"
+            f"<h1>Measurement Report</h1>\n<p>{html.escape(description)}</p>\n"
+            "<p><a href=\"#job\">Job summary</a></p>\n"
+        )
+    
+    def write_table(self, groups):
+        """Write a statistics table."""
+        self.stream.write(
+            "<table><tr><th>Dimension</th><th>Unit</th><th>Count</th><th>Min</th><th>Max</th>"
+            "<th>Mean</th><th>Std dev</th><th>Nominal ± tol.</th><th>Pass</th><th>Fail</th></tr>\n"
+        )
+        for (label, unit, nominal, tolerance), stats in sorted_groups(groups):
+            limits = f"{nominal:g} ± {tolerance:g}" if nominal is not None else ""
+            result = f" class=\"{stats.result}\"" if stats.result else ""
+            self.stream.write(
+                f"<tr{result}><td class=\"label\">{html.escape(label)}</td><td>{html.escape(unit or '')}</td>"
+                f"<td>{stats.count}</td><td>{format_number(stats.minimum)}</td>"
+                f"<td>{format_number(stats.maximum)}</td><td>{format_number(stats.mean)}</td>"
+                f"<td>{format_number(stats.stddev)}</td><td>{limits}</td>"
+                f"<td>{stats.passed}</td><td>{stats.failed}</td></tr>\n"
+            )
+        self.stream.write("</table>\n")
+    
+    def write_image(self, row, groups, thumbnail=None):
+        """Write the section of one image."""
+        path = row["path"] or "(unknown image)"
+        self.stream.write(f"<h2>{html.escape(os.path.basename(path))}</h2>\n<div class=\"image\">")
+        if thumbnail:
+            self.stream.write(f"<img src=\"{thumbnail}\" alt=\"\">")
+        self.stream.write(f"<div><p>{html.escape(path)}</p>\n")
+        self.write_table(groups)
+        self.stream.write("</div></div>\n")
+    
+    def write_job(self, groups, images):
+        """Write the summary over all images."""
+        self.stream.write(f"<h2 id=\"job\">Job summary ({images} images)</h2>\n")
+        self.write_table(groups)
+    
+    def close(self):
+        """Finish the page."""
+        self.stream.write("</body></html>\n")
+
+
+REPORT_WRITERS = {"html": HtmlReportWriter, "csv": CsvReportWriter}
+
+
+def write_report(store, path, report_format=None, specifications=None, thumbnails=True,
+                 progress=None, **filters):
+    """
+    Write a report over stored measurements.
+    
+    Args:
+        store (MeasurementStore): Store to read from
+        path (str): Output file
+        report_format (str): "html" or "csv" (default: from the extension)
+        specifications (dict): Label -> Specification for pass/fail checks
+        thumbnails (bool): Embed image thumbnails in HTML reports
+        progress (callable): Optional callback receiving a fraction 0-1
+        **filters: image_hash, since, until and unit, as for
+            MeasurementStore.iter_measurements
+    
+    Returns:
+        dict: Numbers of "images", "measurements" and "failed" measurements
+    """
+    if report_format is None:
+        report_format = "csv" if path.lower().endswith(".csv") else "html"
+    if report_format not in REPORT_FORMATS:
+        raise ValueError(f"Unknown report format: {report_format}")
+    specifications = specifications or {}
+    
+    total = store.count_measurements(**filters)
+    description = f"{total} measurements, generated {format_timestamp(datetime.now().timestamp())}"
+    on_rows = (lambda count: progress(count / total)) if progress and total else None
+    
+    job, images = {}, 0
+    with open(path, "w", newline="", encoding="utf-8") as stream:
+        writer = REPORT_WRITERS[report_format](stream, description)
+        rows = store.iter_measurements(by_image=True, **filters)
+        for row, groups in image_summaries(rows, specifications, job, on_rows):
+            thumbnail = None
+            if thumbnails and report_format == "html" and row["path"]:
+                thumbnail = thumbnail_data_uri(row["path"])
+            writer.write_image(row, groups, thumbnail)
+            images += 1
+        writer.write_job(job, images)
+        writer.close()
+    
+    return {
+        "images": images,
+        "measurements": sum(stats.count for stats in job.values()),
+        "failed": sum(stats.failed for stats in job.values()),
+    }
+
+
+def parse_date(value):
+    """Parse an ISO date or date-time into a Unix time for argparse."""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an ISO date: {value}")
+
+
+def main():
+    """Write a report from the command line."""
+    parser = argparse.ArgumentParser(description="Summarize stored measurements as HTML or CSV")
+    parser.add_argument("output", help="Report file (.html or .csv)")
+    parser.add_argument("--db", default=DEFAULT_PATH, help="Database file")
+    parser.add_argument("--format", choices=REPORT_FORMATS, help="Report format (default: from extension)")
+    parser.add_argument("--image", help="Only measurements of this image (matched by content hash)")
+    parser.add_argument("--since", type=parse_date, help="Only measurements from this date (YYYY-MM-DD)")
+    parser.add_argument("--until", type=parse_date, help="Only measurements before this date")
+    parser.add_argument("--unit", help="Only measurements in this unit")
+    parser.add_argument("--specs", help="CSV of label, nominal, tolerance[, unit] for pass/fail")
+    parser.add_argument("--no-thumbnails", action="store_true", help="Leave thumbnails out of HTML reports")
+    args = parser.parse_args()
+    
+    try:
+        specifications = read_specifications(args.specs) if args.specs else {}
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    
+    store = MeasurementStore(args.db)
+    try:
+        result = write_report(
+            store, args.output, args.format, specifications, not args.no_thumbnails,
+            image_hash=file_hash(args.image) if args.image else None,
+            since=args.since, until=args.until, unit=args.unit
+        )
+    finally:
+        store.close()
+    print(f"{args.output}: {result['measurements']} measurements on {result['images']} images, "
+          f"{result['failed']} out of tolerance")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Headless measurement service for Image Dimensioner.
+
+Runs a small JSON-over-HTTP server on a local port so other tools (MES
+scripts, dashboards) can calibrate and measure without the Tk GUI. Requests
+are handled by asyncio; image decoding and measurement maths run in a worker
+thread pool. Decoded images and calibrations are kept in shared LRU caches.
+
+Usage:
+    python measurement_service.py --port 8765
+
+Endpoints:
+    GET  /health      Liveness check
+    GET  /stats       Request counters, cache and memory statistics
+    POST /calibrate   {"points": [[x1, y1], [x2, y2]], "known_distance": 10,
+                       "unit": "mm", "image": "optional/path.png"}
+    POST /measure     {"segments": [[[x1, y1], [x2, y2]], ...],
+                       "calibration_id": "..." or "calibration_factor": 0.1,
+                       "unit": "mm", "image": "optional/path.png"}
+    POST /features    {"image": "path.png", "threshold": null, "dark_features": true,
+                       "min_area": 4, optional calibration as for /measure}
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from PIL import Image
+
+from caching import LRUCache
+from feature_detection import detect_features, DEFAULT_MIN_AREA
+from memory_budget import MemoryBudget, DEFAULT_LIMIT, image_nbytes
+from measurement import (
+    AVAILABLE_UNITS,
+    calculate_distance,
+    calculate_calibration_factor,
+    measure_segments,
+)
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class ServiceError(Exception):
+    """Error reported to the client with an HTTP status code."""
+    
+    def __init__(self, status, message):
+        """Initialize with an HTTP status and a human-readable message."""
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def parse_point(value):
+    """Validate and convert a JSON point into an (x, y) float tuple."""
+    try:
+        x, y = value
+        return (float(x), float(y))
+    except (TypeError, ValueError):
+        raise ServiceError(400, f"Invalid point: {value!r}")
+
+
+def open_image(path):
+    """Open and fully decode an image file."""
+    with Image.open(path) as image:
+        image.load()
+    return image
+
+
+class MeasurementService:
+    """Asyncio request handler backed by shared caches and a worker pool."""
+    
+    def __init__(self, image_cache_size=32, calibration_cache_size=1024, workers=None,
+                 memory_limit=DEFAULT_LIMIT):
+        """Initialize the service caches, memory budget and worker pool."""
+        self.memory = MemoryBudget(memory_limit)
+        self.images = LRUCache(image_cache_size, budget=self.memory, sizeof=image_nbytes)
+        self.calibrations = LRUCache(calibration_cache_size)
+        self.executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count())
+        self.server = None
+        self.connections = set()  # Tasks serving open client connections
+        self.request_count = 0
+        self.error_count = 0
+        
+        self.routes = {
+            ("GET", "/health"): self.handle_health,
+            ("GET", "/stats"): self.handle_stats,
+            ("POST", "/calibrate"): self.handle_calibrate,
+            ("POST", "/measure"): self.handle_measure,
+            ("POST", "/features"): self.handle_features,
+        }
+    
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Start listening and return the asyncio server."""
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server
+    
+    async def close(self):
+        """Stop the server, end open connections and stop the worker pool."""
+        if self.server is not None:
+            self.server.close()
+            # Idle keep-alive clients would otherwise hold their handlers
+            # open after the loop stops
+            for task in self.connections:
+                task.cancel()
+            await asyncio.gather(*self.connections, return_exceptions=True)
+            await self.server.wait_closed()
+            self.server = None
+        self.executor.shutdown(wait=False)
+    
+    async def serve_forever(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Start the server and run until cancelled."""
+        server = await self.start(host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.close()
+    
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection, honouring keep-alive."""
+        task = asyncio.current_task()
+        self.connections.add(task)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_SIZE:
+                    status, payload = 413, {"error": "Request body too large"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.dispatch(method, urlsplit(target).path, body)
+                    keep_alive = (
+                        version == "HTTP/1.1"
+                        and headers.get("connection", "").lower() != "close"
+                    )
+                
+                data = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+                        f"Content-Type: application/json\r\n"
+                        f"Content-Length: {len(data)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                        f"\r\n"
+                    ).encode("latin-1") + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # Client went away or sent a malformed request line
+            pass
+        except asyncio.CancelledError:
+            # The service is closing; asyncio's stream callback would report
+            # a cancelled handler as an error
+            pass
+        finally:
+            self.connections.discard(task)
+            writer.close()
+    
+    async def dispatch(self, method, path, body):
+        """Route a request and return (status, JSON payload)."""
+        self.request_count += 1
+        handler = self.routes.get((method, path))
+        try:
+            if handler is None:
+                if any(route_path == path for _, route_path in self.routes):
+                    raise ServiceError(405, f"Method {method} not allowed for {path}")
+                raise ServiceError(404, f"Unknown endpoint: {path}")
+            
+            try:
+                request = json.loads(body) if body else {}
+            except ValueError:
+                raise ServiceError(400, "Request body is not valid JSON")
+            if not isinstance(request, dict):
+                raise ServiceError(400, "Request body must be a JSON object")
+            
+            return 200, await handler(request)
+        except ServiceError as e:
+            self.error_count += 1
+            return e.status, {"error": e.message}
+        except Exception as e:
+            self.error_count += 1
+            return 500, {"error": str(e)}
+    
+    async def run_in_worker(self, func, *args):
+        """Run CPU or I/O heavy work in the worker pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+    
+    async def handle_health(self, request):
+        """Report that the service is alive."""
+        return {"status": "ok"}
+    
+    async def handle_stats(self, request):
+        """Report request counters, cache statistics and memory usage."""
+        return {
+            "requests": self.request_count,
+            "errors": self.error_count,
+            "image_cache": self.images.stats(),
+            "calibration_cache": self.calibrations.stats(),
+            "memory": self.memory.stats(),
+        }
+    
+    async def handle_calibrate(self, request):
+        """Create a calibration from two points and a known distance."""
+        return await self.run_in_worker(self.calibrate, request)
+    
+    async def handle_measure(self, request):
+        """Measure a batch of segments with a stored or explicit calibration."""
+        return await self.run_in_worker(self.measure, request)
+    
+    async def handle_features(self, request):
+        """Automatically dimension the connected features of an image."""
+        return await self.run_in_worker(self.features, request)
+    
+    def get_image(self, path):
+        """Return a decoded image from the cache, loading it on a miss."""
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            raise ServiceError(400, f"Cannot read image: {e}")
+        # Keyed on mtime and size so a rewritten file is decoded again
+        key = (os.path.realpath(path), stat.st_mtime_ns, stat.st_size)
+        try:
+            return key, self.images.get_or_load(key, lambda: open_image(path))
+        except OSError as e:
+            raise ServiceError(400, f"Cannot decode image: {e}")
+    
+    def check_points_inside(self, image, points):
+        """Reject points that fall outside the image."""
+        width, height = image.size
+        for x, y in points:
+            if not (0 <= x <= width and 0 <= y <= height):
+                raise ServiceError(400, f"Point ({x}, {y}) is outside the {width}x{height} image")
+    
+    def calibrate(self, request):
+        """Compute and store a calibration."""
+        unit = request.get("unit", AVAILABLE_UNITS[0])
+        if unit not in AVAILABLE_UNITS:
+            raise ServiceError(400, f"Unknown unit: {unit}")
+        
+        points = request.get("points")
+        if not isinstance(points, list) or len(points) != 2:
+            raise ServiceError(400, "'points' must contain exactly two points")
+        point1, point2 = parse_point(points[0]), parse_point(points[1])
+        
+        image_key = None
+        if request.get("image"):
+            image_key, image = self.get_image(request["image"])
+            self.check_points_inside(image, (point1, point2))
+        
+        pixel_distance = calculate_distance(point1, point2)
+        try:
+            factor = calculate_calibration_factor(pixel_distance, request.get("known_distance"))
+        except (TypeError, ValueError) as e:
+            raise ServiceError(400, str(e))
+        
+        calibration_id = uuid.uuid4().hex
+        calibration = {
+            "calibration_id": calibration_id,
+            "calibration_factor": factor,
+            "unit": unit,
+            "pixel_distance": pixel_distance,
+        }
+        self.calibrations.put(calibration_id, calibration)
+        if image_key is not None:
+            # Latest calibration for an image is used when no id is given
+            self.calibrations.put(("image", image_key), calibration)
+        return calibration
+    
+    def resolve_calibration(self, request, image_key, required=True):
+        """
+        Find the calibration factor and unit for a request.
+        
+        Returns (None, "px") when no calibration is available and
+        required is False.
+        """
+        if "calibration_factor" in request:
+            try:
+                factor = float(request["calibration_factor"])
+            except (TypeError, ValueError):
+                raise ServiceError(400, "'calibration_factor' must be a number")
+            if factor <= 0:
+                raise ServiceError(400, "'calibration_factor' must be positive")
+            return factor, request.get("unit", AVAILABLE_UNITS[0])
+        
+        if "calibration_id" in request:
+            calibration = self.calibrations.get(request["calibration_id"])
+            if calibration is None:
+                raise ServiceError(400, f"Unknown calibration_id: {request['calibration_id']}")
+        elif image_key is not None:
+            calibration = self.calibrations.get(("image", image_key))
+            if calibration is None:
+                if not required:
+                    return None, "px"
+                raise ServiceError(400, "Image has not been calibrated")
+        elif not required:
+            return None, "px"
+        else:
+            raise ServiceError(400, "A calibration_id, calibration_factor or calibrated image is required")
+        
+        return calibration["calibration_factor"], calibration["unit"]
+    
+    def measure(self, request):
+        """Measure every segment in the request."""
+        segments = request.get("segments")
+        if not isinstance(segments, list) or not segments:
+            raise ServiceError(400, "'segments' must be a non-empty list")
+        try:
+            segments = [(parse_point(p1), parse_point(p2)) for p1, p2 in segments]
+        except (TypeError, ValueError):
+            raise ServiceError(400, "Each segment must be a pair of points")
+        
+        image_key = None
+        if request.get("image"):
+            image_key, image = self.get_image(request["image"])
+            self.check_points_inside(image, [point for segment in segments for point in segment])
+        
+        factor, unit = self.resolve_calibration(request, image_key)
+        if unit not in AVAILABLE_UNITS:
+            raise ServiceError(400, f"Unknown unit: {unit}")
+        
+        return {
+            "unit": unit,
+            "calibration_factor": factor,
+            "measurements": [
+                {"pixel_distance": pixel_distance, "distance": distance}
+                for pixel_distance, distance in measure_segments(segments, factor)
+            ],
+        }
+
+    def features(self, request):
+        """Detect connected features and report their dimensions."""
+        if not request.get("image"):
+            raise ServiceError(400, "'image' is required")
+        image_key, image = self.get_image(request["image"])
+        factor, unit = self.resolve_calibration(request, image_key, required=False)
+        
+        threshold = request.get("threshold")
+        dark_features = request.get("dark_features", True)
+        if not isinstance(dark_features, bool):
+            raise ServiceError(400, "'dark_features' must be true or false")
+        try:
+            features = detect_features(
+                image,
+                threshold=int(threshold) if threshold is not None else None,
+                dark_features=dark_features,
+                min_area=int(request.get("min_area", DEFAULT_MIN_AREA))
+            )
+            feature_list = [feature.to_dict(factor, unit) for feature in features]
+        except (TypeError, ValueError) as e:
+            raise ServiceError(400, str(e))
+        
+        return {
+            "unit": unit,
+            "calibration_factor": factor,
+            "count": len(feature_list),
+            "features": feature_list,
+        }
+
+
+class MeasurementClient:
+    """Minimal blocking client for the measurement service (keep-alive)."""
+    
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=10):
+        """Initialize a client for a running service."""
+        self.connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    
+    def request(self, method, path, payload=None):
+        """Send a request and return (status, decoded JSON response)."""
+        body = json.dumps(payload) if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        self.connection.request(method, path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        return response.status, json.loads(response.read())
+    
+    def calibrate(self, points, known_distance, unit="mm", image=None):
+        """Create a calibration and return the response."""
+        payload = {"points": points, "known_distance": known_distance, "unit": unit}
+        if image:
+            payload["image"] = image
+        return self.request("POST", "/calibrate", payload)
+    
+    def measure(self, segments, **calibration):
+        """Measure segments; pass calibration_id, calibration_factor or image."""
+        payload = dict(calibration, segments=segments)
+        return self.request("POST", "/measure", payload)
+    
+    def features(self, image, **options):
+        """Detect features in an image; options as for /features."""
+        return self.request("POST", "/features", dict(options, image=image))
+    
+    def close(self):
+        """Close the connection."""
+        self.connection.close()
+
+
+class ServiceThread(threading.Thread):
+    """Run a MeasurementService on its own event loop in a background thread."""
+    
+    def __init__(self, service, host=DEFAULT_HOST, port=0):
+        """Initialize the thread; port 0 picks a free port."""
+        super().__init__(daemon=True)
+        self.service = service
+        self.host = host
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+    
+    def run(self):
+        """Start the server and process requests until stopped."""
+        asyncio.set_event_loop(self.loop)
+        server = self.loop.run_until_complete(self.service.start(self.host, self.port))
+        self.port = server.sockets[0].getsockname()[1]
+        self.ready.set()
+        self.loop.run_forever()
+        self.loop.close()
+    
+    def start(self):
+        """Start the thread and wait until the server is listening."""
+        super().start()
+        self.ready.wait()
+    
+    def stop(self):
+        """Close the server and its connections, then stop the loop and wait."""
+        # The loop stops inside shutdown, so wait for the thread rather than
+        # for the coroutine's result
+        asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop)
+        self.join()
+    
+    async def shutdown(self):
+        """Close the service and stop the loop once nothing is left running."""
+        await self.service.close()
+        self.loop.stop()
+
+
+def main():
+    """Run the measurement service from the command line."""
+    parser = argparse.ArgumentParser(description="Headless Image Dimensioner measurement service")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Interface to listen on (default: localhost only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port to listen on")
+    parser.add_argument("--workers", type=int, default=None, help="Worker threads (default: CPU count)")
+    parser.add_argument("--image-cache", type=int, default=32, help="Number of decoded images to keep")
+    parser.add_argument(
+        "--memory-budget", type=int, default=DEFAULT_LIMIT // (1024 * 1024),
+        help="Memory budget for cached images in MB"
+    )
+    args = parser.parse_args()
+    
+    service = MeasurementService(
+        image_cache_size=args.image_cache,
+        workers=args.workers,
+        memory_limit=args.memory_budget * 1024 * 1024
+    )
+    print(f"Measurement service listening on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(service.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
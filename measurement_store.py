@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+Persistent SQLite store for images, calibrations, measurements and logs.
+
+Everything the GUI logs is kept across sessions in one SQLite file. The
+database runs in WAL mode so readers never block the writer. Measurements
+and log lines are buffered and written in batched transactions, while the
+rarer image and calibration records are written immediately because
+measurements refer to their ids. Indexes on image hash, timestamp and unit
+keep lookups such as "all measurements for this drawing" or "every
+calibration over the last week" fast on millions of rows.
+
+Usage:
+    python measurement_store.py measurements drawing.png
+    python measurement_store.py calibrations --days 7 --unit mm
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".image_dimensioner", "measurements.db")
+
+# Buffered rows written per transaction
+DEFAULT_BATCH_SIZE = 500
+
+# Rows fetched at a time when iterating over query results
+FETCH_SIZE = 1000
+
+# Bytes read at a time when hashing image files
+HASH_CHUNK_SIZE = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL UNIQUE,
+    path TEXT NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    added REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS calibrations (
+    id INTEGER PRIMARY KEY,
+    image_id INTEGER REFERENCES images(id),
+    timestamp REAL NOT NULL,
+    factor REAL NOT NULL,
+    unit TEXT NOT NULL,
+    source TEXT NOT NULL,
+    pixel_distance REAL,
+    known_distance REAL
+);
+CREATE TABLE IF NOT EXISTS measurements (
+    id INTEGER PRIMARY KEY,
+    image_id INTEGER REFERENCES images(id),
+    calibration_id INTEGER REFERENCES calibrations(id),
+    timestamp REAL NOT NULL,
+    kind TEXT NOT NULL,
+    x1 REAL, y1 REAL, x2 REAL, y2 REAL,
+    pixel_distance REAL NOT NULL,
+    real_distance REAL,
+    unit TEXT,
+    label TEXT,
+    nominal REAL,
+    tolerance REAL
+);
+CREATE TABLE IF NOT EXISTS log_entries (
+    id INTEGER PRIMARY KEY,
+    image_id INTEGER REFERENCES images(id),
+    timestamp REAL NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calibrations_image_time ON calibrations(image_id, timestamp);
+CREATE INDEX IF NOT EXISTS calibrations_time ON calibrations(timestamp);
+CREATE INDEX IF NOT EXISTS calibrations_unit_time ON calibrations(unit, timestamp);
+CREATE INDEX IF NOT EXISTS measurements_image_time ON measurements(image_id, timestamp);
+CREATE INDEX IF NOT EXISTS measurements_time ON measurements(timestamp);
+CREATE INDEX IF NOT EXISTS measurements_unit_time ON measurements(unit, timestamp);
+CREATE INDEX IF NOT EXISTS log_entries_time ON log_entries(timestamp);
+"""
+
+MEASUREMENT_COLUMNS = (
+    "image_id", "calibration_id", "timestamp", "kind",
+    "x1", "y1", "x2", "y2", "pixel_distance", "real_distance", "unit", "label",
+    "nominal", "tolerance"
+)
+
+# Columns added after the first release, created on existing databases
+ADDED_MEASUREMENT_COLUMNS = (("nominal", "REAL"), ("tolerance", "REAL"))
+
+
+def file_hash(path):
+    """
+    Hash an image file's contents, so renamed or copied drawings match.
+    
+    Args:
+        path (str): File path
+    
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as image_file:
+        for chunk in iter(lambda: image_file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MeasurementStore:
+    """SQLite-backed history of images, calibrations, measurements and logs."""
+    
+    def __init__(self, path=DEFAULT_PATH, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Open (or create) a store.
+        
+        Args:
+            path (str): Database file, or ":memory:" for a temporary store
+            batch_size (int): Buffered measurements and log lines that
+                trigger a write
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.RLock()
+        self._pending_measurements = []
+        self._pending_logs = []
+        # Pending rows that may be removed later, and the ids they got when
+        # written, so remove_measurement deletes exactly that row
+        self._keep_ids = Counter()
+        self._row_ids = {}
+        # The connection is shared by GUI, worker and service threads
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # WAL with NORMAL sync stays consistent after a crash and avoids an
+        # fsync per transaction
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("PRAGMA foreign_keys=ON")
+        self._connection.executescript(SCHEMA)
+        self._migrate()
+    
+    def _migrate(self):
+        """Add columns missing from databases created by older versions."""
+        existing = {row["name"] for row in self._connection.execute("PRAGMA table_info(measurements)")}
+        with self._connection:
+            for name, column_type in ADDED_MEASUREMENT_COLUMNS:
+                if name not in existing:
+                    self._connection.execute(f"ALTER TABLE measurements ADD COLUMN {name} {column_type}")
+    
+    def add_image(self, path, image_hash, width=None, height=None):
+        """
+        Register an image and return its id; known hashes keep their id.
+        
+        Args:
+            path (str): Where the image was loaded from (latest path is kept)
+            image_hash (str): Content hash, see file_hash
+            width (int): Image width in pixels
+            height (int): Image height in pixels
+        
+        Returns:
+            int: Image id
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO images (hash, path, width, height, added) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(hash) DO UPDATE SET path = excluded.path",
+                (image_hash, path, width, height, time.time())
+            )
+            return self._connection.execute(
+                "SELECT id FROM images WHERE hash = ?", (image_hash,)
+            ).fetchone()[0]
+    
+    def add_calibration(self, image_id, factor, unit, source, pixel_distance=None,
+                        known_distance=None, timestamp=None):
+        """
+        Record a calibration immediately and return its id.
+        
+        Args:
+            image_id (int): Image the calibration was made on, or None
+            factor (float): Calibration factor (units per pixel)
+            unit (str): Calibration unit
+            source (str): "manual", "metadata", ...
+            pixel_distance (float): Reference length in pixels, if any
+            known_distance (float): Reference length in units, if any
+            timestamp (float): Unix time (default now)
+        
+        Returns:
+            int: Calibration id
+        """
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO calibrations (image_id, timestamp, factor, unit, source, "
+                "pixel_distance, known_distance) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (image_id, timestamp or time.time(), factor, unit, source, pixel_distance, known_distance)
+            )
+            return cursor.lastrowid
+    
+    def add_measurement(self, image_id, calibration_id, points, pixel_distance, real_distance=None,
+                        unit=None, kind="distance", label=None, timestamp=None, nominal=None,
+                        tolerance=None):
+        """
+        Buffer one measurement; it is written with the next batch.
+        
+        Args:
+            image_id (int): Measured image, or None
+            calibration_id (int): Calibration used, or None if uncalibrated
+            points (tuple): ((x1, y1), (x2, y2)) in image pixels
+            pixel_distance (float): Distance in pixels
+            real_distance (float): Distance in units, or None
+            unit (str): Unit of real_distance
+            kind (str): "distance", "profile", "feature", ...
+            label (str): Optional dimension name
+            timestamp (float): Unix time (default now)
+            nominal (float): Nominal value of a named dimension, in unit
+            tolerance (float): Allowed deviation either side of nominal
+        
+        Returns:
+            tuple: The buffered row, which remove_measurement accepts
+        """
+        (x1, y1), (x2, y2) = points
+        row = (
+            image_id, calibration_id, timestamp or time.time(), kind,
+            x1, y1, x2, y2, pixel_distance, real_distance, unit, label, nominal, tolerance
+        )
+        self.add_measurements([row], keep_ids=True)
+        return row
+    
+    def remove_measurement(self, row):
+        """
+        Remove a measurement row added earlier, e.g. when it is undone.
+        
+        Rows still waiting in the buffer are dropped from it; written rows
+        are deleted by the id they were given, so identical rows added
+        separately are removed one at a time.
+        """
+        with self._lock:
+            if row in self._pending_measurements:
+                self._pending_measurements.remove(row)
+                if self._keep_ids[row]:
+                    self._keep_ids[row] -= 1
+                return
+            row_ids = self._row_ids.get(row)
+            if not row_ids:
+                return
+            row_id = row_ids.pop()
+            if not row_ids:
+                del self._row_ids[row]
+            with self._connection:
+                self._connection.execute("DELETE FROM measurements WHERE id = ?", (row_id,))
+    
+    def add_measurements(self, rows, keep_ids=False):
+        """
+        Buffer measurement rows given as tuples in MEASUREMENT_COLUMNS order.
+        
+        Args:
+            rows (list): Row tuples
+            keep_ids (bool): Remember the ids the rows get when written, so
+                remove_measurement can delete them later
+        """
+        with self._lock:
+            self._pending_measurements.extend(rows)
+            if keep_ids:
+                self._keep_ids.update(rows)
+            if len(self._pending_measurements) >= self.batch_size:
+                self.flush()
+    
+    def add_log(self, message, image_id=None, timestamp=None):
+        """Buffer one log line; it is written with the next batch."""
+        with self._lock:
+            self._pending_logs.append((image_id, timestamp or time.time(), message))
+            if len(self._pending_logs) >= self.batch_size:
+                self.flush()
+    
+    def flush(self):
+        """Write all buffered rows in one transaction."""
+        with self._lock:
+            if not self._pending_measurements and not self._pending_logs:
+                return
+            insert = (
+                f"INSERT INTO measurements ({', '.join(MEASUREMENT_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(MEASUREMENT_COLUMNS))})"
+            )
+            with self._connection:
+                if self._keep_ids:
+                    # Interactive rows are few; insert them one by one to
+                    # learn their ids
+                    for row in self._pending_measurements:
+                        row_id = self._connection.execute(insert, row).lastrowid
+                        if self._keep_ids[row]:
+                            self._keep_ids[row] -= 1
+                            self._row_ids.setdefault(row, []).append(row_id)
+                else:
+                    self._connection.executemany(insert, self._pending_measurements)
+                self._connection.executemany(
+                    "INSERT INTO log_entries (image_id, timestamp, message) VALUES (?, ?, ?)",
+                    self._pending_logs
+                )
+            self._pending_measurements = []
+            self._pending_logs = []
+            self._keep_ids.clear()
+    
+    def query(self, sql, parameters=()):
+        """
+        Run a read query after flushing, yielding rows as dictionaries.
+        
+        Rows are fetched in blocks, so large results are never held in
+        memory at once.
+        """
+        with self._lock:
+            self.flush()
+            cursor = self._connection.execute(sql, parameters)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+    
+    def iter_measurements(self, image_hash=None, since=None, until=None, unit=None, by_image=False):
+        """
+        Iterate over stored measurements, oldest first.
+        
+        Args:
+            image_hash (str): Only measurements of this image
+            since (float): Only measurements at or after this Unix time
+            until (float): Only measurements before this Unix time
+            unit (str): Only measurements in this unit
+            by_image (bool): Group the rows by image (oldest first within
+                each image), so per-image results can be streamed
+        
+        Yields:
+            dict: Measurement columns plus the image "hash" and "path"
+        """
+        where, parameters = self._measurement_filter(image_hash, since, until, unit)
+        order = "measurements.image_id, measurements.timestamp" if by_image else "measurements.timestamp"
+        return self.query(
+            "SELECT measurements.*, images.hash AS hash, images.path AS path FROM measurements "
+            f"LEFT JOIN images ON images.id = measurements.image_id {where} "
+            f"ORDER BY {order}",
+            parameters
+        )
+    
+    def count_measurements(self, image_hash=None, since=None, until=None, unit=None):
+        """Count the measurements iter_measurements would return for the same filters."""
+        where, parameters = self._measurement_filter(image_hash, since, until, unit)
+        rows = self.query(
+            "SELECT COUNT(*) AS count FROM measurements "
+            f"LEFT JOIN images ON images.id = measurements.image_id {where}",
+            parameters
+        )
+        return next(rows)["count"]
+    
+    @staticmethod
+    def _measurement_filter(image_hash, since, until, unit):
+        """Build the WHERE clause and parameters of a measurement query."""
+        conditions, parameters = [], []
+        if image_hash is not None:
+            conditions.append("images.hash = ?")
+            parameters.append(image_hash)
+        if since is not None:
+            conditions.append("measurements.timestamp >= ?")
+            parameters.append(since)
+        if until is not None:
+            conditions.append("measurements.timestamp < ?")
+            parameters.append(until)
+        if unit is not None:
+            conditions.append("measurements.unit = ?")
+            parameters.append(unit)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, parameters
+    
+    def measurements_for_image(self, image_hash):
+        """Return every measurement made on an image, oldest first."""
+        return list(self.iter_measurements(image_hash=image_hash))
+    
+    def calibrations_since(self, since, unit=None):
+        """Return calibrations made at or after a Unix time, oldest first."""
+        sql = (
+            "SELECT calibrations.*, images.hash AS hash, images.path AS path FROM calibrations "
+            "LEFT JOIN images ON images.id = calibrations.image_id WHERE calibrations.timestamp >= ?"
+        )
+        parameters = [since]
+        if unit is not None:
+            sql += " AND calibrations.unit = ?"
+            parameters.append(unit)
+        return list(self.query(sql + " ORDER BY calibrations.timestamp", parameters))
+    
+    def latest_calibration(self, image_hash, unit=None):
+        """
+        Return the newest calibration made on an image, or None.
+        
+        Args:
+            image_hash (str): Content hash of the image
+            unit (str): Only calibrations in this unit
+        """
+        sql = (
+            "SELECT calibrations.* FROM calibrations JOIN images ON images.id = calibrations.image_id "
+            "WHERE images.hash = ?"
+        )
+        parameters = [image_hash]
+        if unit is not None:
+            sql += " AND calibrations.unit = ?"
+            parameters.append(unit)
+        rows = list(self.query(sql + " ORDER BY calibrations.timestamp DESC LIMIT 1", parameters))
+        return rows[0] if rows else None
+    
+    def log_entries(self, after_id=0, limit=None):
+        """
+        Return log lines with an id greater than after_id, oldest first.
+        
+        Args:
+            after_id (int): Last id already shown
+            limit (int): Only the newest this many lines
+        """
+        if limit is None:
+            return list(self.query(
+                "SELECT * FROM log_entries WHERE id > ? ORDER BY id", (after_id,)
+            ))
+        rows = list(self.query(
+            "SELECT * FROM log_entries WHERE id > ? ORDER BY id DESC LIMIT ?", (after_id, limit)
+        ))
+        return rows[::-1]
+    
+    def last_log_id(self):
+        """Return the id of the newest log line (0 if there is none)."""
+        rows = list(self.query("SELECT COALESCE(MAX(id), 0) AS id FROM log_entries"))
+        return rows[0]["id"]
+    
+    def counts(self):
+        """Return the number of rows in each table."""
+        return {
+            table: next(self.query(f"SELECT COUNT(*) AS count FROM {table}"))["count"]
+            for table in ("images", "calibrations", "measurements", "log_entries")
+        }
+    
+    def close(self):
+        """Write pending rows and close the database."""
+        with self._lock:
+            self.flush()
+            self._connection.close()
+
+
+def format_timestamp(timestamp):
+    """Format a Unix time for display."""
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def main():
+    """Query the store from the command line."""
+    parser = argparse.ArgumentParser(description="Query stored calibrations and measurements")
+    parser.add_argument("--db", default=DEFAULT_PATH, help="Database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    measurements = commands.add_parser("measurements", help="Measurements of one image")
+    measurements.add_argument("image", help="Image file (matched by content hash)")
+    
+    calibrations = commands.add_parser("calibrations", help="Recent calibrations")
+    calibrations.add_argument("--days", type=float, default=7, help="How far back to look")
+    calibrations.add_argument("--unit", help="Only this unit")
+    args = parser.parse_args()
+    
+    store = MeasurementStore(args.db)
+    try:
+        if args.command == "measurements":
+            for row in store.iter_measurements(image_hash=file_hash(args.image)):
+                real = f"{row['real_distance']:.4f} {row['unit']}" if row["real_distance"] is not None else "-"
+                print(f"{format_timestamp(row['timestamp'])}  {row['kind']:<9} "
+                      f"{row['pixel_distance']:>10.2f}px  {real}  {row['label'] or ''}")
+        else:
+            since = time.time() - args.days * 86400
+            for row in store.calibrations_since(since, args.unit):
+                print(f"{format_timestamp(row['timestamp'])}  {row['factor']:.6f} {row['unit']}/px  "
+                      f"{row['source']:<9} {row['path'] or ''}")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
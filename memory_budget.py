@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Memory accounting for decoded bitmaps, derived views and caches.
+
+Every large allocation the application makes (the original image, its
+display-mode copy, zoomed views, Tk PhotoImages, cached images in the
+service) is recorded with its size in one MemoryBudget. Entries owned by a
+registered cache can be evicted; when the total exceeds the configured
+limit, the budget evicts least recently used entries from the cache holding
+the most memory until the total fits again.
+"""
+
+import sys
+import threading
+
+
+# Default budget in bytes
+DEFAULT_LIMIT = 1024 * 1024 * 1024
+
+# Bytes per pixel in Pillow's internal storage, by mode
+BYTES_PER_PIXEL = {
+    "1": 1, "L": 1, "P": 1,
+    "I;16": 2, "I;16L": 2, "I;16B": 2, "I;16N": 2,
+    "I": 4, "F": 4,
+}
+
+
+def image_nbytes(image):
+    """
+    Estimate the memory held by a decoded PIL image.
+    
+    Multi-band 8-bit modes (RGB, RGBA, CMYK...) are stored by Pillow in
+    32-bit pixels, so they count as four bytes per pixel.
+    """
+    if image is None:
+        return 0
+    return image.width * image.height * BYTES_PER_PIXEL.get(image.mode, 4)
+
+
+def photo_nbytes(photo):
+    """Estimate the memory held by a Tk PhotoImage (32-bit pixels)."""
+    if photo is None:
+        return 0
+    return photo.width() * photo.height() * 4
+
+
+def peak_rss_bytes():
+    """
+    Return the peak resident set size of this process in bytes.
+    
+    Returns:
+        int: Peak RSS, or None if the platform does not report it
+    """
+    try:
+        import resource
+    except ImportError:
+        return _windows_peak_working_set()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _windows_peak_working_set():
+    """Read the peak working set on Windows via psapi."""
+    try:
+        import ctypes
+        from ctypes import wintypes
+        
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+        
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.PeakWorkingSetSize
+    except (AttributeError, OSError):
+        return None
+
+
+def format_bytes(nbytes):
+    """Format a byte count for display, e.g. '12.3 MB'."""
+    if nbytes is None:
+        return "n/a"
+    for unit in ("B", "KB", "MB", "GB"):
+        if nbytes < 1024 or unit == "GB":
+            return f"{nbytes:.0f} {unit}" if unit == "B" else f"{nbytes:.1f} {unit}"
+        nbytes /= 1024.0
+
+
+class MemoryBudget:
+    """Track allocation sizes and evict from registered caches over a limit."""
+    
+    def __init__(self, limit=DEFAULT_LIMIT):
+        """Initialize an empty budget with a limit in bytes."""
+        self.limit = limit
+        self.current = 0
+        self.peak = 0
+        self.evictions = 0
+        self._entries = {}
+        self._caches = []
+        self._lock = threading.Lock()
+    
+    def register_cache(self, cache):
+        """Allow the budget to evict from a cache (see caching.LRUCache)."""
+        with self._lock:
+            if cache not in self._caches:
+                self._caches.append(cache)
+    
+    def track(self, key, nbytes, owner=None, enforce=True):
+        """
+        Record (or update) the size of an allocation.
+        
+        Args:
+            key: Any hashable name, e.g. "photo" or (cache, item_key)
+            nbytes (int): Size in bytes
+            owner: Registered cache the entry can be evicted from, or None
+                for allocations that must stay (the current image)
+            enforce (bool): Evict immediately if over the limit; caches pass
+                False while holding their own lock and enforce afterwards
+        """
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous is not None:
+                self.current -= previous[0]
+            self._entries[key] = (nbytes, owner)
+            self.current += nbytes
+            self.peak = max(self.peak, self.current)
+        if enforce:
+            self.enforce()
+    
+    def release(self, key):
+        """Forget an allocation."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.current -= entry[0]
+    
+    def usage_by_owner(self):
+        """Return bytes held by each registered cache."""
+        usage = {}
+        with self._lock:
+            for nbytes, owner in self._entries.values():
+                if owner is not None:
+                    usage[owner] = usage.get(owner, 0) + nbytes
+        return usage
+    
+    def enforce(self):
+        """Evict cache entries until usage fits the limit or nothing is left."""
+        while True:
+            with self._lock:
+                if self.current <= self.limit:
+                    return
+            usage = self.usage_by_owner()
+            with self._lock:
+                caches = list(self._caches)
+            # Largest cache first; a cache always keeps its most recent entry
+            candidates = sorted(
+                (cache for cache in caches if usage.get(cache, 0) > 0 and len(cache) > 1),
+                key=lambda cache: usage[cache],
+                reverse=True
+            )
+            if not candidates:
+                return
+            # Evicting calls release() for the entry, outside our lock
+            if candidates[0].evict_oldest():
+                with self._lock:
+                    self.evictions += 1
+            else:
+                return
+    
+    def set_limit(self, limit):
+        """Change the limit and evict immediately if needed."""
+        with self._lock:
+            self.limit = limit
+        self.enforce()
+    
+    def stats(self):
+        """Return current usage, peak usage, limit and peak RSS in bytes."""
+        with self._lock:
+            return {
+                "current": self.current,
+                "peak": self.peak,
+                "limit": self.limit,
+                "evictions": self.evictions,
+                "peak_rss": peak_rss_bytes(),
+            }
+    
+    def summary(self):
+        """One-line human readable usage summary."""
+        stats = self.stats()
+        return (
+            f"Memory: {format_bytes(stats['current'])} / {format_bytes(stats['limit'])} | "
+            f"Peak RSS: {format_bytes(stats['peak_rss'])}"
+        )
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Calibration from the resolution stored in image headers.
+
+Scanners record their resolution in the file: JFIF density or EXIF
+XResolution in JPEG, the pHYs chunk in PNG, XResolution/ResolutionUnit in
+TIFF and pixels-per-metre in BMP. Pillow parses these while opening a file,
+before any pixel data is decoded, so a whole folder can be calibrated by
+reading only its headers.
+
+Usage:
+    python resolution_metadata.py scans/ --unit mm --recursive
+"""
+
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from measurement import AVAILABLE_UNITS, UNITS_PER_INCH
+
+
+# Resolutions that many programs write when they know nothing better;
+# they are reported but not applied automatically
+SUSPECT_DPI = (72, 96)
+
+# Where each format keeps its resolution
+RESOLUTION_SOURCES = {
+    "PNG": "PNG pHYs",
+    "JPEG": "JPEG JFIF/EXIF",
+    "TIFF": "TIFF XResolution",
+    "BMP": "BMP header",
+}
+
+# Extensions considered by folder scans
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp")
+
+# Relative x/y resolution difference above which pixels are not square
+ANISOTROPY_TOLERANCE = 0.01
+
+
+class ResolutionCalibration:
+    """Resolution read from an image header."""
+    
+    __slots__ = ("dpi_x", "dpi_y", "source")
+    
+    def __init__(self, dpi_x, dpi_y, source):
+        """
+        Initialize a resolution record.
+        
+        Args:
+            dpi_x (float): Horizontal pixels per inch
+            dpi_y (float): Vertical pixels per inch
+            source (str): Where the value came from, e.g. "PNG pHYs"
+        """
+        self.dpi_x = dpi_x
+        self.dpi_y = dpi_y
+        self.source = source
+    
+    @property
+    def dpi(self):
+        """Resolution used for calibration (geometric mean of x and y)."""
+        return (self.dpi_x * self.dpi_y) ** 0.5
+    
+    @property
+    def anisotropic(self):
+        """True if horizontal and vertical resolution differ."""
+        return abs(self.dpi_x - self.dpi_y) > ANISOTROPY_TOLERANCE * max(self.dpi_x, self.dpi_y)
+    
+    @property
+    def suspect(self):
+        """True for common placeholder resolutions such as 72 DPI."""
+        return round(self.dpi_x) in SUSPECT_DPI and round(self.dpi_y) in SUSPECT_DPI
+    
+    def calibration_factor(self, unit):
+        """
+        Convert the resolution into a calibration factor.
+        
+        Args:
+            unit (str): One of measurement.AVAILABLE_UNITS
+        
+        Returns:
+            float: Units per pixel
+        """
+        return UNITS_PER_INCH[unit] / self.dpi
+    
+    def describe(self):
+        """Short description, e.g. '300 DPI from PNG pHYs'."""
+        if self.anisotropic:
+            return f"{self.dpi_x:g}x{self.dpi_y:g} DPI from {self.source}"
+        return f"{self.dpi_x:g} DPI from {self.source}"
+
+
+def snap_dpi(value):
+    """
+    Round resolutions that only differ from an integer by storage rounding.
+    
+    PNG and BMP store integer pixels per metre, so 300 DPI reads back as
+    299.9994.
+    """
+    nearest = round(value)
+    return float(nearest) if abs(value - nearest) < 0.01 else float(value)
+
+
+def read_resolution(source):
+    """
+    Read the resolution from an image header without decoding pixels.
+    
+    Args:
+        source: File path or an opened (not necessarily loaded) PIL image
+    
+    Returns:
+        ResolutionCalibration: The resolution, or None if the header has
+        no usable physical resolution
+    """
+    if isinstance(source, Image.Image):
+        return _resolution_from_info(source)
+    with Image.open(source) as image:
+        return _resolution_from_info(image)
+
+
+def _resolution_from_info(image):
+    """Build a ResolutionCalibration from an image's parsed header info."""
+    dpi = image.info.get("dpi")
+    if not dpi:
+        return None
+    try:
+        dpi_x, dpi_y = (snap_dpi(float(value)) for value in dpi)
+    except (TypeError, ValueError):
+        return None
+    # TIFF without a resolution unit reports 1 DPI; such values are ratios
+    if dpi_x <= 1 or dpi_y <= 1:
+        return None
+    source = RESOLUTION_SOURCES.get(image.format, f"{image.format} header")
+    return ResolutionCalibration(dpi_x, dpi_y, source)
+
+
+def list_images(directory, recursive=False):
+    """Return image file paths in a directory, sorted by name."""
+    paths = []
+    if recursive:
+        for root, _, files in os.walk(directory):
+            paths.extend(os.path.join(root, name) for name in files)
+    else:
+        paths = [entry.path for entry in os.scandir(directory) if entry.is_file()]
+    return sorted(path for path in paths if path.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def scan_folder(directory, recursive=False, workers=8):
+    """
+    Read the resolution of every image in a folder from headers only.
+    
+    Headers are small, so the scan is dominated by file system latency and
+    runs on a thread pool, which also suits network shares.
+    
+    Args:
+        directory (str): Folder to scan
+        recursive (bool): Include subfolders
+        workers (int): Concurrent header reads
+    
+    Yields:
+        tuple: (path, ResolutionCalibration or None, error message or None)
+        in file name order
+    """
+    def scan(path):
+        try:
+            return path, read_resolution(path), None
+        except (OSError, SyntaxError, ValueError) as e:
+            return path, None, str(e)
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(scan, list_images(directory, recursive))
+
+
+def main():
+    """Print the metadata calibration of every image in a folder as CSV."""
+    parser = argparse.ArgumentParser(description="Calibrate images from their resolution metadata")
+    parser.add_argument("directory", help="Folder of images")
+    parser.add_argument("--unit", choices=AVAILABLE_UNITS, default="mm", help="Calibration unit")
+    parser.add_argument("--recursive", action="store_true", help="Include subfolders")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent header reads")
+    args = parser.parse_args()
+    
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["path", "dpi_x", "dpi_y", "source", "calibration_factor", "unit", "note"])
+    for path, resolution, error in scan_folder(args.directory, args.recursive, args.workers):
+        if resolution is None:
+            writer.writerow([path, "", "", "", "", "", error or "no resolution metadata"])
+            continue
+        notes = []
+        if resolution.suspect:
+            notes.append("common default resolution")
+        if resolution.anisotropic:
+            notes.append("non-square pixels")
+        writer.writerow([
+            path,
+            f"{resolution.dpi_x:g}",
+            f"{resolution.dpi_y:g}",
+            resolution.source,
+            f"{resolution.calibration_factor(args.unit):.8g}",
+            args.unit,
+            "; ".join(notes)
+        ])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
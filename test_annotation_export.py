@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for strip-by-strip annotated image export.
+"""
+
+import os
+import tempfile
+import unittest
+
+from PIL import Image, ImageChops
+
+from annotation_export import (
+    Annotation,
+    AnnotationLayout,
+    PNGStreamWriter,
+    export_annotated_image,
+    load_font,
+)
+
+
+class TestAnnotatedExport(unittest.TestCase):
+    """Test exported images."""
+    
+    def setUp(self):
+        """Create a temporary output directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "annotated.png")
+    
+    def tearDown(self):
+        """Remove temporary files."""
+        self.temp_dir.cleanup()
+    
+    def test_png_writer_round_trip(self):
+        """Test streamed PNG rows decode to the original pixels."""
+        image = Image.radial_gradient("L").convert("RGB")
+        writer = PNGStreamWriter(self.path, image.width, image.height, "RGB")
+        for y0 in range(0, image.height, 50):
+            writer.write_rows(image.crop((0, y0, image.width, min(image.height, y0 + 50))))
+        writer.close()
+        
+        with Image.open(self.path) as written:
+            self.assertIsNone(ImageChops.difference(written.convert("RGB"), image).getbbox())
+    
+    def test_incomplete_png_is_rejected(self):
+        """Test closing before all rows are written fails."""
+        writer = PNGStreamWriter(self.path, 10, 10, "L")
+        writer.write_rows(Image.new("L", (10, 5)))
+        with self.assertRaises(ValueError):
+            writer.close()
+        writer.abort()
+        self.assertFalse(os.path.exists(self.path))
+    
+    def test_strips_match_single_pass_render(self):
+        """Test annotations crossing strip seams render identically."""
+        image = Image.new("L", (300, 200), 200)
+        annotations = [
+            Annotation("line", ((10, 10), (290, 190)), "25.0000 mm"),
+            Annotation("box", ((50, 40), (120, 150)), "Feature 1", color="#00a000"),
+            Annotation("line", ((0, 100), (299, 100)), "ref", color="red"),
+        ]
+        
+        export_annotated_image(image, annotations, self.path, strip_height=7, line_width=3)
+        
+        expected = image.convert("RGB")
+        AnnotationLayout(annotations, load_font(24), 3).draw_strip(expected, 0)
+        with Image.open(self.path) as written:
+            self.assertEqual(written.size, (300, 200))
+            self.assertIsNone(ImageChops.difference(written.convert("RGB"), expected).getbbox())
+    
+    def test_fractional_coordinates_do_not_depend_on_strip_height(self):
+        """Test lines and labels at fractional positions match for any strip height."""
+        image = Image.new("L", (400, 300), 200)
+        annotations = [
+            Annotation("line", ((12.5, -30.25), (390.75, 333.5)), "12.5000 mm"),
+            Annotation("line", ((-20.4, 150.5), (420.6, 97.3)), "diagonal", color="red"),
+            Annotation("box", ((60.5, 40.5), (131.7, 170.2)), "Feature 1", color="#00a000"),
+        ]
+        
+        single = os.path.join(self.temp_dir.name, "single.png")
+        export_annotated_image(image, annotations, single, strip_height=300, line_width=3)
+        with Image.open(single) as expected:
+            expected = expected.convert("RGB")
+        for strip_height in (1, 7, 37, 64):
+            export_annotated_image(image, annotations, self.path, strip_height=strip_height, line_width=3)
+            with Image.open(self.path) as written:
+                self.assertIsNone(
+                    ImageChops.difference(written.convert("RGB"), expected).getbbox(), strip_height
+                )
+    
+    def test_rgba_source_keeps_alpha(self):
+        """Test RGBA sources are exported with alpha."""
+        image = Image.new("RGBA", (20, 20), (0, 0, 0, 0))
+        progress = []
+        
+        export_annotated_image(image, [], self.path, strip_height=8, progress=progress.append)
+        
+        with Image.open(self.path) as written:
+            self.assertEqual(written.mode, "RGBA")
+        self.assertEqual(progress[-1], 1.0)
+    
+    def test_unknown_annotation_kind(self):
+        """Test invalid annotation kinds are rejected."""
+        with self.assertRaises(ValueError):
+            Annotation("circle", ((0, 0), (1, 1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
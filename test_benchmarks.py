@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for the benchmark runner and baseline comparison.
+"""
+
+import time
+import unittest
+
+from benchmarks import MAX_REPEATS, compare_results, run_benchmarks, time_call
+
+
+def document(**timings):
+    """Build a results document from name=seconds or name=(min, median) pairs."""
+    results = {}
+    for name, seconds in timings.items():
+        best, median = seconds if isinstance(seconds, tuple) else (seconds, seconds)
+        results[name] = {"min_s": best, "median_s": median}
+    return {"results": results}
+
+
+class TestTiming(unittest.TestCase):
+    """Test timing helpers and the runner."""
+    
+    def test_time_call_counts_repeats(self):
+        """Test every repeat calls the function once."""
+        calls = []
+        stats = time_call(lambda: calls.append(1), repeats=4, min_seconds=0.0)
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(stats["repeats"], 4)
+        self.assertLessEqual(stats["min_s"], stats["median_s"])
+    
+    def test_short_calls_are_repeated_more(self):
+        """Test fast benchmarks get extra repeats, up to the cap."""
+        stats = time_call(lambda: None, repeats=3, min_seconds=1.0)
+        self.assertEqual(stats["repeats"], MAX_REPEATS)
+        stats = time_call(lambda: time.sleep(0.01), repeats=3, min_seconds=0.05)
+        self.assertGreaterEqual(stats["repeats"], 5)
+        self.assertLess(stats["repeats"], MAX_REPEATS)
+    
+    def test_run_on_tiny_fixtures(self):
+        """Test the runner produces results for every fixture format."""
+        current = run_benchmarks(
+            "decode", repeats=1, sizes={"small": (60, 40), "large": (120, 80)}, progress=None,
+            min_seconds=0.0
+        )
+        self.assertEqual(len(current["results"]), 8)
+        self.assertIn("decode.tiff.large", current["results"])
+        self.assertIn("pillow", current)
+    
+    def test_service_throughput(self):
+        """Test the service benchmark talks to a running service."""
+        current = run_benchmarks(
+            "service", repeats=1, sizes={"small": (60, 40), "large": (120, 80)}, progress=None,
+            min_seconds=0.0
+        )
+        self.assertEqual(list(current["results"]), ["service.measure.4x50"])
+    
+    def test_run_by_exact_name(self):
+        """Test suspect benchmarks can be timed again on their own."""
+        current = run_benchmarks(
+            repeats=1, sizes={"small": (60, 40), "large": (120, 80)}, progress=None,
+            min_seconds=0.0, names={"decode.png.small", "resize.zoom3.large"}
+        )
+        self.assertEqual(sorted(current["results"]), ["decode.png.small", "resize.zoom3.large"])
+
+
+class TestCompare(unittest.TestCase):
+    """Test regression detection against a baseline."""
+    
+    def test_slowdown_beyond_threshold_fails(self):
+        """Test only slowdowns larger than the threshold are regressions."""
+        baseline = document(fast=0.100, slow=0.100)
+        current = document(fast=0.110, slow=0.150)
+        lines, regressions = compare_results(current, baseline, threshold=0.25)
+        self.assertEqual(regressions, ["slow"])
+        self.assertIn("REGRESSION", lines[1])
+    
+    def test_noise_floor_and_new_benchmarks(self):
+        """Test tiny slowdowns never fail and new benchmarks are reported."""
+        baseline = document(tiny=0.0001, short=0.005)
+        current = document(tiny=0.0005, short=0.0068, added=0.5)
+        lines, regressions = compare_results(current, baseline)
+        self.assertEqual(regressions, [])
+        self.assertIn("new", lines[0])
+    
+    def test_spread_widens_the_noise(self):
+        """Test a slowdown within either run's best-to-median spread passes."""
+        baseline = document(noisy=(0.020, 0.030), steady=(0.020, 0.021))
+        current = document(noisy=(0.028, 0.031), steady=(0.028, 0.029))
+        _, regressions = compare_results(current, baseline, threshold=0.25)
+        self.assertEqual(regressions, ["steady"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for least-squares and homography calibration.
+"""
+
+import unittest
+
+import numpy as np
+
+from calibration_fit import (
+    fit_anisotropic,
+    fit_calibration,
+    fit_homography,
+    fit_isotropic,
+)
+
+
+def random_segments(rng, count, sx, sy, noise=0.0):
+    """Reference segments with true lengths under x/y scales, plus click noise."""
+    segments = []
+    for _ in range(count):
+        p1 = rng.uniform(0, 1000, 2)
+        p2 = rng.uniform(0, 1000, 2)
+        length = np.hypot(sx * (p2[0] - p1[0]), sy * (p2[1] - p1[1]))
+        segments.append((tuple(p1 + rng.normal(0, noise, 2)), tuple(p2 + rng.normal(0, noise, 2)), length))
+    return segments
+
+
+class TestSegmentModels(unittest.TestCase):
+    """Test scale fits from reference segments."""
+    
+    def test_single_segment_matches_scalar_calibration(self):
+        """Test one reference reproduces the classic calibration factor."""
+        model = fit_isotropic([((0, 0), (300, 400), 50.0)])
+        self.assertAlmostEqual(model.scale, 0.1)
+        self.assertAlmostEqual(model.rms_residual, 0.0)
+    
+    def test_isotropic_averages_click_errors(self):
+        """Test many noisy references give a better scale than one."""
+        rng = np.random.default_rng(1)
+        segments = random_segments(rng, 200, 0.05, 0.05, noise=1.0)
+        model = fit_isotropic(segments)
+        self.assertAlmostEqual(model.scale, 0.05, delta=0.0005)
+        self.assertEqual(len(model.residuals), 200)
+        self.assertGreater(model.rms_residual, 0)
+    
+    def test_anisotropic_recovers_both_scales(self):
+        """Test separate x and y scales are recovered."""
+        rng = np.random.default_rng(2)
+        model = fit_anisotropic(random_segments(rng, 20, 0.1, 0.12))
+        self.assertAlmostEqual(model.matrix[0, 0], 0.1)
+        self.assertAlmostEqual(model.matrix[1, 1], 0.12)
+        self.assertLess(model.max_residual, 1e-9)
+    
+    def test_anisotropic_needs_two_directions(self):
+        """Test parallel references cannot separate x and y."""
+        segments = [((0, 0), (100, 0), 10.0), ((0, 50), (200, 50), 20.0)]
+        with self.assertRaises(ValueError):
+            fit_anisotropic(segments)
+    
+    def test_invalid_references(self):
+        """Test empty or non-positive references are rejected."""
+        with self.assertRaises(ValueError):
+            fit_isotropic([])
+        with self.assertRaises(ValueError):
+            fit_isotropic([((0, 0), (1, 0), 0.0)])
+
+
+class TestHomography(unittest.TestCase):
+    """Test perspective calibration from points of known position."""
+    
+    def setUp(self):
+        """Project a 10 mm grid through a known perspective transform."""
+        self.true_matrix = np.array([
+            [0.08, 0.01, 5.0],
+            [-0.005, 0.09, 2.0],
+            [0.00002, 0.00004, 1.0],
+        ])
+        world = np.array([(x, y) for x in range(0, 50, 10) for y in range(0, 40, 10)], dtype=float)
+        inverse = np.linalg.inv(self.true_matrix)
+        homogeneous = np.hstack([world, np.ones((len(world), 1))]) @ inverse.T
+        self.image_points = homogeneous[:, :2] / homogeneous[:, 2:3]
+        self.world_points = world
+    
+    def test_recovers_transform(self):
+        """Test the fitted matrix maps the grid back exactly."""
+        model = fit_homography(self.image_points, self.world_points)
+        np.testing.assert_allclose(model.matrix, self.true_matrix / self.true_matrix[2, 2], rtol=1e-6, atol=1e-9)
+        self.assertLess(model.max_residual, 1e-6)
+        np.testing.assert_allclose(model.to_world(self.image_points), self.world_points, atol=1e-6)
+    
+    def test_batched_distances(self):
+        """Test batched measurement equals per-segment measurement."""
+        model = fit_homography(self.image_points, self.world_points)
+        points1, points2 = self.image_points[:-1], self.image_points[1:]
+        batch = model.real_distances(points1, points2)
+        single = [model.real_distance(a, b) for a, b in zip(points1, points2)]
+        np.testing.assert_allclose(batch, single)
+        expected = np.hypot(*(self.world_points[1:] - self.world_points[:-1]).T)
+        np.testing.assert_allclose(batch, expected, atol=1e-6)
+    
+    def test_degenerate_points(self):
+        """Test too few or collinear points are rejected."""
+        with self.assertRaises(ValueError):
+            fit_homography(self.image_points[:3], self.world_points[:3])
+        line = [(x, 0.0) for x in range(6)]
+        with self.assertRaises(ValueError):
+            fit_homography(line, line)
+    
+    def test_points_also_feed_segment_models(self):
+        """Test known-position points act as references for scale fits."""
+        square = [(0, 0), (100, 0), (100, 100), (0, 100)]
+        world = [(0, 0), (10, 0), (10, 10), (0, 10)]
+        model = fit_calibration("isotropic", image_points=square, world_points=world)
+        self.assertAlmostEqual(model.scale, 0.1)
+        self.assertEqual(len(model.residuals), 6)
+        with self.assertRaises(ValueError):
+            fit_calibration("affine")
+
+
+if __name__ == '__main__':
+    unittest.main()
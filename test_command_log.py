@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for the undo/redo command log.
+"""
+
+import unittest
+
+from command_log import Command, CommandLog
+
+
+class TestCommandLog(unittest.TestCase):
+    """Test undo and redo stacks."""
+    
+    def test_undo_redo_order(self):
+        """Test commands are undone newest first and redone in reverse."""
+        log = CommandLog()
+        first = Command("calibration", before=None, after=0.1)
+        second = Command("measurement")
+        log.push(first)
+        log.push(second)
+        self.assertIs(log.undo(), second)
+        self.assertIs(log.undo(), first)
+        self.assertIsNone(log.undo())
+        self.assertIs(log.redo(), first)
+        self.assertTrue(log.can_undo())
+        self.assertTrue(log.can_redo())
+    
+    def test_new_command_discards_redo(self):
+        """Test a new command clears the redo history."""
+        log = CommandLog()
+        log.push(Command("measurement"))
+        log.undo()
+        log.push(Command("measurement"))
+        self.assertFalse(log.can_redo())
+    
+    def test_completed_pair_folds_points(self):
+        """Test point placements are dropped when their pair is used."""
+        log = CommandLog()
+        calibration = Command("calibration")
+        log.push(calibration)
+        log.push(Command("point", after=(1, 2)))
+        log.push(Command("point", after=(3, 4)))
+        measurement = Command("measurement")
+        log.push(measurement, consumes_points=True)
+        self.assertIs(log.undo(), measurement)
+        self.assertIs(log.undo(), calibration)
+    
+    def test_unit_change_keeps_pending_point(self):
+        """Test a unit change with one point placed leaves the point undoable."""
+        log = CommandLog()
+        point = Command("point", after=(1, 2))
+        log.push(point)
+        unit_change = Command("calibration", ("mm",), ("cm",))
+        log.push(unit_change)
+        
+        self.assertIs(log.undo(), unit_change)
+        self.assertIs(log.undo(), point)
+    
+    def test_pair_completed_after_unit_change(self):
+        """Test points on both sides of a unit change are all folded."""
+        log = CommandLog()
+        log.push(Command("point", after=(1, 2)))
+        unit_change = Command("calibration", ("mm",), ("cm",))
+        log.push(unit_change)
+        log.push(Command("point", after=(3, 4)))
+        measurement = Command("measurement")
+        log.push(measurement, consumes_points=True)
+        
+        self.assertIs(log.undo(), measurement)
+        self.assertIs(log.undo(), unit_change)
+        self.assertIsNone(log.undo())
+    
+    def test_drop_points(self):
+        """Test cleared points leave both stacks."""
+        log = CommandLog()
+        log.push(Command("measurement"))
+        log.push(Command("point", after=(1, 2)))
+        log.push(Command("point", after=(3, 4)))
+        log.undo()
+        log.drop_points()
+        self.assertEqual(log.undo().kind, "measurement")
+        log.redo()
+        self.assertFalse(log.can_redo())
+    
+    def test_point_counts_follow_the_stacks(self):
+        """Test the point counts stay right through undo, redo and a full history."""
+        log = CommandLog(limit=3)
+        log.push(Command("point", after=(0, 0)))
+        for index in range(3):
+            log.push(Command("calibration", after=index))
+        self.assertEqual(log.undo_points, 0)
+        
+        log.push(Command("point", after=(1, 2)))
+        log.push(Command("point", after=(3, 4)))
+        log.undo()
+        self.assertEqual((log.undo_points, log.redo_points), (1, 1))
+        log.redo()
+        log.drop_points()
+        self.assertEqual((log.undo_points, log.redo_points), (0, 0))
+        self.assertEqual([command.after for command in log.undo_stack], [2])
+    
+    def test_history_is_bounded(self):
+        """Test only the newest commands are kept."""
+        log = CommandLog(limit=100)
+        for index in range(5000):
+            log.push(Command("calibration", after=index))
+        self.assertEqual(len(log.undo_stack), 100)
+        self.assertEqual(log.undo().after, 4999)
+    
+    def test_unknown_kind(self):
+        """Test unknown command kinds are rejected."""
+        with self.assertRaises(ValueError):
+            Command("zoom")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for named dimensions and their tolerance checks.
+"""
+
+import unittest
+
+import numpy as np
+
+from calibration_fit import fit_calibration
+from dimensions import FAIL, PASS, UNCHECKED, DimensionTable, parse_specification
+
+
+class TestParseSpecification(unittest.TestCase):
+    """Test reading typed nominal values and tolerances."""
+    
+    def test_formats(self):
+        """Test the accepted ways of writing a tolerance."""
+        for text in ("12.5 ± 0.05", "12.5 +/- 0.05", "12.5, 0.05", " 12.5 0.05 "):
+            self.assertEqual(parse_specification(text), (12.5, 0.05))
+        self.assertEqual(parse_specification("8"), (8.0, 0.0))
+        self.assertEqual(parse_specification(""), (None, None))
+    
+    def test_invalid(self):
+        """Test text that is not a number is rejected."""
+        with self.assertRaises(ValueError):
+            parse_specification("about ten")
+
+
+class TestDimensionTable(unittest.TestCase):
+    """Test storage and vectorized re-evaluation."""
+    
+    def setUp(self):
+        """Create a table with one checked and one unchecked dimension."""
+        self.table = DimensionTable(capacity=2)
+        self.table.add("bore A", (0, 0), (100, 0), 100.0, 10.0, 0.1, "mm", items=(1, 2))
+        self.table.add("slot", (0, 0), (0, 50), 50.0)
+    
+    def test_pass_and_fail(self):
+        """Test only dimensions whose state changed are reported."""
+        np.testing.assert_array_equal(self.table.evaluate(0.1, "mm"), [0])
+        self.assertEqual(self.table.status[0], PASS)
+        self.assertEqual(self.table.status[1], UNCHECKED)
+        self.assertAlmostEqual(self.table.values[1], 5.0)
+        
+        np.testing.assert_array_equal(self.table.evaluate(0.1005, "mm"), [])
+        np.testing.assert_array_equal(self.table.evaluate(0.102, "mm"), [0])
+        self.assertEqual(self.table.status[0], FAIL)
+        self.assertEqual(self.table.counts(), (0, 1))
+        
+        np.testing.assert_array_equal(self.table.evaluate(None, "mm"), [0])
+        self.assertEqual(self.table.status[0], UNCHECKED)
+    
+    def test_nominal_converted_to_current_unit(self):
+        """Test a nominal in mm is checked against a calibration in cm."""
+        self.table.evaluate(0.01, "cm")
+        self.assertEqual(self.table.status[0], PASS)
+        self.table.evaluate(0.01 / 2.54, "inches")
+        self.assertEqual(self.table.status[0], PASS)
+        self.table.evaluate(0.011, "cm")
+        self.assertEqual(self.table.status[0], FAIL)
+    
+    def test_fitted_model(self):
+        """Test a fitted calibration measures every dimension at once."""
+        model = fit_calibration("anisotropic", segments=[((0, 0), (10, 0), 1.0), ((0, 0), (0, 10), 2.0)])
+        
+        self.table.evaluate(model.scale, "mm", model)
+        
+        np.testing.assert_allclose(self.table.values[:2], [10.0, 10.0])
+        self.assertEqual(self.table.status[0], PASS)
+    
+    def test_growth_and_removal(self):
+        """Test columns grow past the capacity and removal keeps order."""
+        for index in range(5):
+            self.table.add(f"d{index}", (0, 0), (index, 0), float(index), 1.0, 0.5, "mm")
+        self.table.evaluate(1.0, "mm")
+        
+        self.assertEqual(self.table.remove(0), (1, 2))
+        
+        self.assertEqual(len(self.table), 6)
+        self.assertEqual(self.table.names[:2], ["slot", "d0"])
+        self.assertEqual(list(self.table.status[1:4]), [FAIL, PASS, FAIL])
+        self.assertEqual(self.table.index_of("d1"), 2)
+        self.assertIsNone(self.table.index_of("bore A"))
+    
+    def test_describe(self):
+        """Test the one-line description includes the tolerance result."""
+        self.table.evaluate(0.1, "mm")
+        self.assertEqual(self.table.describe(0, "mm"), "bore A: 10.0000 mm (10 ± 0.1 mm) pass")
+        self.assertEqual(self.table.describe(1, "mm"), "slot: 5.0000 mm")
+
+
+if __name__ == "__main__":
+    unittest.main()
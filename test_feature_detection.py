@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests for automatic feature dimensioning.
+
+Strip-wise labelling is checked against a simple flood fill on random
+images, so seams between strips are exercised.
+"""
+
+import math
+import unittest
+from collections import deque
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from feature_detection import detect_features, otsu_threshold
+
+
+def flood_fill_components(mask, connectivity=8):
+    """Reference labelling: (x0, y0, x1, y1, area) of each component."""
+    height, width = mask.shape
+    seen = np.zeros_like(mask, dtype=bool)
+    if connectivity == 8:
+        steps = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx]
+    else:
+        steps = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    components = []
+    for y in range(height):
+        for x in range(width):
+            if not mask[y, x] or seen[y, x]:
+                continue
+            seen[y, x] = True
+            queue = deque([(y, x)])
+            box = [x, y, x, y, 0]
+            while queue:
+                cy, cx = queue.popleft()
+                box[0], box[1] = min(box[0], cx), min(box[1], cy)
+                box[2], box[3] = max(box[2], cx), max(box[3], cy)
+                box[4] += 1
+                for dy, dx in steps:
+                    ny, nx = cy + dy, cx + dx
+                    if 0 <= ny < height and 0 <= nx < width and mask[ny, nx] and not seen[ny, nx]:
+                        seen[ny, nx] = True
+                        queue.append((ny, nx))
+            components.append(tuple(box))
+    return sorted(components)
+
+
+def feature_boxes(features):
+    """Convert features to comparable tuples."""
+    return sorted((f.x0, f.y0, f.x1, f.y1, f.area) for f in features)
+
+
+class TestDetectFeatures(unittest.TestCase):
+    """Test connected-component detection."""
+    
+    def test_matches_flood_fill_across_strips(self):
+        """Test random blobs are labelled like a flood fill for any strip height."""
+        rng = np.random.default_rng(42)
+        for connectivity in (4, 8):
+            mask = rng.random((57, 43)) < 0.45
+            image = Image.fromarray(np.where(mask, 0, 255).astype(np.uint8))
+            expected = flood_fill_components(mask, connectivity)
+            for strip_height in (1, 2, 5, 16, 100):
+                features = detect_features(
+                    image,
+                    threshold=128,
+                    connectivity=connectivity,
+                    min_area=1,
+                    strip_height=strip_height
+                )
+                self.assertEqual(feature_boxes(features), expected,
+                                 f"connectivity={connectivity} strip_height={strip_height}")
+    
+    def test_u_shape_joined_across_strips(self):
+        """Test a U shape whose arms meet only in a later strip is one feature."""
+        image = Image.new("L", (30, 30), 255)
+        draw = ImageDraw.Draw(image)
+        draw.rectangle([2, 2, 5, 25], fill=0)
+        draw.rectangle([20, 2, 23, 25], fill=0)
+        draw.rectangle([2, 22, 23, 25], fill=0)
+        
+        features = list(detect_features(image, threshold=128, strip_height=4))
+        
+        self.assertEqual(len(features), 1)
+        self.assertEqual((features[0].width, features[0].height), (22, 24))
+    
+    def test_circle_dimensions_calibrated(self):
+        """Test a filled circle reports its diameter in calibrated units."""
+        image = Image.new("L", (200, 200), 255)
+        ImageDraw.Draw(image).ellipse([50, 50, 149, 149], fill=0)
+        
+        features = list(detect_features(image, strip_height=32))
+        self.assertEqual(len(features), 1)
+        
+        info = features[0].to_dict(calibration_factor=0.5, unit="mm")
+        self.assertEqual(info["unit"], "mm")
+        self.assertAlmostEqual(info["width"], 50.0)
+        self.assertAlmostEqual(info["equivalent_diameter"], 50.0, delta=0.5)
+        self.assertAlmostEqual(info["area"], math.pi * 25 * 25, delta=0.02 * math.pi * 625)
+    
+    def test_light_features_and_min_area(self):
+        """Test light features on dark background and noise filtering."""
+        image = Image.new("L", (40, 40), 0)
+        draw = ImageDraw.Draw(image)
+        draw.rectangle([5, 5, 14, 14], fill=255)
+        image.putpixel((30, 30), 255)
+        
+        features = list(detect_features(image, threshold=128, dark_features=False, min_area=4))
+        
+        self.assertEqual(feature_boxes(features), [(5, 5, 14, 14, 100)])
+    
+    def test_16bit_image(self):
+        """Test 16-bit images are thresholded on their full value range."""
+        image = Image.new("I;16", (20, 20), 60000)
+        image.paste(1000, (5, 5, 10, 10))
+        
+        features = list(detect_features(image, min_area=1))
+        
+        self.assertEqual(feature_boxes(features), [(5, 5, 9, 9, 25)])
+    
+    def test_otsu_threshold(self):
+        """Test the automatic threshold falls between two peaks."""
+        histogram = [0] * 256
+        histogram[30] = 500
+        histogram[220] = 500
+        threshold = otsu_threshold(histogram)
+        self.assertGreater(threshold, 30)
+        self.assertLessEqual(threshold, 220)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests for viewport-only grid and ruler overlays.
+"""
+
+import unittest
+
+from grid_overlay import (
+    ItemPool, MIN_GRID_PIXELS, format_value, grid_lines, grid_spacing, nice_spacing, ruler_ticks
+)
+
+
+class FakeCanvas:
+    """Records canvas item calls without a display."""
+    
+    def __init__(self):
+        self.items = {}
+        self.created = 0
+    
+    def create_line(self, *coords, **options):
+        """Create a fake line item."""
+        self.created += 1
+        self.items[self.created] = {"coords": coords, "state": "normal", **options}
+        return self.created
+    
+    create_text = create_line
+    
+    def coords(self, item, *coords):
+        """Move an item."""
+        self.items[item]["coords"] = coords
+    
+    def itemconfigure(self, item, **options):
+        """Change item options."""
+        self.items[item].update(options)
+
+
+class TestSpacing(unittest.TestCase):
+    """Test zoom-adaptive spacing."""
+    
+    def test_nice_spacing(self):
+        """Test values are rounded up to the 1-2-5 series."""
+        self.assertEqual(nice_spacing(1), 1)
+        self.assertEqual(nice_spacing(0.3), 0.5)
+        self.assertEqual(nice_spacing(3.1), 5)
+        self.assertEqual(nice_spacing(6), 10)
+        self.assertAlmostEqual(nice_spacing(0.07), 0.1)
+    
+    def test_requested_spacing_kept_when_visible(self):
+        """Test a 10 mm grid at 0.1 mm/px is drawn every 100 screen pixels."""
+        self.assertEqual(grid_spacing(0.1, 1.0, requested=10), 10)
+    
+    def test_spacing_grows_when_zoomed_out(self):
+        """Test the requested spacing is multiplied in 1-2-5 steps."""
+        self.assertEqual(grid_spacing(0.1, 0.1, requested=10), 20)
+        self.assertEqual(grid_spacing(0.1, 0.01, requested=10), 200)
+    
+    def test_line_count_bounded_at_any_zoom(self):
+        """Test a huge image never yields more lines than the viewport allows."""
+        view = (0, 0, 1600, 1200)
+        for zoom in (0.01, 0.1, 0.37, 1.0, 5.0):
+            spacing = grid_spacing(0.1, zoom, requested=1)
+            lines = grid_lines(view, (12000, 12000), zoom, 0.1, spacing)
+            self.assertLessEqual(len(lines), (1600 + 1200) / MIN_GRID_PIXELS + 2)
+
+
+class TestGridLines(unittest.TestCase):
+    """Test which grid lines are generated."""
+    
+    def test_only_lines_inside_the_view(self):
+        """Test lines are limited to the viewport and clipped to the image."""
+        lines = grid_lines((150, 0, 420, 1000), (500, 300), 1.0, 1.0, 100)
+        
+        vertical = [line for line in lines if line[0] == line[2]]
+        horizontal = [line for line in lines if line[1] == line[3]]
+        self.assertEqual([line[0] for line in vertical], [200, 300, 400])
+        self.assertEqual([line[1] for line in horizontal], [0, 100, 200, 300])
+        # Clipped to the image height and the view width
+        self.assertEqual(vertical[0][1:4:2], (0, 300))
+        self.assertEqual(horizontal[0][0:3:2], (150, 420))
+    
+    def test_view_outside_image(self):
+        """Test nothing is drawn when the image is scrolled out of view."""
+        self.assertEqual(grid_lines((600, 0, 900, 100), (500, 300), 1.0, 1.0, 10), [])
+    
+    def test_calibrated_spacing_uses_zoom(self):
+        """Test 10 mm at 0.5 mm/px and zoom 2 is 40 canvas pixels."""
+        lines = grid_lines((0, 0, 100, 1), (1000, 1000), 2.0, 0.5, 10)
+        
+        self.assertEqual([line[0] for line in lines if line[0] == line[2]], [0, 40, 80])
+
+
+class TestRulerTicks(unittest.TestCase):
+    """Test ruler ticks and labels."""
+    
+    def test_labels_and_subdivisions(self):
+        """Test labelled ticks fall on round values with minor ticks between."""
+        ticks = ruler_ticks(0, 200, 0.1, 1.0)
+        
+        labelled = [value for _, value, major in ticks if major]
+        self.assertEqual(labelled, [0, 10, 20])
+        self.assertEqual(ticks[1][:2], (10.0, 1.0))
+    
+    def test_format_value(self):
+        """Test float noise is hidden in labels."""
+        self.assertEqual(format_value(0.1 * 3), "0.3")
+        self.assertEqual(format_value(20.0), "20")
+
+
+class TestItemPool(unittest.TestCase):
+    """Test canvas item recycling."""
+    
+    def test_items_are_reused(self):
+        """Test scrolling moves existing items instead of creating new ones."""
+        canvas = FakeCanvas()
+        pool = ItemPool(canvas, "line", ("grid",), fill="blue")
+        
+        pool.update([(0, 0, 0, 10), (5, 0, 5, 10)])
+        pool.update([(1, 0, 1, 10), (6, 0, 6, 10)])
+        
+        self.assertEqual(canvas.created, 2)
+        self.assertEqual(canvas.items[1]["coords"], (1, 0, 1, 10))
+        self.assertEqual(canvas.items[1]["tags"], ("grid",))
+    
+    def test_unused_items_are_hidden_and_shown_again(self):
+        """Test shrinking hides items and growing shows them again."""
+        canvas = FakeCanvas()
+        pool = ItemPool(canvas, "line", ("grid",))
+        pool.update([(0, 0, 0, 1)] * 3)
+        
+        pool.update([(0, 0, 0, 1)])
+        self.assertEqual([canvas.items[i]["state"] for i in (1, 2, 3)], ["normal", "hidden", "hidden"])
+        
+        pool.update([(0, 0, 0, 1)] * 2)
+        self.assertEqual([canvas.items[i]["state"] for i in (1, 2, 3)], ["normal", "normal", "hidden"])
+        self.assertEqual(canvas.created, 3)
+    
+    def test_limit_caps_item_count(self):
+        """Test the pool never grows beyond its limit."""
+        canvas = FakeCanvas()
+        pool = ItemPool(canvas, "text", ("ruler",), limit=4)
+        
+        shown = pool.update([(i, 0) for i in range(10)], texts=[str(i) for i in range(10)])
+        
+        self.assertEqual(shown, 4)
+        self.assertEqual(canvas.created, 4)
+        self.assertEqual(canvas.items[4]["text"], "3")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests for revision alignment and the tiled comparison overlay.
+"""
+
+import unittest
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from image_compare import (
+    Alignment, align_images, build_pyramid, phase_correlation,
+    reduction_levels, render_tile, visible_tiles
+)
+
+
+def drawing(size, offset=(0, 0), scale=1.0, extent=(1400, 1400), count=120):
+    """Line drawing of random rectangles, optionally shifted and scaled."""
+    image = Image.new("L", size, 255)
+    draw = ImageDraw.Draw(image)
+    rng = np.random.default_rng(7)
+    for _ in range(count):
+        x, y = rng.integers(0, extent[0]), rng.integers(0, extent[1])
+        width, height = rng.integers(20, 200, 2)
+        # Rounded, as ImageDraw would truncate and shift the drawing by half a pixel
+        draw.rectangle(
+            [round(offset[0] + x * scale), round(offset[1] + y * scale),
+             round(offset[0] + (x + width) * scale), round(offset[1] + (y + height) * scale)],
+            outline=0,
+            width=max(1, round(2 * scale))
+        )
+    return image
+
+
+class TestPhaseCorrelation(unittest.TestCase):
+    """Test translation estimates."""
+    
+    def test_recovers_integer_shift(self):
+        """Test a rolled array is matched back to the reference."""
+        reference = np.asarray(drawing((256, 256)), dtype=np.float32)
+        moving = np.roll(reference, (5, -9), axis=(0, 1))
+        
+        dx, dy, peak = phase_correlation(reference, moving)
+        
+        self.assertAlmostEqual(dx, 9, delta=0.2)
+        self.assertAlmostEqual(dy, -5, delta=0.2)
+        self.assertGreater(peak, 0.5)
+    
+    def test_pyramid_halves_each_level(self):
+        """Test pyramid levels halve until the minimum size."""
+        levels = build_pyramid(np.zeros((300, 520), dtype=np.float32), min_size=64)
+        
+        self.assertEqual([level.shape for level in levels], [(300, 520), (150, 260), (75, 130)])
+
+
+class TestAlignImages(unittest.TestCase):
+    """Test registration of whole revisions."""
+    
+    def test_shift_between_revisions(self):
+        """Test a shifted revision is aligned to within a pixel."""
+        alignment = align_images(drawing((1600, 1200)), drawing((1600, 1200), offset=(37, -21)))
+        
+        self.assertAlmostEqual(alignment.scale, 1.0, places=3)
+        self.assertAlmostEqual(alignment.dx, -37, delta=1)
+        self.assertAlmostEqual(alignment.dy, 21, delta=1)
+    
+    def test_scale_between_revisions(self):
+        """Test a revision scanned at a higher resolution is scaled back."""
+        alignment = align_images(
+            drawing((1600, 1200)), drawing((2000, 1500), offset=(30, 20), scale=1.25)
+        )
+        
+        self.assertAlmostEqual(alignment.scale, 0.8, delta=0.005)
+        # Moving (30, 20) is the reference origin
+        np.testing.assert_allclose(alignment.to_reference([(30, 20)]), [(0, 0)], atol=1.5)
+    
+    def test_scale_and_shift_across_the_sheet(self):
+        """Test a rescaled, shifted revision maps to within half a pixel at every corner."""
+        reference = drawing((3000, 2000), extent=(2800, 1800), count=400)
+        moving = drawing((3200, 2150), offset=(10, 5), scale=1.05, extent=(2800, 1800), count=400)
+        
+        alignment = align_images(reference, moving)
+        
+        corners = np.array([(0, 0), (2900, 0), (0, 1900), (2900, 1900)], dtype=np.float64)
+        np.testing.assert_allclose(alignment.to_reference(corners * 1.05 + (10, 5)), corners, atol=0.5)
+        self.assertAlmostEqual(alignment.scale, 1 / 1.05, delta=2e-4)
+
+
+class TestAlignment(unittest.TestCase):
+    """Test point projection between the two images."""
+    
+    def test_round_trip(self):
+        """Test projecting to the moving image and back is the identity."""
+        alignment = Alignment(1.25, 10.0, -4.0)
+        points = np.array([(0.0, 0.0), (100.0, 50.0)])
+        
+        np.testing.assert_allclose(alignment.to_reference(alignment.to_moving(points)), points)
+
+
+class TestTiles(unittest.TestCase):
+    """Test viewport tiling and tile rendering."""
+    
+    def test_only_visible_tiles(self):
+        """Test tiles are limited to the viewport and the image."""
+        tiles = visible_tiles((300, 0, 700, 200), (1000, 1000), 1.0, tile_size=256)
+        
+        self.assertEqual(tiles, [(1, 0), (2, 0)])
+        self.assertEqual(visible_tiles((0, 0, 800, 800), (100, 100), 2.0, tile_size=256), [(0, 0)])
+        self.assertEqual(visible_tiles((500, 500, 800, 800), (100, 100), 1.0), [])
+    
+    def test_identical_images_show_no_difference(self):
+        """Test aligned identical content renders without colour."""
+        image = drawing((600, 600))
+        levels = reduction_levels(image)
+        
+        tile = render_tile(levels, levels, Alignment(), 0, 0, 1.0, mode="difference")
+        
+        rgb = np.asarray(tile, dtype=np.int16)
+        self.assertEqual(tile.size, (256, 256))
+        self.assertEqual(int(np.abs(rgb[..., 0] - rgb[..., 2]).max()), 0)
+    
+    def test_difference_colours_changes(self):
+        """Test removed content is red and added content is blue."""
+        reference = Image.new("L", (256, 256), 255)
+        ImageDraw.Draw(reference).rectangle([10, 10, 50, 50], fill=0)
+        moving = Image.new("L", (256, 256), 255)
+        ImageDraw.Draw(moving).rectangle([100, 100, 140, 140], fill=0)
+        
+        tile = np.asarray(render_tile(
+            reduction_levels(reference), reduction_levels(moving), Alignment(), 0, 0, 1.0, mode="difference"
+        ))
+        
+        red, green, blue = tile[30, 30]
+        self.assertGreater(int(red), int(blue) + 100)
+        red, green, blue = tile[120, 120]
+        self.assertGreater(int(blue), int(red) + 100)
+    
+    def test_tile_follows_alignment_and_zoom(self):
+        """Test the moving image is resampled into the reference frame."""
+        reference = Image.new("L", (512, 512), 255)
+        moving = Image.new("L", (512, 512), 255)
+        ImageDraw.Draw(moving).rectangle([60, 60, 99, 99], fill=0)
+        # Moving content appears 20 px further right/down in the reference
+        alignment = Alignment(1.0, 20.0, 20.0)
+        
+        tile = np.asarray(render_tile(
+            reduction_levels(reference), reduction_levels(moving), alignment, 0, 0, 2.0, mode="blend", alpha=1.0
+        ))
+        
+        # Reference (80..119) at zoom 2 is canvas 160..239
+        self.assertLess(int(tile[200, 200]), 10)
+        self.assertEqual(int(tile[150, 150]), 255)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the display-mode conversion helpers.
+
+Uses small in-memory images, no GUI required.
+"""
+
+import unittest
+
+from PIL import Image
+
+from imaging import to_display_mode, resize_for_display, magnify_region, DISPLAY_MODES
+
+
+class TestDisplayModeConversion(unittest.TestCase):
+    """Test conversion of source images into display modes."""
+    
+    def test_display_modes_returned_unchanged(self):
+        """Test that L/RGB/RGBA images are passed through without copying."""
+        for mode in DISPLAY_MODES:
+            image = Image.new(mode, (4, 4))
+            self.assertIs(to_display_mode(image), image)
+    
+    def test_palette_without_transparency(self):
+        """Test palette image converts to RGB."""
+        image = Image.new("P", (4, 4))
+        self.assertEqual(to_display_mode(image).mode, "RGB")
+    
+    def test_palette_with_transparency(self):
+        """Test palette image with transparent index converts to RGBA."""
+        image = Image.new("P", (4, 4))
+        image.info["transparency"] = 0
+        self.assertEqual(to_display_mode(image).mode, "RGBA")
+    
+    def test_grayscale_alpha(self):
+        """Test LA converts to RGBA so Tk can show it."""
+        image = Image.new("LA", (4, 4))
+        self.assertEqual(to_display_mode(image).mode, "RGBA")
+    
+    def test_cmyk(self):
+        """Test CMYK converts to RGB."""
+        image = Image.new("CMYK", (4, 4))
+        self.assertEqual(to_display_mode(image).mode, "RGB")
+    
+    def test_16bit_is_stretched_not_clipped(self):
+        """Test 16-bit values are mapped onto the full 8-bit range."""
+        image = Image.new("I;16", (2, 1))
+        image.putpixel((0, 0), 1000)
+        image.putpixel((1, 0), 4000)
+        
+        converted = to_display_mode(image)
+        
+        self.assertEqual(converted.mode, "L")
+        self.assertEqual(converted.getpixel((0, 0)), 0)
+        self.assertEqual(converted.getpixel((1, 0)), 255)
+    
+    def test_16bit_flat_image(self):
+        """Test a constant 16-bit image does not divide by zero."""
+        image = Image.new("I;16", (3, 3), 500)
+        converted = to_display_mode(image)
+        self.assertEqual(converted.getextrema(), (255, 255))
+    
+    def test_float_image(self):
+        """Test float images are rescaled to 8 bits."""
+        image = Image.new("F", (2, 1))
+        image.putpixel((0, 0), 0.0)
+        image.putpixel((1, 0), 1.0)
+        
+        converted = to_display_mode(image)
+        
+        self.assertEqual(converted.mode, "L")
+        self.assertEqual(converted.getpixel((1, 0)), 255)
+    
+    def test_original_untouched(self):
+        """Test conversion never modifies the source image."""
+        image = Image.new("I;16", (2, 2), 40000)
+        to_display_mode(image)
+        self.assertEqual(image.mode, "I;16")
+        self.assertEqual(image.getpixel((0, 0)), 40000)
+
+
+class TestResizeForDisplay(unittest.TestCase):
+    """Test display resizing."""
+    
+    def test_same_size_returns_input(self):
+        """Test no resize is performed at zoom 1.0."""
+        image = Image.new("RGB", (10, 10))
+        self.assertIs(resize_for_display(image, (10, 10)), image)
+    
+    def test_downscale(self):
+        """Test downscaling produces the requested size and keeps mode."""
+        image = Image.new("RGBA", (100, 50))
+        resized = resize_for_display(image, (10, 5))
+        self.assertEqual(resized.size, (10, 5))
+        self.assertEqual(resized.mode, "RGBA")
+    
+    def test_upscale(self):
+        """Test upscaling produces the requested size."""
+        image = Image.new("L", (10, 10))
+        self.assertEqual(resize_for_display(image, (25, 25)).size, (25, 25))
+    
+    def test_minimum_size(self):
+        """Test a zero target size is clamped to one pixel."""
+        image = Image.new("L", (10, 10))
+        self.assertEqual(resize_for_display(image, (0, 0)).size, (1, 1))
+
+
+
+class TestMagnifyRegion(unittest.TestCase):
+    """Test the magnifier crop."""
+    
+    def test_output_size(self):
+        """Test the loupe image is source_size * magnification square."""
+        image = Image.new("RGB", (100, 100))
+        region = magnify_region(image, (50, 50), 11, 16)
+        self.assertEqual(region.size, (176, 176))
+        
+    def test_center_pixel(self):
+        """Test the pixel under the cursor ends up in the middle block."""
+        image = Image.new("L", (100, 100), 0)
+        image.putpixel((40, 60), 255)
+        
+        region = magnify_region(image, (40.7, 60.2), 5, 8)
+        
+        self.assertEqual(region.getpixel((2 * 8, 2 * 8)), 255)
+        self.assertEqual(region.getpixel((2 * 8 + 7, 2 * 8 + 7)), 255)
+        self.assertEqual(region.getpixel((1 * 8, 2 * 8)), 0)
+        
+    def test_outside_image(self):
+        """Test cropping past the image border pads instead of failing."""
+        image = Image.new("L", (10, 10), 200)
+        region = magnify_region(image, (0, 0), 5, 8)
+        self.assertEqual(region.getpixel((0, 0)), 0)
+        self.assertEqual(region.getpixel((39, 39)), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for input trace recording, replay and latency reports.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from input_trace import (
+    HandlerTimer,
+    compare_reports,
+    event_name,
+    percentile,
+    read_trace,
+    replay,
+    summarize,
+    synthesize_trace,
+    write_trace,
+)
+
+
+class TestStatistics(unittest.TestCase):
+    """Test percentile and summary helpers."""
+    
+    def test_nearest_rank_percentile(self):
+        """Test percentiles use the nearest-rank definition."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile([7], 90), 7)
+        self.assertIsNone(percentile([], 50))
+    
+    def test_summary_is_in_milliseconds(self):
+        """Test summaries convert seconds to milliseconds."""
+        stats = summarize([0.001, 0.002, 0.003, 0.010])
+        self.assertEqual(stats["count"], 4)
+        self.assertAlmostEqual(stats["p50_ms"], 2.0)
+        self.assertAlmostEqual(stats["max_ms"], 10.0)
+        self.assertAlmostEqual(stats["mean_ms"], 4.0)
+    
+    def test_compare_reports(self):
+        """Test baseline comparison reports the relative change."""
+        baseline = {"handlers": {"on_zoom": {"p50_ms": 10.0, "p99_ms": 20.0}}, "frames": {}}
+        current = {"handlers": {"on_zoom": {"p50_ms": 5.0, "p99_ms": 30.0}}, "frames": {}}
+        lines = compare_reports(current, baseline)
+        self.assertEqual(len(lines), 2)
+        self.assertIn("-50.0%", lines[0])
+        self.assertIn("+50.0%", lines[1])
+
+
+class TestTraces(unittest.TestCase):
+    """Test trace files and synthetic traces."""
+    
+    def test_round_trip(self):
+        """Test a written trace reads back unchanged."""
+        events = synthesize_trace(50, seed=3)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "trace.jsonl")
+            write_trace(path, events)
+            self.assertEqual(read_trace(path), events)
+    
+    def test_synthetic_trace_is_deterministic(self):
+        """Test the same seed gives the same trace."""
+        self.assertEqual(synthesize_trace(100, seed=1), synthesize_trace(100, seed=1))
+        events = synthesize_trace(100, seed=1)
+        self.assertEqual(events[0]["type"], "meta")
+        times = [event["t"] for event in events]
+        self.assertEqual(times, sorted(times))
+        json.dumps(events)
+    
+    def test_event_names(self):
+        """Test wheel events are named by modifier."""
+        self.assertEqual(event_name({"type": "wheel", "state": 0x4}), "ctrl-wheel")
+        self.assertEqual(event_name({"type": "wheel", "state": 0x1}), "shift-wheel")
+        self.assertEqual(event_name({"type": "wheel", "state": 0}), "wheel")
+        self.assertEqual(event_name({"type": "motion", "state": 0}), "motion")
+
+
+class TestHandlerTimer(unittest.TestCase):
+    """Test handler instrumentation."""
+    
+    def test_instrument_and_restore(self):
+        """Test wrapped methods are timed and restored afterwards."""
+        class Handlers:
+            def on_zoom(self, value):
+                return value * 2
+        
+        original = Handlers.on_zoom
+        timer = HandlerTimer()
+        restore = timer.instrument(Handlers, ("on_zoom", "missing"))
+        self.assertEqual(Handlers().on_zoom(4), 8)
+        self.assertEqual(len(timer.samples["on_zoom"]), 1)
+        self.assertNotIn("missing", timer.samples)
+        restore()
+        self.assertIs(Handlers.on_zoom, original)
+
+
+@unittest.skipUnless(os.environ.get("DISPLAY"), "replay needs an X display")
+class TestReplay(unittest.TestCase):
+    """Test a short replay against the real application."""
+    
+    def test_replay_reports_handlers(self):
+        """Test a synthetic trace exercises zoom and click handlers."""
+        report = replay(synthesize_trace(40, seed=2), image_size=(1200, 900))
+        self.assertEqual(report["events"], 40)
+        self.assertIn("on_zoom", report["handlers"])
+        self.assertIn("display_image", report["handlers"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for line-profile sampling and edge detection.
+"""
+
+import unittest
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from line_profile import sample_profile, find_edges
+
+
+def blurred_bar_image():
+    """White image with a blurred dark vertical bar covering x = 40..59."""
+    image = Image.new("L", (100, 100), 255)
+    ImageDraw.Draw(image).rectangle([40, 0, 59, 99], fill=0)
+    return image.filter(ImageFilter.GaussianBlur(2))
+
+
+class TestSampleProfile(unittest.TestCase):
+    """Test bilinear profile sampling."""
+    
+    def test_linear_ramp_is_interpolated(self):
+        """Test sub-pixel samples on a ramp are interpolated exactly."""
+        ramp = np.tile(np.arange(0, 200, 10, dtype=np.uint8), (5, 1))
+        image = Image.fromarray(ramp)
+        
+        positions, values = sample_profile(image, (2.0, 2.0), (4.0, 2.0), step=0.5)
+        
+        np.testing.assert_allclose(positions, [0, 0.5, 1, 1.5, 2])
+        np.testing.assert_allclose(values, [20, 25, 30, 35, 40])
+    
+    def test_reads_only_near_the_line(self):
+        """Test a long diagonal never crops anything close to the full image."""
+        image = Image.new("L", (2000, 2000), 128)
+        original_crop = image.crop
+        areas = []
+        
+        def spy_crop(box):
+            areas.append((box[2] - box[0]) * (box[3] - box[1]))
+            return original_crop(box)
+        
+        image.crop = spy_crop
+        sample_profile(image, (0, 0), (1999, 1999))
+        
+        self.assertLess(max(areas), 20 * 20)
+        self.assertLess(sum(areas), 0.05 * 2000 * 2000)
+    
+    def test_clamps_outside_points(self):
+        """Test points beyond the border sample the edge pixels."""
+        image = Image.new("L", (10, 10), 77)
+        _, values = sample_profile(image, (-5, 5), (15, 5))
+        np.testing.assert_allclose(values, 77)
+
+
+class TestFindEdges(unittest.TestCase):
+    """Test edge location on blurred edges."""
+    
+    def test_threshold_edges(self):
+        """Test 50% crossings give the true bar width."""
+        positions, values = sample_profile(blurred_bar_image(), (20, 50), (80, 50))
+        first, second = find_edges(positions, values, "threshold")
+        
+        self.assertAlmostEqual(first + 20, 39.5, delta=0.1)
+        self.assertAlmostEqual(second - first, 20.0, delta=0.1)
+    
+    def test_gradient_edges(self):
+        """Test strongest slopes give the true bar width."""
+        positions, values = sample_profile(blurred_bar_image(), (20, 50), (80, 50))
+        first, second = find_edges(positions, values, "gradient")
+        
+        self.assertAlmostEqual(second - first, 20.0, delta=0.3)
+    
+    def test_flat_profile_has_no_edges(self):
+        """Test a uniform region reports no edges."""
+        positions = np.linspace(0, 10, 41)
+        self.assertIsNone(find_edges(positions, np.full(41, 5.0)))
+    
+    def test_unknown_method(self):
+        """Test an invalid method is rejected."""
+        with self.assertRaises(ValueError):
+            find_edges(np.arange(3.0), np.arange(3.0), "magic")
+
+
+if __name__ == '__main__':
+    unittest.main()
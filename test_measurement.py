@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the GUI-free measurement module.
+"""
+
+import unittest
+
+from measurement import (
+    calculate_distance,
+    calculate_calibration_factor,
+    calculate_real_distance,
+    measure_segments,
+)
+
+
+class TestMeasurement(unittest.TestCase):
+    """Test the shared measurement functions."""
+    
+    def test_distance(self):
+        """Test the Euclidean distance."""
+        self.assertEqual(calculate_distance((0, 0), (3, 4)), 5.0)
+    
+    def test_calibration_factor(self):
+        """Test units per pixel."""
+        self.assertEqual(calculate_calibration_factor(100.0, 10.0), 0.1)
+    
+    def test_calibration_points_too_close(self):
+        """Test calibration under one pixel is rejected."""
+        with self.assertRaises(ValueError):
+            calculate_calibration_factor(0.5, 10.0)
+    
+    def test_calibration_invalid_distance(self):
+        """Test a non-positive known distance is rejected."""
+        with self.assertRaises(ValueError):
+            calculate_calibration_factor(100.0, 0)
+    
+    def test_real_distance(self):
+        """Test pixel to real conversion."""
+        self.assertEqual(calculate_real_distance(250.0, 0.1), 25.0)
+    
+    def test_measure_segments(self):
+        """Test batch measurement."""
+        results = measure_segments([((0, 0), (3, 4)), ((0, 0), (10, 0))], 2.0)
+        self.assertEqual(results, [(5.0, 10.0), (10.0, 20.0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
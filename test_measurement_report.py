@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming measurement reports.
+"""
+
+import csv
+import os
+import statistics
+import tempfile
+import tracemalloc
+import unittest
+
+from PIL import Image
+
+from measurement_report import (
+    RunningStats, Specification, read_specifications, thumbnail_data_uri, write_report
+)
+from measurement_store import MeasurementStore
+
+
+class TestRunningStats(unittest.TestCase):
+    """Test one-pass statistics."""
+    
+    def test_matches_statistics_module(self):
+        """Test count, extremes, mean and sample standard deviation."""
+        values = [10.02, 9.98, 10.05, 9.91, 10.00, 10.10]
+        stats = RunningStats()
+        for value in values:
+            stats.add(value)
+        
+        self.assertEqual(stats.count, 6)
+        self.assertEqual((stats.minimum, stats.maximum), (9.91, 10.10))
+        self.assertAlmostEqual(stats.mean, statistics.mean(values))
+        self.assertAlmostEqual(stats.stddev, statistics.stdev(values))
+    
+    def test_single_value_and_results(self):
+        """Test a single value has no spread and pass/fail is counted."""
+        stats = RunningStats()
+        stats.add(5.0, passed=True)
+        self.assertEqual(stats.stddev, 0.0)
+        self.assertEqual(stats.result, "pass")
+        stats.add(6.0, passed=False)
+        self.assertEqual(stats.result, "fail")
+        self.assertEqual((stats.passed, stats.failed), (1, 1))
+    
+    def test_specification_limits(self):
+        """Test values on the limit pass and values outside fail."""
+        specification = Specification(10.0, 0.1, "mm")
+        self.assertTrue(specification.passes(10.1))
+        self.assertTrue(specification.passes(9.9))
+        self.assertFalse(specification.passes(10.11))
+        self.assertTrue(specification.applies_to("mm"))
+        self.assertFalse(specification.applies_to("inches"))
+
+
+class TestWriteReport(unittest.TestCase):
+    """Test HTML and CSV reports written from a store."""
+    
+    def setUp(self):
+        """Create a store with measurements on two images."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = MeasurementStore(":memory:")
+        self.image_path = os.path.join(self.temp_dir.name, "plate.png")
+        Image.new("RGB", (400, 300), "white").save(self.image_path)
+        plate = self.store.add_image(self.image_path, "plate")
+        bracket = self.store.add_image("/missing/bracket.png", "bracket")
+        for index, value in enumerate((10.02, 9.97, 10.15)):
+            self.store.add_measurement(plate, None, ((0, 0), (1, 0)), 100.0, value, "mm",
+                                       label="bore A", timestamp=100 + index)
+        self.store.add_measurement(bracket, None, ((0, 0), (1, 0)), 200.0, 20.0, "mm",
+                                   label="bore A", timestamp=50)
+        self.store.add_measurement(bracket, None, ((0, 0), (1, 0)), 42.0, timestamp=60)
+        self.specifications = {"bore A": Specification(10.0, 0.1, "mm")}
+    
+    def tearDown(self):
+        """Close the store and remove the folder."""
+        self.store.close()
+        self.temp_dir.cleanup()
+    
+    def test_csv_summaries(self):
+        """Test per-image rows and a job row with statistics and pass/fail."""
+        path = os.path.join(self.temp_dir.name, "report.csv")
+        
+        result = write_report(self.store, path, specifications=self.specifications)
+        
+        with open(path, newline="") as report:
+            rows = list(csv.DictReader(report))
+        self.assertEqual(result, {"images": 2, "measurements": 5, "failed": 2})
+        plate = next(row for row in rows if row["scope"] == "image" and row["image"] == self.image_path)
+        self.assertEqual((plate["count"], plate["passed"], plate["failed"], plate["result"]), ("3", "2", "1", "fail"))
+        self.assertEqual(plate["max"], "10.1500")
+        job = [row for row in rows if row["scope"] == "job"]
+        self.assertEqual([(row["label"], row["unit"], row["count"]) for row in job],
+                         [("bore A", "mm", "4"), ("distance", "px", "1")])
+        self.assertEqual(job[0]["nominal"], "10.0")
+    
+    def test_stored_nominals_are_checked(self):
+        """Test named dimensions are checked against their stored tolerance."""
+        image_id = self.store.add_image("/missing/shaft.png", "shaft")
+        self.store.add_measurement(image_id, None, ((0, 0), (1, 0)), 50.0, 5.2, "mm",
+                                   label="shaft", nominal=5.0, tolerance=0.1, timestamp=200)
+        path = os.path.join(self.temp_dir.name, "report.csv")
+        
+        result = write_report(self.store, path, specifications=self.specifications)
+        
+        self.assertEqual(result["failed"], 3)
+        self.assertEqual(list(self.specifications), ["bore A"])
+    
+    def test_each_row_uses_its_own_stored_nominal(self):
+        """Test one label with different stored nominals on two images is checked per row."""
+        path = os.path.join(self.temp_dir.name, "report.csv")
+        for name, nominal in (("a.png", 12.5), ("b.png", 20.0)):
+            image_id = self.store.add_image(f"/missing/{name}", name)
+            self.store.add_measurement(image_id, None, ((0, 0), (1, 0)), 100.0, nominal, "mm",
+                                       label="bore B", nominal=nominal, tolerance=0.05, timestamp=300)
+        
+        result = write_report(self.store, path)
+        
+        with open(path, newline="") as report:
+            rows = [row for row in csv.DictReader(report) if row["label"] == "bore B"]
+        self.assertEqual(result["failed"], 0)
+        self.assertEqual([(row["scope"], row["nominal"], row["result"]) for row in rows], [
+            ("image", "12.5", "pass"), ("image", "20.0", "pass"),
+            ("job", "12.5", "pass"), ("job", "20.0", "pass"),
+        ])
+    
+    def test_html_with_thumbnails(self):
+        """Test the HTML report embeds thumbnails of images that exist."""
+        path = os.path.join(self.temp_dir.name, "report.html")
+        
+        write_report(self.store, path, specifications=self.specifications)
+        
+        with open(path, encoding="utf-8") as report:
+            page = report.read()
+        self.assertEqual(page.count("data:image/png;base64,"), 1)
+        self.assertIn("Job summary (2 images)", page)
+        self.assertIn("class=\"fail\"", page)
+        self.assertIn("10 ± 0.1", page)
+        self.assertTrue(page.rstrip().endswith("</html>"))
+    
+    def test_filters(self):
+        """Test store filters limit the report."""
+        path = os.path.join(self.temp_dir.name, "report.csv")
+        
+        result = write_report(self.store, path, image_hash="plate")
+        
+        self.assertEqual(result["images"], 1)
+        self.assertEqual(result["measurements"], 3)
+    
+    def test_thumbnail_size(self):
+        """Test thumbnails are bounded and unreadable files are skipped."""
+        self.assertIsNotNone(thumbnail_data_uri(self.image_path))
+        self.assertIsNone(thumbnail_data_uri(os.path.join(self.temp_dir.name, "missing.png")))
+    
+    def test_memory_does_not_grow_with_rows(self):
+        """Test a large report keeps only running sums in memory."""
+        for image in range(20):
+            image_id = self.store.add_image(f"/none/{image}.png", f"h{image}")
+            self.store.add_measurements(
+                (image_id, None, 1000 + i, "distance", 0, 0, 1, 0, float(i), i * 0.1, "mm", f"dim {i % 5}", None, None)
+                for i in range(1000)
+            )
+        path = os.path.join(self.temp_dir.name, "large.csv")
+        
+        tracemalloc.start()
+        result = write_report(self.store, path, report_format="csv")
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        
+        self.assertEqual(result["measurements"], 20005)
+        # 20k rows held as dictionaries would take about 17 MB
+        self.assertLess(peak, 2 * 1024 * 1024)
+
+
+class TestSpecifications(unittest.TestCase):
+    """Test reading the specification file."""
+    
+    def test_read(self):
+        """Test labels, limits and optional units are read."""
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as spec_file:
+            spec_file.write("label,nominal,tolerance,unit\nbore A,10,0.1,mm\nslot,5,-0.2,\n")
+        try:
+            specifications = read_specifications(spec_file.name)
+        finally:
+            os.remove(spec_file.name)
+        
+        self.assertEqual(specifications["bore A"].unit, "mm")
+        self.assertEqual(specifications["slot"].tolerance, 0.2)
+        self.assertIsNone(specifications["slot"].unit)
+    
+    def test_bad_row(self):
+        """Test a malformed row is reported with its line number."""
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as spec_file:
+            spec_file.write("label,nominal,tolerance\nbore A,ten,0.1\n")
+        try:
+            with self.assertRaisesRegex(ValueError, "line 2"):
+                read_specifications(spec_file.name)
+        finally:
+            os.remove(spec_file.name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Tests for the headless measurement service and its LRU cache.
+
+Starts the service on a free local port and talks to it with the bundled
+client, so no GUI is required.
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+
+from PIL import Image, ImageDraw
+
+from caching import LRUCache
+from measurement_service import MeasurementService, MeasurementClient, ServiceThread
+
+
+class TestLRUCache(unittest.TestCase):
+    """Test the LRU cache used by the service."""
+    
+    def test_evicts_least_recently_used(self):
+        """Test the oldest untouched entry is evicted first."""
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+    
+    def test_get_or_load_calls_loader_once(self):
+        """Test the loader only runs on a miss."""
+        cache = LRUCache(4)
+        calls = []
+        for _ in range(3):
+            cache.get_or_load("key", lambda: calls.append(1) or "value")
+        
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()["hits"], 2)
+    
+    def test_invalid_size(self):
+        """Test a zero-sized cache is rejected."""
+        with self.assertRaises(ValueError):
+            LRUCache(0)
+
+
+class TestMeasurementService(unittest.TestCase):
+    """Test the service end to end over HTTP."""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Start the service and create a test image."""
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.image_path = os.path.join(cls.temp_dir.name, "drawing.png")
+        image = Image.new("RGB", (400, 300), "white")
+        ImageDraw.Draw(image).rectangle([10, 20, 59, 39], fill="black")
+        image.save(cls.image_path)
+        
+        cls.service = MeasurementService(workers=2)
+        cls.thread = ServiceThread(cls.service)
+        cls.thread.start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the service and remove temporary files."""
+        cls.thread.stop()
+        cls.temp_dir.cleanup()
+    
+    def setUp(self):
+        """Open a client connection."""
+        self.client = MeasurementClient(port=self.thread.port)
+    
+    def tearDown(self):
+        """Close the client connection."""
+        self.client.close()
+    
+    def test_health(self):
+        """Test the health endpoint."""
+        self.assertEqual(self.client.request("GET", "/health"), (200, {"status": "ok"}))
+    
+    def test_stats_report_memory(self):
+        """Test stats include memory budget usage and peak RSS."""
+        self.client.measure([[[0, 0], [1, 1]]], calibration_factor=1.0, image=self.image_path)
+        status, stats = self.client.request("GET", "/stats")
+        
+        self.assertEqual(status, 200)
+        self.assertGreater(stats["memory"]["current"], 0)
+        self.assertIn("peak_rss", stats["memory"])
+        
+    def test_calibrate_then_measure_by_id(self):
+        """Test a stored calibration is applied to a batch of segments."""
+        status, calibration = self.client.calibrate([[0, 0], [100, 0]], 10, unit="cm")
+        self.assertEqual(status, 200)
+        self.assertAlmostEqual(calibration["calibration_factor"], 0.1)
+        
+        status, result = self.client.measure(
+            [[[0, 0], [250, 0]], [[0, 0], [3, 4]]],
+            calibration_id=calibration["calibration_id"]
+        )
+        
+        self.assertEqual(status, 200)
+        self.assertEqual(result["unit"], "cm")
+        self.assertAlmostEqual(result["measurements"][0]["distance"], 25.0)
+        self.assertAlmostEqual(result["measurements"][1]["pixel_distance"], 5.0)
+    
+    def test_image_calibration_is_remembered(self):
+        """Test measuring an image reuses the calibration made on it."""
+        status, _ = self.client.calibrate([[0, 0], [200, 0]], 50, image=self.image_path)
+        self.assertEqual(status, 200)
+        
+        status, result = self.client.measure([[[0, 0], [0, 100]]], image=self.image_path)
+        
+        self.assertEqual(status, 200)
+        self.assertAlmostEqual(result["measurements"][0]["distance"], 25.0)
+        self.assertGreaterEqual(self.service.images.stats()["hits"], 1)
+    
+    def test_point_outside_image(self):
+        """Test points beyond the image bounds are rejected."""
+        status, result = self.client.measure(
+            [[[0, 0], [500, 0]]],
+            calibration_factor=1.0,
+            image=self.image_path
+        )
+        self.assertEqual(status, 400)
+        self.assertIn("outside", result["error"])
+    
+    def test_calibration_points_too_close(self):
+        """Test calibration rejects coincident points."""
+        status, result = self.client.calibrate([[5, 5], [5, 5]], 10)
+        self.assertEqual(status, 400)
+    
+    def test_unknown_calibration(self):
+        """Test an unknown calibration id is reported."""
+        status, _ = self.client.measure([[[0, 0], [1, 1]]], calibration_id="missing")
+        self.assertEqual(status, 400)
+    
+    def test_features(self):
+        """Test automatic feature dimensioning with an explicit calibration."""
+        status, result = self.client.features(self.image_path, calibration_factor=0.5, unit="mm")
+        
+        self.assertEqual(status, 200)
+        self.assertEqual(result["count"], 1)
+        self.assertEqual(result["features"][0]["bbox"], [10, 20, 59, 39])
+        self.assertAlmostEqual(result["features"][0]["width"], 25.0)
+        
+    def test_unknown_endpoint_and_method(self):
+        """Test routing errors."""
+        self.assertEqual(self.client.request("GET", "/nope")[0], 404)
+        self.assertEqual(self.client.request("GET", "/measure")[0], 405)
+    
+    def test_dark_features_must_be_boolean(self):
+        """Test a string such as "false" is rejected rather than read as true."""
+        for value in ("false", "0", 0):
+            status, _ = self.client.features(self.image_path, calibration_factor=0.5, dark_features=value)
+            self.assertEqual(status, 400)
+        status, result = self.client.features(self.image_path, calibration_factor=0.5, dark_features=False)
+        self.assertEqual(status, 200)
+    
+    def test_concurrent_requests(self):
+        """Test 300 requests from concurrent clients all get their own answers."""
+        errors = []
+        
+        def run(client_index):
+            client = MeasurementClient(port=self.thread.port)
+            try:
+                for request_index in range(50):
+                    length = 5 * (client_index * 50 + request_index + 1)
+                    status, result = client.measure([[[0, 0], [3 * length, 4 * length]]], calibration_factor=0.5)
+                    if status != 200 or result["measurements"][0]["distance"] != 2.5 * length:
+                        errors.append((client_index, request_index, status, result))
+            finally:
+                client.close()
+
+        threads = [threading.Thread(target=run, args=(index,)) for index in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(errors, [])
+
+
+class TestServiceShutdown(unittest.TestCase):
+    """Test stopping the service while clients are connected."""
+    
+    def test_stop_closes_idle_connections(self):
+        """Test an idle keep-alive client does not leave its handler running."""
+        service = MeasurementService(workers=1)
+        thread = ServiceThread(service)
+        thread.start()
+        client = MeasurementClient(port=thread.port)
+        try:
+            self.assertEqual(client.request("GET", "/health")[0], 200)
+            self.assertEqual(len(service.connections), 1)
+            thread.stop()
+            self.assertFalse(thread.is_alive())
+            self.assertEqual(service.connections, set())
+            self.assertTrue(thread.loop.is_closed())
+        finally:
+            client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
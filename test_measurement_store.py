@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent SQLite measurement store.
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from measurement_store import MeasurementStore, file_hash
+
+
+class TestMeasurementStore(unittest.TestCase):
+    """Test writing and querying stored records."""
+    
+    def setUp(self):
+        """Open a store in a temporary folder."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "history", "measurements.db")
+        self.store = MeasurementStore(self.path, batch_size=10)
+    
+    def tearDown(self):
+        """Close the store and remove the folder."""
+        self.store.close()
+        self.temp_dir.cleanup()
+    
+    def committed_rows(self, table):
+        """Count rows visible to another connection."""
+        with sqlite3.connect(self.path) as other:
+            return other.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    
+    def test_wal_mode(self):
+        """Test the database uses write-ahead logging."""
+        with sqlite3.connect(self.path) as other:
+            self.assertEqual(other.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+    
+    def test_images_are_keyed_by_hash(self):
+        """Test re-adding a known image keeps its id and updates the path."""
+        first = self.store.add_image("a/drawing.png", "abc", 100, 50)
+        second = self.store.add_image("b/drawing.png", "abc", 100, 50)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, self.store.add_image("other.png", "def"))
+        self.assertEqual(self.store.counts()["images"], 2)
+    
+    def test_measurements_are_written_in_batches(self):
+        """Test buffered rows are committed per batch or on flush."""
+        image_id = self.store.add_image("drawing.png", "abc")
+        for index in range(9):
+            self.store.add_measurement(image_id, None, ((0, 0), (index, 0)), float(index))
+        self.assertEqual(self.committed_rows("measurements"), 0)
+        self.store.add_measurement(image_id, None, ((0, 0), (9, 0)), 9.0)
+        self.assertEqual(self.committed_rows("measurements"), 10)
+        self.store.add_log("pending")
+        self.store.flush()
+        self.assertEqual(self.committed_rows("log_entries"), 1)
+    
+    def test_queries(self):
+        """Test per-image, per-unit and time range queries."""
+        drawing = self.store.add_image("drawing.png", "abc")
+        other = self.store.add_image("other.png", "def")
+        now = time.time()
+        calibration = self.store.add_calibration(drawing, 0.1, "mm", "manual", 100.0, 10.0, now - 86400)
+        self.store.add_calibration(other, 0.01, "inches", "metadata", timestamp=now - 30 * 86400)
+        self.store.add_measurement(drawing, calibration, ((0, 0), (30, 40)), 50.0, 5.0, "mm", timestamp=now - 2)
+        self.store.add_measurement(drawing, calibration, ((0, 0), (0, 10)), 10.0, 1.0, "mm", timestamp=now - 1)
+        self.store.add_measurement(other, None, ((0, 0), (1, 0)), 1.0, kind="profile", timestamp=now)
+        
+        rows = self.store.measurements_for_image("abc")
+        self.assertEqual([row["real_distance"] for row in rows], [5.0, 1.0])
+        self.assertEqual(rows[0]["path"], "drawing.png")
+        self.assertEqual(rows[0]["calibration_id"], calibration)
+        
+        week = self.store.calibrations_since(now - 7 * 86400)
+        self.assertEqual([row["factor"] for row in week], [0.1])
+        self.assertEqual(self.store.calibrations_since(now - 60 * 86400, unit="inches")[0]["source"], "metadata")
+        self.assertEqual(len(list(self.store.iter_measurements(unit="mm", since=now - 1.5))), 1)
+        self.assertEqual(self.store.count_measurements(unit="mm", since=now - 1.5), 1)
+        self.assertEqual(self.store.count_measurements(), 3)
+    
+    def test_measurements_grouped_by_image(self):
+        """Test by_image returns each image's rows together, oldest first."""
+        first = self.store.add_image("a.png", "a")
+        second = self.store.add_image("b.png", "b")
+        for offset, image_id in enumerate((first, second, first, second)):
+            self.store.add_measurement(image_id, None, ((0, 0), (offset, 0)), float(offset), timestamp=100 + offset)
+        
+        rows = list(self.store.iter_measurements(by_image=True))
+        
+        self.assertEqual([(row["path"], row["pixel_distance"]) for row in rows],
+                         [("a.png", 0.0), ("a.png", 2.0), ("b.png", 1.0), ("b.png", 3.0)])
+    
+    def test_remove_measurement(self):
+        """Test buffered and written rows can both be removed."""
+        image_id = self.store.add_image("drawing.png", "abc")
+        written = self.store.add_measurement(image_id, None, ((0, 0), (1, 0)), 1.0, timestamp=1.0)
+        self.store.flush()
+        pending = self.store.add_measurement(image_id, None, ((0, 0), (2, 0)), 2.0, timestamp=2.0)
+        self.store.remove_measurement(pending)
+        self.store.remove_measurement(written)
+        self.assertEqual(self.store.counts()["measurements"], 0)
+        
+        # Redo adds the same row again
+        self.store.add_measurements([written])
+        self.assertEqual(self.store.measurements_for_image("abc")[0]["pixel_distance"], 1.0)
+    
+    def test_remove_only_that_row(self):
+        """Test removing a written row leaves rows with the same image, time and kind."""
+        image_id = self.store.add_image("drawing.png", "abc")
+        first = self.store.add_measurement(image_id, None, ((0, 0), (1, 0)), 1.0, timestamp=1.0)
+        self.store.add_measurement(image_id, None, ((0, 0), (2, 0)), 2.0, timestamp=1.0)
+        self.store.add_measurements([(None, None, 1.0, "distance", 0, 0, 3, 0, 3.0, None, None, None, None, None)])
+        self.store.flush()
+        self.store.remove_measurement(first)
+        self.assertEqual([row["pixel_distance"] for row in self.store.measurements_for_image("abc")], [2.0])
+        self.assertEqual(self.store.counts()["measurements"], 2)
+        
+        # Removing the same row again deletes nothing else
+        self.store.remove_measurement(first)
+        self.assertEqual(self.store.counts()["measurements"], 2)
+    
+    def test_nominal_and_tolerance(self):
+        """Test named dimensions keep their nominal value and tolerance."""
+        image_id = self.store.add_image("drawing.png", "abc")
+        self.store.add_measurement(image_id, None, ((0, 0), (1, 0)), 100.0, 10.02, "mm",
+                                   label="bore A", nominal=10.0, tolerance=0.05)
+        self.store.flush()
+        
+        row = self.store.measurements_for_image("abc")[0]
+        self.assertEqual((row["label"], row["nominal"], row["tolerance"]), ("bore A", 10.0, 0.05))
+    
+    def test_old_database_is_migrated(self):
+        """Test a database without the nominal columns gains them on open."""
+        path = os.path.join(self.temp_dir.name, "old.db")
+        with sqlite3.connect(path) as old:
+            old.execute(
+                "CREATE TABLE measurements (id INTEGER PRIMARY KEY, image_id INTEGER, calibration_id INTEGER, "
+                "timestamp REAL NOT NULL, kind TEXT NOT NULL, x1 REAL, y1 REAL, x2 REAL, y2 REAL, "
+                "pixel_distance REAL NOT NULL, real_distance REAL, unit TEXT, label TEXT)"
+            )
+            old.execute("INSERT INTO measurements (timestamp, kind, pixel_distance) VALUES (1, 'distance', 5)")
+        
+        store = MeasurementStore(path)
+        store.add_measurement(None, None, ((0, 0), (1, 0)), 1.0, nominal=1.0, tolerance=0.1)
+        store.close()
+        
+        with sqlite3.connect(path) as migrated:
+            rows = migrated.execute("SELECT pixel_distance, nominal FROM measurements ORDER BY id").fetchall()
+        self.assertEqual(rows, [(5.0, None), (1.0, 1.0)])
+    
+    def test_latest_calibration(self):
+        """Test the newest calibration of an image is found."""
+        image_id = self.store.add_image("drawing.png", "abc")
+        self.assertIsNone(self.store.latest_calibration("abc"))
+        self.store.add_calibration(image_id, 0.1, "mm", "manual", timestamp=1.0)
+        self.store.add_calibration(image_id, 0.01, "inches", "manual", timestamp=2.0)
+        self.assertEqual(self.store.latest_calibration("abc")["factor"], 0.01)
+        self.assertEqual(self.store.latest_calibration("abc", unit="mm")["factor"], 0.1)
+    
+    def test_log_entries_after_id(self):
+        """Test the console can fetch only lines it has not shown."""
+        self.store.add_log("one")
+        self.store.add_log("two")
+        shown = self.store.log_entries()[0]["id"]
+        self.store.add_log("three")
+        self.assertEqual([entry["message"] for entry in self.store.log_entries(after_id=shown)], ["two", "three"])
+        self.assertEqual([entry["message"] for entry in self.store.log_entries(limit=1)], ["three"])
+        self.assertEqual(self.store.last_log_id(), shown + 2)
+    
+    def test_queries_use_indexes(self):
+        """Test lookups by image hash, timestamp and unit avoid table scans."""
+        for sql in (
+            "SELECT * FROM measurements JOIN images ON images.id = measurements.image_id WHERE images.hash = 'x'",
+            "SELECT * FROM calibrations WHERE timestamp >= 0",
+            "SELECT * FROM measurements WHERE unit = 'mm' AND timestamp >= 0",
+        ):
+            plan = " ".join(row["detail"] for row in self.store.query(f"EXPLAIN QUERY PLAN {sql}"))
+            self.assertIn("USING", plan, sql)
+            self.assertNotIn("SCAN measurements", plan, sql)
+    
+    def test_data_survives_reopening(self):
+        """Test records persist across sessions."""
+        self.store.add_log("kept")
+        self.store.close()
+        self.store = MeasurementStore(self.path)
+        self.assertEqual(self.store.log_entries()[0]["message"], "kept")
+
+
+class TestFileHash(unittest.TestCase):
+    """Test content hashing of image files."""
+    
+    def test_same_content_same_hash(self):
+        """Test copies hash equal and different files differ."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = [os.path.join(temp_dir, name) for name in ("a.png", "b.png", "c.png")]
+            for path, content in zip(paths, (b"same", b"same", b"other")):
+                with open(path, "wb") as image_file:
+                    image_file.write(content)
+            self.assertEqual(file_hash(paths[0]), file_hash(paths[1]))
+            self.assertNotEqual(file_hash(paths[0]), file_hash(paths[2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for memory accounting and budget-driven cache eviction.
+"""
+
+import unittest
+
+from PIL import Image
+
+from caching import LRUCache
+from memory_budget import MemoryBudget, image_nbytes, format_bytes, peak_rss_bytes
+
+
+class TestMemoryBudget(unittest.TestCase):
+    """Test the memory budget."""
+    
+    def test_image_sizes(self):
+        """Test bitmap sizes follow Pillow's storage per mode."""
+        self.assertEqual(image_nbytes(Image.new("L", (10, 10))), 100)
+        self.assertEqual(image_nbytes(Image.new("I;16", (10, 10))), 200)
+        self.assertEqual(image_nbytes(Image.new("RGB", (10, 10))), 400)
+        self.assertEqual(image_nbytes(None), 0)
+    
+    def test_tracks_current_and_peak(self):
+        """Test usage and peak follow tracked allocations."""
+        budget = MemoryBudget(limit=1000)
+        budget.track("image", 300)
+        budget.track("photo", 200)
+        budget.track("photo", 100)
+        budget.release("image")
+        
+        stats = budget.stats()
+        self.assertEqual(stats["current"], 100)
+        self.assertEqual(stats["peak"], 500)
+    
+    def test_evicts_from_largest_cache(self):
+        """Test going over budget evicts LRU entries from the biggest cache."""
+        budget = MemoryBudget(limit=1000)
+        small = LRUCache(10, budget=budget, sizeof=len)
+        large = LRUCache(10, budget=budget, sizeof=len)
+        small.put("a", "x" * 100)
+        small.put("b", "x" * 100)
+        large.put("c", "x" * 300)
+        large.put("d", "x" * 300)
+        large.put("e", "x" * 300)
+        
+        self.assertLessEqual(budget.current, 1000)
+        self.assertNotIn("c", large)
+        self.assertIn("e", large)
+        self.assertEqual(len(small), 2)
+        self.assertEqual(budget.evictions, 1)
+    
+    def test_pinned_allocations_are_not_evicted(self):
+        """Test entries without an owner survive and caches keep one entry."""
+        budget = MemoryBudget(limit=100)
+        cache = LRUCache(10, budget=budget, sizeof=len)
+        budget.track("image", 500)
+        cache.put("view", "x" * 50)
+        
+        self.assertIn("view", cache)
+        self.assertEqual(budget.current, 550)
+    
+    def test_lowering_limit_evicts(self):
+        """Test set_limit evicts immediately."""
+        budget = MemoryBudget(limit=10000)
+        cache = LRUCache(10, budget=budget, sizeof=len)
+        for key in "abcd":
+            cache.put(key, "x" * 100)
+        
+        budget.set_limit(250)
+        
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(budget.current, 200)
+    
+    def test_cache_removal_releases_memory(self):
+        """Test pop, clear and count-based eviction release their bytes."""
+        budget = MemoryBudget()
+        cache = LRUCache(2, budget=budget, sizeof=len)
+        cache.put("a", "x" * 10)
+        cache.put("b", "x" * 20)
+        cache.put("c", "x" * 30)
+        self.assertEqual(budget.current, 50)
+        
+        cache.pop("b")
+        self.assertEqual(budget.current, 30)
+        
+        cache.clear()
+        self.assertEqual(budget.current, 0)
+    
+    def test_budget_requires_sizeof(self):
+        """Test a budgeted cache needs a size function."""
+        with self.assertRaises(ValueError):
+            LRUCache(2, budget=MemoryBudget())
+    
+    def test_format_and_rss(self):
+        """Test byte formatting and that peak RSS is reported."""
+        self.assertEqual(format_bytes(512), "512 B")
+        self.assertEqual(format_bytes(1536), "1.5 KB")
+        self.assertEqual(format_bytes(None), "n/a")
+        self.assertGreater(peak_rss_bytes(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests for calibration from resolution metadata.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image, ImageFile
+
+from resolution_metadata import read_resolution, scan_folder
+
+
+class TestReadResolution(unittest.TestCase):
+    """Test reading resolution from image headers."""
+    
+    def setUp(self):
+        """Create a temporary folder for test images."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.image = Image.new("RGB", (20, 10), "white")
+    
+    def tearDown(self):
+        """Remove the temporary folder."""
+        self.temp_dir.cleanup()
+    
+    def save(self, name, **options):
+        """Save the test image and return its path."""
+        path = os.path.join(self.temp_dir.name, name)
+        self.image.save(path, **options)
+        return path
+    
+    def test_formats(self):
+        """Test PNG, JPEG, TIFF and BMP resolutions become calibrations."""
+        for name, source in (
+            ("scan.png", "PNG pHYs"),
+            ("scan.jpg", "JPEG JFIF/EXIF"),
+            ("scan.tif", "TIFF XResolution"),
+            ("scan.bmp", "BMP header"),
+        ):
+            resolution = read_resolution(self.save(name, dpi=(300, 300)))
+            self.assertEqual(resolution.dpi_x, 300.0, name)
+            self.assertEqual(resolution.source, source)
+            self.assertAlmostEqual(resolution.calibration_factor("mm"), 25.4 / 300)
+            self.assertAlmostEqual(resolution.calibration_factor("inches"), 1 / 300)
+    
+    def test_tiff_centimetre_unit(self):
+        """Test TIFF resolutions in pixels per centimetre are converted."""
+        path = self.save("scan.tif", resolution_unit=3, resolution=100.0)
+        self.assertAlmostEqual(read_resolution(path).calibration_factor("mm"), 0.1)
+    
+    def test_missing_or_unitless_resolution(self):
+        """Test images without a physical resolution give None."""
+        self.assertIsNone(read_resolution(self.save("plain.png")))
+        self.assertIsNone(read_resolution(self.save("plain.jpg")))
+        self.assertIsNone(read_resolution(self.save("plain.tif")))
+    
+    def test_suspect_and_anisotropic(self):
+        """Test placeholder and non-square resolutions are flagged."""
+        self.assertTrue(read_resolution(self.save("screen.png", dpi=(72, 72))).suspect)
+        resolution = read_resolution(self.save("fax.tif", dpi=(200, 100)))
+        self.assertTrue(resolution.anisotropic)
+        self.assertFalse(resolution.suspect)
+        self.assertAlmostEqual(resolution.dpi, (200 * 100) ** 0.5)
+    
+    def test_scan_reads_headers_only(self):
+        """Test a folder scan never decodes pixel data."""
+        self.save("b.png", dpi=(600, 600))
+        self.save("a.jpg")
+        with open(os.path.join(self.temp_dir.name, "c.tif"), "wb") as broken:
+            broken.write(b"not an image")
+        with open(os.path.join(self.temp_dir.name, "notes.txt"), "w") as notes:
+            notes.write("ignored")
+        
+        with mock.patch.object(ImageFile.ImageFile, "load", side_effect=AssertionError("decoded")):
+            results = list(scan_folder(self.temp_dir.name, workers=2))
+        
+        self.assertEqual([os.path.basename(path) for path, _, _ in results], ["a.jpg", "b.png", "c.tif"])
+        self.assertIsNone(results[0][1])
+        self.assertEqual(results[1][1].dpi_x, 600.0)
+        self.assertIsNone(results[2][1])
+        self.assertIsNotNone(results[2][2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Tests for watch-folder ingest.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from PIL import Image, ImageDraw
+
+from measurement_store import MeasurementStore
+from watch_folder import Checkpoint, FolderPoller, WatchIngest
+
+
+def save_drawing(path, dpi=None):
+    """Save a small drawing with two dark boxes."""
+    image = Image.new("L", (120, 80), 255)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([10, 10, 29, 19], fill=0)
+    draw.rectangle([60, 40, 99, 69], fill=0)
+    image.save(path, **({"dpi": dpi} if dpi else {}))
+
+
+def age(path, seconds):
+    """Move a file's modification time into the past."""
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+class TestFolderPoller(unittest.TestCase):
+    """Test debouncing of files that are still being written."""
+    
+    def setUp(self):
+        """Create a watched folder and a checkpoint."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.checkpoint = Checkpoint(os.path.join(self.temp_dir.name, "checkpoint.jsonl"))
+        self.poller = FolderPoller(self.temp_dir.name, self.checkpoint, settle_seconds=3.0)
+    
+    def tearDown(self):
+        """Remove the folder."""
+        self.checkpoint.close()
+        self.temp_dir.cleanup()
+    
+    def test_file_must_stay_unchanged(self):
+        """Test a file is only ready after it stops changing."""
+        path = os.path.join(self.temp_dir.name, "scan.png")
+        with open(path, "wb") as scan:
+            scan.write(b"partial")
+        now = time.time()
+        self.assertEqual(self.poller.poll(now), [])
+        self.assertEqual(self.poller.poll(now + 1), [])
+        
+        # Still being written: the settle period restarts
+        with open(path, "ab") as scan:
+            scan.write(b"more")
+        os.utime(path, (now + 2, now + 2))
+        self.assertEqual(self.poller.poll(now + 2), [])
+        self.assertEqual(self.poller.poll(now + 4), [])
+        ready = self.poller.poll(now + 6)
+        self.assertEqual([entry[0] for entry in ready], [path])
+        
+        # Claimed files are not returned twice
+        self.assertEqual(self.poller.poll(now + 8), [])
+    
+    def test_old_files_still_settle(self):
+        """Test a file with an old mtime waits the settle period between scans."""
+        path = os.path.join(self.temp_dir.name, "old.png")
+        save_drawing(path)
+        age(path, 3600)
+        now = time.time()
+        self.assertEqual(self.poller.poll(now), [])
+        # A copy that keeps its source's mtime may still be growing
+        self.assertEqual(self.poller.poll(now + 0.1), [])
+        self.assertEqual(self.poller.poll(now + 2.9), [])
+        self.assertEqual(len(self.poller.poll(now + 3)), 1)
+    
+    def test_checkpointed_files_are_skipped(self):
+        """Test processed files are skipped unless they change."""
+        path = os.path.join(self.temp_dir.name, "done.png")
+        save_drawing(path)
+        age(path, 3600)
+        stat = os.stat(path)
+        self.checkpoint.record([{"path": path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}])
+        now = time.time()
+        self.poller.poll(now)
+        self.assertEqual(self.poller.poll(now + 3), [])
+        age(path, 60)
+        self.poller.poll(now + 4)
+        self.assertEqual(len(self.poller.poll(now + 7)), 1)
+
+    def test_empty_files_are_skipped_until_written(self):
+        """Test a settled empty file stops waiting and is taken once it has content."""
+        path = os.path.join(self.temp_dir.name, "empty.png")
+        open(path, "wb").close()
+        age(path, 3600)
+        now = time.time()
+        self.poller.poll(now)
+        self.assertEqual(self.poller.poll(now + 3), [])
+        self.assertEqual(self.poller.skipped, [path])
+        self.assertFalse(self.poller.settling)
+        self.assertEqual(self.poller.poll(now + 4), [])
+        self.assertEqual(self.poller.skipped, [])
+        
+        save_drawing(path)
+        age(path, 60)
+        self.poller.poll(now + 5)
+        self.assertEqual([entry[0] for entry in self.poller.poll(now + 8)], [path])
+
+
+class TestWatchIngest(unittest.TestCase):
+    """Test draining a folder into the store."""
+    
+    def setUp(self):
+        """Create a folder with a backlog of drawings."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self.temp_dir.name, "scans")
+        os.makedirs(self.folder)
+        save_drawing(os.path.join(self.folder, "a.png"), dpi=(254, 254))
+        save_drawing(os.path.join(self.folder, "b.png"))
+        with open(os.path.join(self.folder, "c.png"), "wb") as broken:
+            broken.write(b"not an image")
+        for name in ("a.png", "b.png", "c.png"):
+            age(os.path.join(self.folder, name), 3600)
+        self.store = MeasurementStore(os.path.join(self.temp_dir.name, "measurements.db"))
+    
+    def tearDown(self):
+        """Close the store and remove the folder."""
+        self.store.close()
+        self.temp_dir.cleanup()
+    
+    def ingest(self):
+        """Drain the folder once and return the ingest job."""
+        ingest = WatchIngest(
+            self.folder, self.store, workers=2, poll_interval=0.05, settle_seconds=0.0,
+            measure_options={"segments": [((0, 0), (30, 40))], "features": True}
+        )
+        ingest.run(once=True, report=None)
+        ingest.close()
+        return ingest
+    
+    def test_backlog_is_processed_once(self):
+        """Test every file is processed, calibrated and checkpointed once."""
+        ingest = self.ingest()
+        self.assertEqual((ingest.processed, ingest.failed), (2, 1))
+        
+        rows = list(self.store.iter_measurements())
+        calibrated = [row for row in rows if row["path"].endswith("a.png")]
+        uncalibrated = [row for row in rows if row["path"].endswith("b.png")]
+        # One segment plus width and height of two features per image
+        self.assertEqual(len(calibrated), 5)
+        segment = next(row for row in calibrated if row["kind"] == "segment")
+        self.assertAlmostEqual(segment["pixel_distance"], 50.0)
+        self.assertAlmostEqual(segment["real_distance"], 5.0)  # 254 DPI = 0.1 mm/px
+        widths = sorted(row["pixel_distance"] for row in calibrated if row["kind"] == "feature-width")
+        self.assertEqual(widths, [20, 40])
+        self.assertTrue(all(row["real_distance"] is None for row in uncalibrated))
+        
+        # A restart finds nothing left to do
+        again = self.ingest()
+        self.assertEqual((again.processed, again.failed), (0, 0))
+        self.assertEqual(len(list(self.store.iter_measurements())), len(rows))
+    
+    def test_once_returns_with_empty_file(self):
+        """Test an empty file does not keep a once run waiting."""
+        empty = os.path.join(self.folder, "d.png")
+        open(empty, "wb").close()
+        age(empty, 3600)
+        lines = []
+        ingest = WatchIngest(self.folder, self.store, workers=2, poll_interval=0.05, settle_seconds=0.0)
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=ingest.run, kwargs={"once": True, "stop_event": stop, "report": lines.append}
+        )
+        thread.start()
+        thread.join(30)
+        returned = not thread.is_alive()
+        # Stop a hung run so the test fails instead of blocking
+        stop.set()
+        thread.join()
+        ingest.close()
+        
+        self.assertTrue(returned, "run(once=True) kept waiting on the empty file")
+        self.assertEqual((ingest.processed, ingest.failed), (2, 1))
+        self.assertIn(f"SKIPPED {empty}: empty file", lines)
+    
+    def test_stored_calibration_is_reused(self):
+        """Test an image's stored calibration wins over the default."""
+        from measurement_store import file_hash
+        path = os.path.join(self.folder, "b.png")
+        image_id = self.store.add_image(path, file_hash(path), 120, 80)
+        self.store.add_calibration(image_id, 0.5, "cm", "manual")
+        self.ingest()
+        segment = next(
+            row for row in self.store.iter_measurements(image_hash=file_hash(path))
+            if row["kind"] == "segment"
+        )
+        self.assertEqual(segment["unit"], "cm")
+        self.assertAlmostEqual(segment["real_distance"], 25.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
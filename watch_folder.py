@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Watch a folder and measure new images as they arrive.
+
+The folder is polled (which also works on network shares, where change
+notifications are unreliable). A file is only taken once its size and
+modification time have stopped changing for a settle period, so scans still
+being written are left alone. Ready files are decoded and measured on a
+process pool. The main process resolves each image's calibration (the
+latest stored calibration for the same image, else its resolution metadata,
+else a configured default) and writes the results to the measurement store
+in batches. Each processed file is then appended to a checkpoint file, so a
+restart continues where it stopped instead of redoing work.
+
+Usage:
+    python watch_folder.py scans/ --features --unit mm
+    python watch_folder.py scans/ --segment 100,200,900,200 --calibration 0.05 --once
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from PIL import Image
+
+from feature_detection import DEFAULT_MIN_AREA, detect_features
+from measurement import AVAILABLE_UNITS, calculate_distance
+from measurement_store import DEFAULT_PATH as DEFAULT_STORE_PATH, MeasurementStore, file_hash
+from resolution_metadata import IMAGE_EXTENSIONS, read_resolution
+
+
+# Seconds between folder scans
+DEFAULT_POLL_INTERVAL = 2.0
+
+# Seconds a file's size and modification time must stay unchanged
+DEFAULT_SETTLE_SECONDS = 3.0
+
+# Checkpoint file name, kept inside the watched folder by default
+CHECKPOINT_NAME = ".image_dimensioner_checkpoint.jsonl"
+
+# Queued jobs per worker; bounds memory while draining a large backlog
+JOBS_PER_WORKER = 2
+
+
+class Checkpoint:
+    """Append-only record of files that have been processed."""
+    
+    def __init__(self, path):
+        """Load the processed files from a checkpoint file, if it exists."""
+        self.path = path
+        self.done = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as checkpoint_file:
+                for line in checkpoint_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash; that file is redone
+                        continue
+                    self.done[entry["path"]] = (entry["size"], entry["mtime_ns"])
+        self.file = open(path, "a", encoding="utf-8")
+    
+    def is_done(self, path, size, mtime_ns):
+        """Check whether this version of a file was already processed."""
+        return self.done.get(path) == (size, mtime_ns)
+    
+    def record(self, entries):
+        """Append processed files; call after their results are stored."""
+        for entry in entries:
+            self.file.write(json.dumps(entry) + "\n")
+            self.done[entry["path"]] = (entry["size"], entry["mtime_ns"])
+        self.file.flush()
+        os.fsync(self.file.fileno())
+    
+    def close(self):
+        """Close the checkpoint file."""
+        self.file.close()
+
+
+class FolderPoller:
+    """Find image files that are new and no longer being written."""
+    
+    def __init__(self, directory, checkpoint, settle_seconds=DEFAULT_SETTLE_SECONDS, recursive=False):
+        """
+        Initialize a poller.
+        
+        Args:
+            directory (str): Folder to watch
+            checkpoint (Checkpoint): Files to skip
+            settle_seconds (float): Quiet period before a file is ready
+            recursive (bool): Include subfolders
+        """
+        self.directory = directory
+        self.checkpoint = checkpoint
+        self.settle_seconds = settle_seconds
+        self.recursive = recursive
+        self.candidates = {}
+        self.claimed = set()
+        # Settled zero-byte files, skipped until something is written to them
+        self.empty = {}
+        self.skipped = []  # Empty files found by the last poll
+    
+    def scan(self, directory):
+        """Yield (path, stat) for the image files in a folder."""
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if self.recursive:
+                        yield from self.scan(entry.path)
+                elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    try:
+                        yield entry.path, entry.stat()
+                    except FileNotFoundError:
+                        continue
+    
+    def poll(self, now=None):
+        """
+        Scan the folder and return files that are ready to process.
+        
+        A file is ready when it is not in the checkpoint, is not already
+        claimed, and has had the same size and modification time for the
+        settle period. Files that settle empty are left out and listed in
+        skipped instead.
+        
+        Returns:
+            list: (path, size, mtime_ns) tuples, oldest first
+        """
+        now = time.time() if now is None else now
+        ready = []
+        seen = set()
+        self.skipped = []
+        for path, stat in self.scan(self.directory):
+            seen.add(path)
+            version = (stat.st_size, stat.st_mtime_ns)
+            if path in self.claimed or self.checkpoint.is_done(path, *version) or self.empty.get(path) == version:
+                continue
+            previous = self.candidates.get(path)
+            if previous is None or previous[0] != version:
+                # New or still changing; wait for at least one more scan
+                self.candidates[path] = (version, now)
+                continue
+            # Only time between scans counts: copies can keep the source's
+            # old mtime while they are still being written
+            if now - previous[1] < self.settle_seconds:
+                continue
+            if stat.st_size > 0:
+                ready.append((stat.st_mtime_ns, path, stat.st_size))
+            else:
+                self.empty[path] = version
+                self.skipped.append(path)
+                del self.candidates[path]
+        # Forget files that disappeared
+        for path in set(self.candidates) - seen:
+            del self.candidates[path]
+        for path in set(self.empty) - seen:
+            del self.empty[path]
+        
+        ready.sort()
+        for _, path, _ in ready:
+            self.claimed.add(path)
+            del self.candidates[path]
+        return [(path, size, mtime_ns) for mtime_ns, path, size in ready]
+    
+    @property
+    def settling(self):
+        """Whether any file is still waiting for its settle period."""
+        return bool(self.candidates)
+    
+    def release(self, path):
+        """Allow a processed file to be picked up again if it changes."""
+        self.claimed.discard(path)
+
+
+def measure_image(path, segments=(), features=False, threshold=None, dark_features=True,
+                  min_area=DEFAULT_MIN_AREA):
+    """
+    Decode one image and run the configured automatic measurements.
+    
+    Runs in a worker process, so it only returns plain data; calibration
+    and storage happen in the main process.
+    
+    Args:
+        path (str): Image file
+        segments (list): ((x1, y1), (x2, y2)) segments measured on every image
+        features (bool): Run automatic feature detection
+        threshold (int): Feature threshold (default Otsu)
+        dark_features (bool): Detect dark features on a light background
+        min_area (int): Smallest feature area in pixels
+    
+    Returns:
+        dict: Content hash, size, resolution metadata and pixel results
+    """
+    with Image.open(path) as image:
+        resolution = read_resolution(image)
+        result = {
+            "hash": file_hash(path),
+            "size": image.size,
+            "resolution": resolution,
+            "segments": [],
+            "features": [],
+        }
+        for point1, point2 in segments:
+            result["segments"].append((point1, point2, calculate_distance(point1, point2)))
+        if features:
+            detected = detect_features(
+                image, threshold=threshold, dark_features=dark_features, min_area=min_area
+            )
+            result["features"] = [
+                (feature.label, feature.x0, feature.y0, feature.x1, feature.y1, feature.area)
+                for feature in detected
+            ]
+    return result
+
+
+class WatchIngest:
+    """Feed images from a watched folder through a worker pool into the store."""
+    
+    def __init__(self, directory, store, checkpoint_path=None, workers=None, unit="mm",
+                 default_calibration=None, poll_interval=DEFAULT_POLL_INTERVAL,
+                 settle_seconds=DEFAULT_SETTLE_SECONDS, recursive=False, measure_options=None):
+        """
+        Initialize an ingest job.
+        
+        Args:
+            directory (str): Folder to watch
+            store (MeasurementStore): Where results are written
+            checkpoint_path (str): Checkpoint file (default inside the folder)
+            workers (int): Worker processes (default: all cores)
+            unit (str): Unit for metadata and default calibrations
+            default_calibration (float): Units per pixel for images without
+                a stored or metadata calibration, or None to leave them
+                uncalibrated
+            poll_interval (float): Seconds between folder scans
+            settle_seconds (float): Quiet period before a file is taken
+            recursive (bool): Include subfolders
+            measure_options (dict): Keyword arguments for measure_image
+        """
+        self.directory = directory
+        self.store = store
+        self.workers = workers or os.cpu_count() or 1
+        self.unit = unit
+        self.default_calibration = default_calibration
+        self.poll_interval = poll_interval
+        self.measure_options = measure_options or {}
+        self.checkpoint = Checkpoint(checkpoint_path or os.path.join(directory, CHECKPOINT_NAME))
+        self.poller = FolderPoller(directory, self.checkpoint, settle_seconds, recursive)
+        self.processed = 0
+        self.failed = 0
+    
+    def run(self, once=False, stop_event=None, report=print):
+        """
+        Process files until stopped.
+        
+        Args:
+            once (bool): Drain the files already in the folder, then return
+            stop_event (threading.Event): Stops the loop when set
+            report (callable): Receives one line per processed file, or None
+        """
+        queue = []
+        running = {}
+        next_poll = 0.0
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                if time.monotonic() >= next_poll:
+                    queue.extend(self.poller.poll())
+                    for path in self.poller.skipped:
+                        self.store.add_log(f"Watch folder: skipped empty file {path}")
+                        if report is not None:
+                            report(f"SKIPPED {path}: empty file")
+                    next_poll = time.monotonic() + self.poll_interval
+                
+                while queue and len(running) < self.workers * JOBS_PER_WORKER:
+                    path, size, mtime_ns = queue.pop(0)
+                    future = executor.submit(measure_image, path, **self.measure_options)
+                    running[future] = (path, size, mtime_ns)
+                
+                if running:
+                    timeout = max(0.0, next_poll - time.monotonic())
+                    finished, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                    self.store_results([(running.pop(future), future) for future in finished], report)
+                elif once and not queue and not self.poller.settling:
+                    return
+                elif stop_event is not None:
+                    stop_event.wait(max(0.0, next_poll - time.monotonic()))
+                else:
+                    time.sleep(max(0.0, next_poll - time.monotonic()))
+                
+                if stop_event is not None and stop_event.is_set():
+                    # Let running jobs finish so their work is not lost
+                    finished, _ = wait(running)
+                    self.store_results([(running.pop(future), future) for future in finished], report)
+                    return
+    
+    def store_results(self, finished, report=None):
+        """Write finished jobs to the store, then mark them in the checkpoint."""
+        if not finished:
+            return
+        entries = []
+        for (path, size, mtime_ns), future in finished:
+            entry = {"path": path, "size": size, "mtime_ns": mtime_ns}
+            try:
+                result = future.result()
+            except Exception as e:
+                # Recorded as done; a corrupt file would fail the same way again
+                self.failed += 1
+                entry["error"] = str(e)
+                self.store.add_log(f"Watch folder: failed to process {path}: {e}")
+                if report is not None:
+                    report(f"FAILED  {path}: {e}")
+            else:
+                self.processed += 1
+                summary = self.store_result(path, result)
+                if report is not None:
+                    report(f"OK      {path}: {summary}")
+            entries.append(entry)
+            self.poller.release(path)
+        
+        # The checkpoint only advances once the results are committed
+        self.store.flush()
+        self.checkpoint.record(entries)
+    
+    def resolve_calibration(self, image_id, image_hash, resolution):
+        """
+        Pick the calibration for an image and return (factor, unit, id, source).
+        
+        Order: latest stored calibration of the same image, resolution
+        metadata, configured default. Returns (None, None, None, None) if
+        there is none.
+        """
+        stored = self.store.latest_calibration(image_hash)
+        if stored is not None:
+            return stored["factor"], stored["unit"], stored["id"], "stored"
+        if resolution is not None and not resolution.suspect:
+            factor = resolution.calibration_factor(self.unit)
+            calibration_id = self.store.add_calibration(image_id, factor, self.unit, "metadata")
+            return factor, self.unit, calibration_id, "metadata"
+        if self.default_calibration is not None:
+            calibration_id = self.store.add_calibration(
+                image_id, self.default_calibration, self.unit, "default"
+            )
+            return self.default_calibration, self.unit, calibration_id, "default"
+        return None, None, None, None
+    
+    def store_result(self, path, result):
+        """Store one image's measurements and return a short summary."""
+        image_id = self.store.add_image(path, result["hash"], *result["size"])
+        factor, unit, calibration_id, source = self.resolve_calibration(
+            image_id, result["hash"], result["resolution"]
+        )
+        
+        def real(pixels):
+            return pixels * factor if factor is not None else None
+        
+        rows = []
+        now = time.time()
+        for point1, point2, pixel_distance in result["segments"]:
+            rows.append((
+                image_id, calibration_id, now, "segment", point1[0], point1[1], point2[0], point2[1],
+                pixel_distance, real(pixel_distance), unit, None, None, None
+            ))
+        for label, x0, y0, x1, y1, area in result["features"]:
+            # Bounding box width and height as two dimensions of the feature
+            width, height = x1 - x0 + 1, y1 - y0 + 1
+            rows.append((
+                image_id, calibration_id, now, "feature-width", x0, y0, x1 + 1, y0,
+                width, real(width), unit, f"F{label}", None, None
+            ))
+            rows.append((
+                image_id, calibration_id, now, "feature-height", x0, y0, x0, y1 + 1,
+                height, real(height), unit, f"F{label}", None, None
+            ))
+        self.store.add_measurements(rows)
+        
+        calibration = f"{factor:.6g} {unit}/px ({source})" if factor is not None else "uncalibrated"
+        summary = (
+            f"{len(result['segments'])} segments, {len(result['features'])} features, {calibration}"
+        )
+        self.store.add_log(f"Watch folder: {os.path.basename(path)}: {summary}", image_id)
+        return summary
+    
+    def close(self):
+        """Flush the store and close the checkpoint."""
+        self.store.flush()
+        self.checkpoint.close()
+
+
+def parse_segment(text):
+    """Parse 'x1,y1,x2,y2' into a segment."""
+    values = [float(value) for value in text.split(",")]
+    if len(values) != 4:
+        raise argparse.ArgumentTypeError("segments are given as x1,y1,x2,y2")
+    return ((values[0], values[1]), (values[2], values[3]))
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Measure images as they arrive in a folder")
+    parser.add_argument("directory", help="Folder to watch")
+    parser.add_argument("--db", default=DEFAULT_STORE_PATH, help="Measurement database")
+    parser.add_argument("--checkpoint", help=f"Checkpoint file (default: {CHECKPOINT_NAME} in the folder)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_POLL_INTERVAL, help="Seconds between scans")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE_SECONDS, help="Seconds a file must be unchanged")
+    parser.add_argument("--recursive", action="store_true", help="Include subfolders")
+    parser.add_argument("--once", action="store_true", help="Process the current backlog and exit")
+    parser.add_argument("--unit", choices=AVAILABLE_UNITS, default="mm", help="Unit for new calibrations")
+    parser.add_argument("--calibration", type=float, help="Default units per pixel for images without one")
+    parser.add_argument("--segment", type=parse_segment, action="append", default=[],
+                        help="Measure this segment (x1,y1,x2,y2 in pixels) on every image; repeatable")
+    parser.add_argument("--features", action="store_true", help="Run automatic feature detection")
+    parser.add_argument("--threshold", type=int, help="Feature threshold (default: Otsu)")
+    parser.add_argument("--light", action="store_true", help="Detect light features on a dark background")
+    parser.add_argument("--min-area", type=int, default=DEFAULT_MIN_AREA, help="Smallest feature area in pixels")
+    args = parser.parse_args()
+    
+    store = MeasurementStore(args.db)
+    ingest = WatchIngest(
+        args.directory,
+        store,
+        checkpoint_path=args.checkpoint,
+        workers=args.workers,
+        unit=args.unit,
+        default_calibration=args.calibration,
+        poll_interval=args.interval,
+        settle_seconds=args.settle,
+        recursive=args.recursive,
+        measure_options={
+            "segments": args.segment,
+            "features": args.features,
+            "threshold": args.threshold,
+            "dark_features": not args.light,
+            "min_area": args.min_area,
+        }
+    )
+    try:
+        ingest.run(once=args.once)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ingest.close()
+        store.close()
+    print(f"Processed {ingest.processed} images, {ingest.failed} failed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())